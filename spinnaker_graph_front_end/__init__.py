@@ -15,6 +15,8 @@ from spinn_front_end_common.utility_models import ReverseIpTagMultiCastSource
 
 from pacman.model.graphs.machine import MachineEdge
 
+from spinnaker_graph_front_end.extraction import ExtractionSession
+
 import os
 import logging
 import sys
@@ -33,7 +35,8 @@ __all__ = ['LivePacketGather', 'ReverseIpTagMultiCastSource', 'MachineEdge',
            'has_ran', 'machine_time_step', 'no_machine_time_steps',
            'timescale_factor', 'machine_graph', 'application_graph',
            'routing_infos', 'placements', 'transceiver', 'graph_mapper',
-           'buffer_manager', 'machine', 'is_allocated_machine']
+           'buffer_manager', 'machine', 'is_allocated_machine',
+           'extraction_session']
 
 
 def setup(hostname=None, graph_label=None, model_binary_module=None,
@@ -397,3 +400,22 @@ def machine():
 
 def is_allocated_machine():
     return globals_variables.get_simulator().is_allocated_machine
+
+
+def extraction_session():
+    """ Set the extra monitors up for fast data extraction for as long as\
+        the session is entered, so that any number of regions can be read\
+        without paying to set them up and put them back for each::
+
+            with sim.extraction_session() as session:
+                data = session.read_region(placement, region, n_bytes)
+
+    :rtype: \
+        :py:class:`spinnaker_graph_front_end.extraction.ExtractionSession`
+    """
+    simulator = globals_variables.get_simulator()
+    outputs = simulator._last_run_outputs
+    return ExtractionSession(
+        simulator.transceiver, simulator.placements, simulator.machine,
+        outputs["MemoryExtraMonitorVertices"],
+        outputs["MemoryMCGatherVertexToEthernetConnectedChipMapping"])
@@ -11,9 +11,10 @@ from spinn_front_end_common.abstract_models.impl import \
 from spinn_front_end_common.utilities.utility_objs import ExecutableType
 from spinn_front_end_common.utilities import constants
 from spinn_front_end_common.interface.simulation import simulation_utilities
-from spinnman.connections.udp_packet_connections import UDPConnection
 from spinnman.exceptions import SpinnmanTimeoutException
 from spinnman.messages.sdp import SDPMessage, SDPHeader, SDPFlag
+from spinnaker_graph_front_end.extraction import ReceivedSequenceTracker, \
+    default_connection_pool
 
 import math
 import time
@@ -26,7 +27,6 @@ class PacketGathererCheat(
         value="DATA_REGIONS",
         names=[('SYSTEM', 0),
                ('CONFIG', 1)])
-    PORT = 11111
     SDRAM_READING_SIZE_IN_BYTES_CONVERTER = 1024*1024
     CONFIG_SIZE = 8
     DATA_PER_FULL_PACKET = 68  # 272 bytes as removed scp header
@@ -61,9 +61,13 @@ class PacketGathererCheat(
         return ResourceContainer(
             sdram=SDRAMResource(
                 constants.SYSTEM_BYTES_REQUIREMENT + 4),
-            iptags=[IPtagResource(port=self.PORT, strip_sdp=True,
+            iptags=[IPtagResource(port=self.local_port, strip_sdp=True,
                                   ip_address="localhost")])
 
+    @property
+    def local_port(self):
+        return default_connection_pool().port_for(self)
+
     def get_binary_start_type(self):
         return ExecutableType.USES_SIMULATION_INTERFACE
 
@@ -113,8 +117,8 @@ class PacketGathererCheat(
                 flags=SDPFlag.REPLY_NOT_EXPECTED),
             data=data)
 
-        # create socket
-        connection = UDPConnection(local_host=None, local_port=self.PORT)
+        # get the socket, bound when the IP tag was asked for
+        connection = default_connection_pool().connection(self)
 
         # send
         transceiver.send_sdp_message(message=message)
@@ -123,7 +127,7 @@ class PacketGathererCheat(
         finished = False
         first = True
         seq_num = 1
-        seq_nums = set()
+        seq_nums = None
         while not finished:
             try:
                 data = connection.receive(
@@ -142,11 +146,9 @@ class PacketGathererCheat(
         return self._output
 
     def _calculate_missing_seq_nums(self, seq_nums):
-        missing_seq_nums = list()
-        for seq_num in range(1, self._max_seq_num):
-            if seq_num not in seq_nums:
-                missing_seq_nums.append(seq_num)
-        return missing_seq_nums
+        # only sequence numbers below the max are ever asked for again
+        missing_seq_nums = seq_nums.missing()
+        return missing_seq_nums[missing_seq_nums < self._max_seq_num]
 
     def _transmit_missing_seq_nums(
             self, seq_nums, transceiver, placement):
@@ -261,6 +263,7 @@ class PacketGathererCheat(
 
             # deduce max seq num for future use
             self._max_seq_num = self.calculate_max_seq_num()
+            seq_nums = ReceivedSequenceTracker(self._max_seq_num)
 
         else:  # some data packet
             first_packet_element = struct.unpack_from(
@@ -347,11 +350,8 @@ class PacketGathererCheat(
 
     def _check(self, seq_nums):
         # hand back
-        seq_nums = sorted(seq_nums)
         max_needed = self.calculate_max_seq_num()
-        if len(seq_nums) > max_needed:
-            raise Exception("I've received more data than i was expecting!!")
-        if len(seq_nums) != max_needed:
+        if seq_nums.n_received != max_needed:
             # self._print_length_of_received_seq_nums(seq_nums, max_needed)
             return False
         return True
@@ -371,12 +371,8 @@ class PacketGathererCheat(
 
     @staticmethod
     def _print_missing(seq_nums):
-        last_seq_num = 0
-        seq_nums = sorted(seq_nums)
-        for seq_num in seq_nums:
-            if seq_num != last_seq_num + 1:
-                print("from list I'm missing seq num {}".format(seq_num))
-            last_seq_num = seq_num
+        for seq_num in seq_nums.missing():
+            print("from list I'm missing seq num {}".format(seq_num))
 
     def _print_out_missing_seq_packets_data(self, data):
         reread_data = struct.unpack("<{}I".format(
@@ -11,8 +11,8 @@ from spinn_front_end_common.abstract_models.impl import \
 from spinn_front_end_common.utilities.utility_objs import ExecutableType
 from spinn_front_end_common.utilities import constants
 from spinn_front_end_common.interface.simulation import simulation_utilities
-from spinnman.connections.udp_packet_connections import UDPConnection
 from spinnman.messages.sdp import SDPMessage, SDPHeader, SDPFlag
+from spinnaker_graph_front_end.extraction import default_connection_pool
 
 
 class PacketGatherer(
@@ -21,7 +21,6 @@ class PacketGatherer(
     DATA_REGIONS = Enum(
         value="DATA_REGIONS",
         names=[('SYSTEM', 0)])
-    PORT = 11111
 
     def __init__(self):
         super(PacketGatherer, self).__init__(label="pg", constraints=None)
@@ -31,9 +30,13 @@ class PacketGatherer(
     def resources_required(self):
         return ResourceContainer(
             sdram=SDRAMResource(constants.SYSTEM_BYTES_REQUIREMENT),
-            iptags=[IPtagResource(port=self.PORT, strip_sdp=True,
+            iptags=[IPtagResource(port=self.local_port, strip_sdp=True,
                                   ip_address="localhost")])
 
+    @property
+    def local_port(self):
+        return default_connection_pool().port_for(self)
+
     def get_binary_start_type(self):
         return ExecutableType.USES_SIMULATION_INTERFACE
 
@@ -75,8 +78,8 @@ class PacketGatherer(
                 flags=SDPFlag.REPLY_NOT_EXPECTED),
             data=data)
 
-        # create socket
-        connection = UDPConnection(local_host=None, local_port=self.PORT)
+        # get the socket, bound when the IP tag was asked for
+        connection = default_connection_pool().connection(self)
 
         # send
         # set router time out
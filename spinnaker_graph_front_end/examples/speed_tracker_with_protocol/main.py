@@ -4,13 +4,10 @@ import traceback
 import spinnaker_graph_front_end as sim
 from pacman.model.constraints.placer_constraints import ChipAndCoreConstraint
 from pacman.model.graphs.machine import MachineEdge
-from spinnaker_graph_front_end.examples.speed_tracker_with_protocol.\
-    packet_gatherer_with_protocol import \
-    PacketGathererWithProtocol
+from spinnaker_graph_front_end.extraction import PacketGathererWithProtocol
 from spinnaker_graph_front_end.examples.speed_tracker_with_protocol.\
     sdram_reader_and_transmitter_with_protocol import \
     SDRAMReaderAndTransmitterWithProtocol
-import time
 from spinnaker_graph_front_end.examples import speed_tracker_with_protocol
 
 # data to write
@@ -22,7 +19,7 @@ sim.setup(model_binary_module=speed_tracker_with_protocol)
 # build verts
 reader = SDRAMReaderAndTransmitterWithProtocol(mbs)
 reader.add_constraint(ChipAndCoreConstraint(x=1, y=1))
-receiver = PacketGathererWithProtocol()
+receiver = PacketGathererWithProtocol(extended_protocol=False)
 
 # add verts to graph
 sim.add_machine_vertex_instance(reader)
@@ -38,8 +35,6 @@ sim.run()
 placements = sim.placements()
 
 # try getting data via mc transmission
-start = None
-end = None
 data = None
 
 sim.transceiver().set_watch_dog(False)
@@ -52,12 +47,10 @@ extra_monitor_vertices = sim.globals_variables. \
 
 try:
     print("starting data gathering")
-    start = float(time.time())
-    data = receiver.get_data(
+    data, telemetry = receiver.get_data(
         sim.transceiver(),
         placements.get_placement_of_vertex(reader),
         extra_monitor_vertices, placements)
-    end = float(time.time())
     # end sim
     sim.stop()
 
@@ -73,7 +66,7 @@ try:
             start_value += 1
 
     # print data
-    seconds = float(end - start)
+    seconds = telemetry.total_time
     speed = (mbs * 8) / seconds
     print("Read {} MB in {} seconds ({} Mb/s)".format(mbs, seconds, speed))
 
@@ -6,12 +6,10 @@ import gc
 import spinnaker_graph_front_end as sim
 from pacman.model.constraints.placer_constraints import ChipAndCoreConstraint
 from pacman.model.graphs.machine import MachineEdge
-from spinnaker_graph_front_end.examples.speed_tracker_with_protocol_search.\
-    packet_gatherer_with_protocol import PacketGathererWithProtocol
+from spinnaker_graph_front_end.extraction import PacketGathererWithProtocol
 from spinnaker_graph_front_end.examples.speed_tracker_with_protocol_search.\
     sdram_reader_and_transmitter_with_protocol import \
     SDRAMReaderAndTransmitterWithProtocol
-import time
 from spinnaker_graph_front_end.examples import \
     speed_tracker_with_protocol_search
 
@@ -64,13 +62,11 @@ class Runner(object):
 
         try:
             print("starting data gathering")
-            start = float(time.time())
 
-            data, lost_seq_data = receiver.get_data(
+            data, telemetry = receiver.get_data(
                 sim.transceiver(),
                 placements.get_placement_of_vertex(reader),
                 extra_monitor_vertices, placements)
-            end = float(time.time())
             # end sim
             sim.stop()
 
@@ -86,12 +82,17 @@ class Runner(object):
                     start_value += 1
 
             # print data
-            seconds = float(end - start)
+            seconds = telemetry.total_time
             speed = (mbs * 8) / seconds
             print("Read {} MB in {} seconds ({} Mb/s)".format(
                 mbs, seconds, speed))
             del data
-            return speed, True, False, "", lost_seq_data
+
+            # keep the whole record, to see where the time went
+            with open("extraction_telemetry.json", "a") as f:
+                f.write(telemetry.to_json())
+                f.write("\n")
+            return speed, True, False, "", telemetry.missing_per_round
 
         except Exception as e:
             # if boomed. end so that we can get iobuf
@@ -71,7 +71,7 @@ typedef enum regions_e {
 
 //! human readable definitions of the data in each region
 typedef enum config_elements {
-    NEW_SEQ_KEY, FIRST_DATA_KEY
+    NEW_SEQ_KEY, FIRST_DATA_KEY, IP_TAG
 } config_elements;
 
 //! values for the priority for each callback
@@ -108,6 +108,10 @@ void receive_data(uint key, uint payload){
         log_info("finding new seq num %d", payload);
         log_info("position in store is %d", position_in_store);
         data[0] = payload;
+
+        // carry on numbering from here, as the reader may go back to
+        // sending its original data after a repair
+        seq_num = payload;
     }
     else{
         if (key == first_data_key){
@@ -159,13 +163,14 @@ static bool initialize(uint32_t *timer_period) {
     new_sequence_key = config_address[NEW_SEQ_KEY];
     first_data_key = config_address[FIRST_DATA_KEY];
 
-    my_msg.tag = 1;                    // IPTag 1
+    my_msg.tag = config_address[IP_TAG];
     my_msg.dest_port = PORT_ETH;       // Ethernet
     my_msg.dest_addr = sv->eth_addr;   // Nearest Ethernet chip
 
     // fill in SDP source & flag fields
     my_msg.flags = 0x07;
-    my_msg.srce_port = 3;
+    // the host tells extractions sharing one socket apart by this core
+    my_msg.srce_port = spin1_get_core_id();
     my_msg.srce_addr = sv->p2p_addr;
 
     return true;
@@ -37,6 +37,64 @@
 //! other missing sdp seq nums in SDP
 #define SDP_COMMAND_FOR_MORE_MISSING_SDP_PACKETS 1001
 
+//! start missing sdp seq num (start, count) ranges in SDP (this includes n
+//! SDP packets expected and the total number of missing seq nums)
+#define SDP_COMMAND_FOR_START_OF_MISSING_SDP_RANGES 1002
+
+//! other missing sdp seq num (start, count) ranges in SDP
+#define SDP_COMMAND_FOR_MORE_MISSING_SDP_RANGES 1003
+
+//! missing sdp seq num (start, count) ranges reported while the original
+//! transmission is still going, to be repaired alongside it
+#define SDP_COMMAND_FOR_INTERIM_MISSING_SDP_RANGES 1004
+
+//! the most interim repairs that can be waiting to be sent
+#define MAX_INTERIM_REPAIRS 1024
+
+//! missing sdp seq num (start, count) ranges of the transfer before the one
+//! being sent, to be sent again alongside it, after the number of the round
+//! of repairs and how many seq nums the round asks for in all
+#define SDP_COMMAND_FOR_PREVIOUS_MISSING_SDP_RANGES 1005
+
+//! the most repairs of the previous transfer that can be waiting to be sent
+#define MAX_PREVIOUS_REPAIRS 1024
+
+//! compress a region of SDRAM, then say where the compressed copy is, so
+//! that it can be asked for like any other region
+#define SDP_COMMAND_FOR_COMPRESSING_REGION 1006
+
+//! the seq num of the packet saying where the compressed copy of a region is
+#define COMPRESSED_REGION_READY 0x1FFFFFFF
+
+//! checksum each page of a region of SDRAM, then say where the checksums
+//! are, so that they can be asked for like any other region
+#define SDP_COMMAND_FOR_PAGE_CHECKSUMS 1007
+
+//! the seq num of the packet saying where the checksums of the pages of a
+//! region are
+#define PAGE_CHECKSUMS_READY 0x1FFFFFFE
+
+//! set in the header of a record of one difference repeated
+#define RUN_FLAG 0x80000000
+
+//! the fewest repeats of a difference worth a record of their own
+#define MIN_RUN_LENGTH 4
+
+//! set in the seq num of a parity packet, whose other bits are the number of
+//! the group of data packets it covers
+#define PARITY_SEQ_NUM_FLAG 0x80000000
+
+//! set in the seq num of a checksum packet, whose other bits are the number
+//! of the block of data packets whose checksums it holds
+#define CHECKSUM_SEQ_NUM_FLAG 0x40000000
+
+//! set in the seq num of a packet of the transfer before the one being sent
+#define PREVIOUS_TRANSFER_SEQ_NUM_FLAG 0x20000000
+
+//! the seq num of the packet that ends a round of repairs of the transfer
+//! before the one being sent
+#define PREVIOUS_TRANSFER_ROUND_END (PREVIOUS_TRANSFER_SEQ_NUM_FLAG | 0x1FFFFFFF)
+
 //! timeout for trying to end SDP packet
 #define SDP_TIMEOUT 1000
 
@@ -106,6 +164,38 @@ static uint32_t data_written = 0;
 static uint32_t items_stored = 0;
 address_t missing_sdp_seq_num_sdram_address = NULL;
 
+//! interim repair stuff
+static uint32_t interim_repairs[MAX_INTERIM_REPAIRS];
+static uint32_t interim_repairs_added = 0;
+static uint32_t interim_repairs_sent = 0;
+static uint32_t next_original_seq_num = 0;
+
+//! previous transfer stuff
+static address_t previous_store_address = NULL;
+static uint32_t previous_items_stored = 0;
+static uint32_t previous_repairs[MAX_PREVIOUS_REPAIRS];
+static uint32_t previous_repairs_added = 0;
+static uint32_t previous_repairs_sent = 0;
+static uint32_t previous_round = 0;
+static uint32_t previous_round_left = 0;
+
+//! compression stuff
+static address_t compressed_store = NULL;
+static uint32_t compressed_store_size = 0;
+
+//! page checksum stuff
+static address_t page_checksum_store = NULL;
+static uint32_t page_checksum_store_size = 0;
+
+//! forward error correction stuff
+static uint32_t fec_group_size = 0;
+static uint32_t parity[ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE];
+
+//! checksum stuff
+static bool send_checksums = false;
+static uint32_t checksums[ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE];
+static uint32_t n_checksums = 0;
+
 //! retransmission dma stuff
 static uint32_t retransmit_seq_nums[ITEMS_PER_DATA_PACKET];
 static uint32_t current_dma_pointer = 0;
@@ -160,6 +250,373 @@ void send_data_block(
    //log_info("last data is %d", data_to_transmit[current_dma_pointer][number_of_elements_to_send - 1]);
 }
 
+//! \brief sends one packet of data again for a gap the host reported while
+//!        the original transmission is still going, then tells the packet
+//!        gatherer which seq num the original transmission carries on from
+void send_interim_repair(){
+    uint32_t seq_num =
+        interim_repairs[interim_repairs_sent % MAX_INTERIM_REPAIRS];
+    interim_repairs_sent += 1;
+
+    // only whole packets are repaired this way, the rest are left to the
+    // retransmission at the end
+    uint32_t items_per_packet = ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE;
+    uint32_t position = seq_num * items_per_packet;
+    if (position + items_per_packet > items_stored){
+        return;
+    }
+
+    address_t stored_data = (address_t) store_address;
+    while(!spin1_send_mc_packet(key + 1, seq_num, WITH_PAYLOAD)){
+    }
+    for (uint32_t item = 0; item < items_per_packet; item++){
+        while(!spin1_send_mc_packet(
+                key, stored_data[position + item], WITH_PAYLOAD)){
+        }
+    }
+    while(!spin1_send_mc_packet(key + 1, next_original_seq_num, WITH_PAYLOAD)){
+    }
+}
+
+//! \brief sends one packet of the transfer before the one being sent again,
+//!        flagged so the host can tell it from the new data, with the
+//!        end of the data padded with zeros; once all the round asks for
+//!        has been sent, ends the round with a packet the host knows by its
+//!        seq num.  Then
+//!        tells the packet gatherer which seq num the original transmission
+//!        carries on from
+void send_previous_repair(){
+    uint32_t seq_num =
+        previous_repairs[previous_repairs_sent % MAX_PREVIOUS_REPAIRS];
+    previous_repairs_sent += 1;
+
+    uint32_t items_per_packet = ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE;
+    uint32_t position = seq_num * items_per_packet;
+    if (position < previous_items_stored){
+        while(!spin1_send_mc_packet(
+                key + 1, PREVIOUS_TRANSFER_SEQ_NUM_FLAG | seq_num,
+                WITH_PAYLOAD)){
+        }
+        for (uint32_t item = 0; item < items_per_packet; item++){
+            uint32_t value = 0;
+            if (position + item < previous_items_stored){
+                value = previous_store_address[position + item];
+            }
+            while(!spin1_send_mc_packet(key, value, WITH_PAYLOAD)){
+            }
+        }
+    }
+
+    if (previous_repairs_sent == previous_repairs_added &&
+            previous_round_left == 0){
+        while(!spin1_send_mc_packet(
+                key + 1, PREVIOUS_TRANSFER_ROUND_END, WITH_PAYLOAD)){
+        }
+        for (uint32_t item = 0; item < items_per_packet; item++){
+            while(!spin1_send_mc_packet(key, 0, WITH_PAYLOAD)){
+            }
+        }
+    }
+    while(!spin1_send_mc_packet(key + 1, next_original_seq_num, WITH_PAYLOAD)){
+    }
+}
+
+//! \brief queues the seq nums in the (start, count) ranges of a report of
+//!        what the previous transfer is missing; a report of a new round
+//!        drops whatever is left of the round before
+void queue_previous_repairs(uint32_t data[], uint32_t length){
+    if (data[1] != previous_round){
+        previous_round = data[1];
+        previous_round_left = data[2];
+        previous_repairs_sent = previous_repairs_added;
+    }
+    for(uint32_t offset = 3; offset + 1 < length; offset += 2){
+        uint32_t end_seq_num = data[offset] + data[offset + 1];
+        for(uint32_t seq_num = data[offset]; seq_num < end_seq_num;
+                seq_num++){
+            if (previous_repairs_added - previous_repairs_sent >=
+                    MAX_PREVIOUS_REPAIRS){
+                return;
+            }
+            previous_repairs[previous_repairs_added % MAX_PREVIOUS_REPAIRS] =
+                seq_num;
+            previous_repairs_added += 1;
+            if (previous_round_left > 0){
+                previous_round_left -= 1;
+            }
+        }
+    }
+}
+
+//! \brief compresses words of SDRAM, replacing each with its difference
+//!        from the word before and recording repeats of a difference once
+//!        with how many times it repeats.  The compressed data is the size
+//!        of the data followed by records, each a header and either one
+//!        difference repeated (if RUN_FLAG is set in the header) or as many
+//!        differences as the header says
+//! \param[in] data the words to compress
+//! \param[in] n_bytes the size of the data
+//! \param[in] compressed where to put the compressed data, which needs
+//!            room for two words more than the data
+//! \return the number of words of compressed data
+uint32_t compress_delta_rle(
+        address_t data, uint32_t n_bytes, address_t compressed){
+    uint32_t n_words =
+        (n_bytes + WORD_TO_BYTE_MULTIPLIER - 1) / WORD_TO_BYTE_MULTIPLIER;
+    uint32_t n_written = 0;
+    compressed[n_written++] = n_bytes;
+
+    // where the header of the literal record being added to is, or 0 if
+    // there is none, as the size is always first
+    uint32_t literal_header = 0;
+    uint32_t previous = 0;
+    uint32_t position = 0;
+    while (position < n_words){
+        uint32_t delta = data[position] - previous;
+        uint32_t run = 1;
+        while (position + run < n_words &&
+                data[position + run] - data[position + run - 1] == delta){
+            run++;
+        }
+        if (run >= MIN_RUN_LENGTH){
+            compressed[n_written++] = RUN_FLAG | run;
+            compressed[n_written++] = delta;
+            literal_header = 0;
+        }
+        else{
+            if (literal_header == 0){
+                literal_header = n_written++;
+                compressed[literal_header] = 0;
+            }
+            for (uint32_t item = 0; item < run; item++){
+                compressed[n_written++] = delta;
+            }
+            compressed[literal_header] += run;
+        }
+        previous = data[position + run - 1];
+        position += run;
+    }
+    return n_written;
+}
+
+//! \brief makes sure a store of SDRAM is big enough, replacing it with a
+//!        bigger one if not
+//! \param[in,out] store the store, or NULL if there is none yet
+//! \param[in,out] store_size the size of the store
+//! \param[in] size the size the store needs to be
+//! \return whether the store is big enough
+bool grow_store(address_t *store, uint32_t *store_size, uint32_t size){
+    if (size <= *store_size){
+        return true;
+    }
+    if (*store != NULL){
+        sark_xfree(sv->sdram_heap, *store,
+                   ALLOC_LOCK + ALLOC_ID + (sark_vec->app_id << 8));
+    }
+    *store = sark_xalloc(
+        sv->sdram_heap, size, 0,
+        ALLOC_LOCK + ALLOC_ID + (sark_vec->app_id << 8));
+    *store_size = size;
+    if (*store == NULL){
+        log_error("failed to allocate %d bytes of store", size);
+        *store_size = 0;
+        return false;
+    }
+    return true;
+}
+
+//! \brief tells the host where a copy made of a region is and how big it
+//!        is, in a packet of its own
+//! \param[in] ready_seq_num the seq num saying what the copy is
+//! \param[in] copy where the copy is
+//! \param[in] n_bytes the size of the copy
+void send_prepared_region(
+        uint32_t ready_seq_num, address_t copy, uint32_t n_bytes){
+    uint32_t items_per_packet = ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE;
+    while(!spin1_send_mc_packet(key + 1, ready_seq_num, WITH_PAYLOAD)){
+    }
+    while(!spin1_send_mc_packet(key, (uint32_t) copy, WITH_PAYLOAD)){
+    }
+    while(!spin1_send_mc_packet(key, n_bytes, WITH_PAYLOAD)){
+    }
+    for (uint32_t item = 2; item < items_per_packet; item++){
+        while(!spin1_send_mc_packet(key, 0, WITH_PAYLOAD)){
+        }
+    }
+    while(!spin1_send_mc_packet(key + 1, next_original_seq_num, WITH_PAYLOAD)){
+    }
+}
+
+//! \brief compresses a region of SDRAM into the compressed store, growing
+//!        it if need be, then tells the host where the compressed copy is
+//!        and how big it is
+//! \param[in] data the region to compress
+//! \param[in] n_bytes the size of the region
+void compress_region(address_t data, uint32_t n_bytes){
+    uint32_t max_size = (
+        (n_bytes + WORD_TO_BYTE_MULTIPLIER - 1) / WORD_TO_BYTE_MULTIPLIER +
+        2) * WORD_TO_BYTE_MULTIPLIER;
+    if (!grow_store(&compressed_store, &compressed_store_size, max_size)){
+        return;
+    }
+    uint32_t n_written = compress_delta_rle(data, n_bytes, compressed_store);
+    send_prepared_region(
+        COMPRESSED_REGION_READY, compressed_store,
+        n_written * WORD_TO_BYTE_MULTIPLIER);
+}
+
+//! \brief checksums each page of a region of SDRAM into the page checksum
+//!        store, growing it if need be, then tells the host where the
+//!        checksums are and how big they are.  The checksum of a page is
+//!        the sum of its words, each times one more than twice its index
+//!        in the page, with the bytes past the end of the region taken
+//!        as 0, so that moved words change it as well as changed ones
+//! \param[in] data the region to checksum
+//! \param[in] n_bytes the size of the region
+//! \param[in] page_size the size of a page, a whole number of words
+void checksum_pages(address_t data, uint32_t n_bytes, uint32_t page_size){
+    uint32_t n_words =
+        (n_bytes + WORD_TO_BYTE_MULTIPLIER - 1) / WORD_TO_BYTE_MULTIPLIER;
+    uint32_t words_per_page = page_size / WORD_TO_BYTE_MULTIPLIER;
+    uint32_t n_pages = (n_words + words_per_page - 1) / words_per_page;
+    if (!grow_store(&page_checksum_store, &page_checksum_store_size,
+                    n_pages * WORD_TO_BYTE_MULTIPLIER)){
+        return;
+    }
+    for (uint32_t page = 0; page < n_pages; page++){
+        uint32_t start = page * words_per_page;
+        uint32_t end = start + words_per_page;
+        if (end > n_words){
+            end = n_words;
+        }
+        uint32_t checksum = 0;
+        for (uint32_t position = start; position < end; position++){
+            uint32_t value = data[position];
+            uint32_t n_left = n_bytes - position * WORD_TO_BYTE_MULTIPLIER;
+            if (n_left < WORD_TO_BYTE_MULTIPLIER){
+                value &= (1 << (n_left * 8)) - 1;
+            }
+            checksum += value * (2 * (position - start) + 1);
+        }
+        page_checksum_store[page] = checksum;
+    }
+    send_prepared_region(
+        PAGE_CHECKSUMS_READY, page_checksum_store,
+        n_pages * WORD_TO_BYTE_MULTIPLIER);
+}
+
+//! \brief adds a block of data to the parity of the current group
+//! \param[in] block the data of one packet, without its seq num
+void add_to_parity(uint32_t *block){
+    for (uint32_t item = 0; item < ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE;
+            item++){
+        parity[item] ^= block[item];
+    }
+}
+
+//! \brief sends the parity of the group of data packets just sent, so the
+//!        host can rebuild one lost packet of the group, then tells the
+//!        packet gatherer which seq num the original transmission carries on
+//!        from
+void send_parity(){
+    uint32_t items_per_packet = ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE;
+
+    // the packet gatherer ends a packet early at anything that looks like
+    // the end flag, so leave such a group to the retransmission
+    bool can_send = true;
+    for (uint32_t item = 0; item < items_per_packet; item++){
+        if (parity[item] == END_FLAG){
+            can_send = false;
+        }
+    }
+
+    if (can_send){
+        uint32_t group = (next_original_seq_num / fec_group_size) - 1;
+        while(!spin1_send_mc_packet(
+                key + 1, PARITY_SEQ_NUM_FLAG | group, WITH_PAYLOAD)){
+        }
+        for (uint32_t item = 0; item < items_per_packet; item++){
+            while(!spin1_send_mc_packet(key, parity[item], WITH_PAYLOAD)){
+            }
+        }
+        while(!spin1_send_mc_packet(
+                key + 1, next_original_seq_num, WITH_PAYLOAD)){
+        }
+    }
+
+    for (uint32_t item = 0; item < items_per_packet; item++){
+        parity[item] = 0;
+    }
+}
+
+//! \brief works out the checksum of the data of one packet: the sum of each
+//!        word times an odd weight, so any change to one word changes it
+//! \param[in] block the data of the packet, without its seq num
+//! \param[in] n_items the number of words in the packet
+//! \return the checksum
+uint32_t packet_checksum(uint32_t *block, uint32_t n_items){
+    uint32_t sum = 0;
+    for (uint32_t item = 0; item < n_items; item++){
+        sum += ((2 * item) + 1) * block[item];
+    }
+    return sum;
+}
+
+//! \brief sends the checksums of the block of data packets just sent, padded
+//!        to a whole packet, then tells the packet gatherer which seq num the
+//!        original transmission carries on from
+//! \param[in] last_seq_num the seq num of the last packet in the block
+void send_checksum_packet(uint32_t last_seq_num){
+    uint32_t items_per_packet = ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE;
+
+    // the packet gatherer ends a packet early at anything that looks like
+    // the end flag, so leave such a block unchecked
+    bool can_send = true;
+    for (uint32_t item = 0; item < n_checksums; item++){
+        if (checksums[item] == END_FLAG){
+            can_send = false;
+        }
+    }
+
+    if (can_send){
+        uint32_t block = last_seq_num / items_per_packet;
+        while(!spin1_send_mc_packet(
+                key + 1, CHECKSUM_SEQ_NUM_FLAG | block, WITH_PAYLOAD)){
+        }
+        for (uint32_t item = 0; item < items_per_packet; item++){
+            uint32_t value = 0;
+            if (item < n_checksums){
+                value = checksums[item];
+            }
+            while(!spin1_send_mc_packet(key, value, WITH_PAYLOAD)){
+            }
+        }
+        while(!spin1_send_mc_packet(
+                key + 1, next_original_seq_num, WITH_PAYLOAD)){
+        }
+    }
+    n_checksums = 0;
+}
+
+//! \brief queues the seq nums in the (start, count) ranges of an interim
+//!        report of gaps, dropping any that do not fit; the host asks for
+//!        those again at the end
+void queue_interim_repairs(uint32_t data[], uint32_t length){
+    for(uint32_t offset = 1; offset + 1 < length; offset += 2){
+        uint32_t end_seq_num = data[offset] + data[offset + 1];
+        for(uint32_t seq_num = data[offset]; seq_num < end_seq_num;
+                seq_num++){
+            if (interim_repairs_added - interim_repairs_sent >=
+                    MAX_INTERIM_REPAIRS){
+                return;
+            }
+            interim_repairs[interim_repairs_added % MAX_INTERIM_REPAIRS] =
+                seq_num;
+            interim_repairs_added += 1;
+        }
+    }
+}
+
 //! \brief sets off a dma reading a block of SDRAM for dara
 //! \param[in] items_to_read the number of word items to read
 //! \param[in] dma_tag the dma tag assocated with this read.
@@ -227,11 +684,54 @@ void dma_complete_reading_for_original_transmission(uint unused, uint unused2){
         send_data_block(
             current_dma_pointer, items_to_transmit, key_to_transmit);
         //log_info("finished sending data");
+        next_original_seq_num += 1;
+
+        // the last packet is never in a whole group, so only these count
+        if (fec_group_size != 0){
+            add_to_parity(&data_to_transmit[current_dma_pointer][
+                items_to_transmit -
+                (ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE)]);
+            if (next_original_seq_num % fec_group_size == 0){
+                send_parity();
+            }
+        }
+
+        if (send_checksums){
+            checksums[n_checksums] = packet_checksum(
+                &data_to_transmit[current_dma_pointer][
+                    items_to_transmit -
+                    (ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE)],
+                ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE);
+            n_checksums += 1;
+            if (n_checksums == ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE){
+                send_checksum_packet(next_original_seq_num - 1);
+            }
+        }
+
+        // interleave a repair of a reported gap with the new data
+        if (interim_repairs_sent != interim_repairs_added){
+            send_interim_repair();
+        }
+
+        // and a repair of the transfer before this one
+        if (previous_repairs_sent != previous_repairs_added){
+            send_previous_repair();
+        }
     }
     else{
         //log_info("sending last data");
         //log_info("position_in_store = %d, to get to %d. seq num = %d", position_in_store, (uint)bytes_to_write / WORD_TO_BYTE_MULTIPLIER, possible_seq_num);
         //log_info("trasnmitting %d elements", num_items_read);
+
+        // the checksums of the last block go before the last packet, as the
+        // host stops listening for original data after it; a single packet
+        // transfer is left unchecked, as its first packet cannot follow one
+        if (send_checksums && key_to_transmit == key){
+            checksums[n_checksums] = packet_checksum(
+                data_to_transmit[current_dma_pointer], num_items_read);
+            n_checksums += 1;
+            send_checksum_packet(next_original_seq_num);
+        }
         send_data_block(
             current_dma_pointer, num_items_read, key_to_transmit);
         //log_info("finished sending data");
@@ -240,6 +740,11 @@ void dma_complete_reading_for_original_transmission(uint unused, uint unused2){
         }
         //log_info("finished sending original data with end flag");
         has_finished = true;
+
+        // send whatever repairs of the transfer before this one are left
+        while (previous_repairs_sent != previous_repairs_added){
+            send_previous_repair();
+        }
     }
 
     if (TDMA_WAIT_PERIOD != 0){
@@ -260,6 +765,21 @@ void write_missing_sdp_seq_nums_into_sdram(
     data_written += (length - start_offset);
 }
 
+//! (re)allocate the SDRAM that the missing seq nums are stored in
+void allocate_missing_seq_num_store(uint32_t size_of_data){
+    //log_info("doing first with xalloc of %d bytes", size_of_data);
+    if(missing_sdp_seq_num_sdram_address != NULL){
+        sark_xfree(sv->sdram_heap, missing_sdp_seq_num_sdram_address,
+                   ALLOC_LOCK + ALLOC_ID + (sark_vec->app_id << 8));
+        missing_sdp_seq_num_sdram_address = NULL;
+    }
+    missing_sdp_seq_num_sdram_address = sark_xalloc(
+        sv->sdram_heap, size_of_data, 0,
+        ALLOC_LOCK + ALLOC_ID + (sark_vec->app_id << 8));
+    //log_info("address to write to is %d",
+    //         missing_sdp_seq_num_sdram_address);
+}
+
 //! entrance method for storing SDP seq nums into SDRAM
 void store_missing_seq_nums(uint32_t data[], ushort length, bool first){
     uint32_t start_reading_offset = 1;
@@ -273,19 +793,8 @@ void store_missing_seq_nums(uint32_t data[], ushort length, bool first){
         uint32_t size_of_data =
             ((missing_sdp_packets * ITEMS_PER_DATA_PACKET) *
             WORD_TO_BYTE_MULTIPLIER) + END_FLAG_SIZE;
-
-        //log_info("doing first with xalloc of %d bytes", size_of_data);
-        if(missing_sdp_seq_num_sdram_address != NULL){
-            sark_xfree(sv->sdram_heap, missing_sdp_seq_num_sdram_address,
-                       ALLOC_LOCK + ALLOC_ID + (sark_vec->app_id << 8));
-            missing_sdp_seq_num_sdram_address = NULL;
-        }
-        missing_sdp_seq_num_sdram_address = sark_xalloc(
-            sv->sdram_heap, size_of_data, 0,
-            ALLOC_LOCK + ALLOC_ID + (sark_vec->app_id << 8));
+        allocate_missing_seq_num_store(size_of_data);
         start_reading_offset = 2;
-        //log_info("address to write to is %d",
-        //         missing_sdp_seq_num_sdram_address);
     }
     
     // write data to sdram and update packet counter
@@ -293,6 +802,37 @@ void store_missing_seq_nums(uint32_t data[], ushort length, bool first){
     missing_sdp_packets -= 1;
 }
 
+//! entrance method for storing SDP seq num ranges into SDRAM, expanded
+//! into the same list of seq nums as store_missing_seq_nums makes
+void store_missing_seq_ranges(uint32_t data[], ushort length, bool first){
+    uint32_t start_reading_offset = 1;
+    if (first){
+        missing_sdp_packets = data[1];
+        uint32_t total_missing_seq_nums = data[2];
+        //log_info("final seq num count is %d", total_missing_seq_nums);
+
+        // leave room for the end flag, and for the retransmission dma
+        // reading a whole packet's worth past it
+        uint32_t size_of_data =
+            (total_missing_seq_nums + ITEMS_PER_DATA_PACKET) *
+            WORD_TO_BYTE_MULTIPLIER;
+        allocate_missing_seq_num_store(size_of_data);
+        start_reading_offset = 3;
+    }
+
+    // expand each (start, count) pair and update packet counter
+    for(ushort offset = start_reading_offset; offset + 1 < length;
+            offset += 2){
+        uint32_t seq_num = data[offset];
+        uint32_t end_seq_num = seq_num + data[offset + 1];
+        for(; seq_num < end_seq_num; seq_num++){
+            missing_sdp_seq_num_sdram_address[data_written] = seq_num;
+            data_written += 1;
+        }
+    }
+    missing_sdp_packets -= 1;
+}
+
 //! sets off a DMA for retransmission stuff
 void retransmission_dma_read(){
     // update dma pointer for oscillation
@@ -391,34 +931,77 @@ void sdp_reception(uint mailbox, uint port){
     // start the process of sending data
     if(msg->data[0] == SDP_COMMAND_FOR_SENDING_DATA){
         //log_info("starting the send of orginial data");
+        uint32_t length =
+            (msg->length - LENGTH_OF_SDP_HEADER) / WORD_TO_BYTE_MULTIPLIER;
+        fec_group_size = 0;
+        if (length > 1){
+            fec_group_size = msg->data[1];
+        }
+        send_checksums = false;
+        if (length > 2){
+            send_checksums = (msg->data[2] != 0);
+        }
+
+        // what was being sent can now be repaired alongside what is sent
+        // next, which is a region of SDRAM if the host gives one
+        previous_store_address = (address_t) store_address;
+        previous_items_stored = items_stored;
+        if (length > 4){
+            store_address = (address_t *) msg->data[3];
+            bytes_to_write = msg->data[4];
+            items_stored = (bytes_to_write + WORD_TO_BYTE_MULTIPLIER - 1) /
+                WORD_TO_BYTE_MULTIPLIER;
+        }
         spin1_msg_free((sdp_msg_t *) msg);
 
         // reset states
         first_transmission = true;
+        has_finished = false;
         transmit_dma_pointer = 0;
         position_in_store = 0;
+        next_original_seq_num = 0;
+        interim_repairs_added = 0;
+        interim_repairs_sent = 0;
+        previous_repairs_added = 0;
+        previous_repairs_sent = 0;
+        previous_round = 0;
+        previous_round_left = 0;
+        n_checksums = 0;
+        for (uint32_t item = 0;
+                item < ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE; item++){
+            parity[item] = 0;
+        }
         read(DMA_TAG_READ_FOR_TRANSMISSION, 1,
              ITEMS_PER_DATA_PACKET - SEQUENCE_NUMBER_SIZE);
     }
 
     // start or continue to gather missing packet list
     else if(msg->data[0] == SDP_COMMAND_FOR_START_OF_MISSING_SDP_PACKETS ||
-            msg->data[0] == SDP_COMMAND_FOR_MORE_MISSING_SDP_PACKETS){
+            msg->data[0] == SDP_COMMAND_FOR_MORE_MISSING_SDP_PACKETS ||
+            msg->data[0] == SDP_COMMAND_FOR_START_OF_MISSING_SDP_RANGES ||
+            msg->data[0] == SDP_COMMAND_FOR_MORE_MISSING_SDP_RANGES){
         //log_info("starting resend mode");
+        bool first = (
+            msg->data[0] == SDP_COMMAND_FOR_START_OF_MISSING_SDP_PACKETS ||
+            msg->data[0] == SDP_COMMAND_FOR_START_OF_MISSING_SDP_RANGES);
 
         // reset state, as could be here from multiple attempts
-        if(msg->data[0] == SDP_COMMAND_FOR_START_OF_MISSING_SDP_PACKETS){
+        if(first){
             data_written= 0;
             missing_sdp_packets = 0;
             position_for_retransmission = 0;
             position_in_read_data = 0;
         }
 
-
-        store_missing_seq_nums(
-            msg->data,
-            ((msg->length - LENGTH_OF_SDP_HEADER) / WORD_TO_BYTE_MULTIPLIER),
-            msg->data[0] == SDP_COMMAND_FOR_START_OF_MISSING_SDP_PACKETS);
+        uint32_t length =
+            (msg->length - LENGTH_OF_SDP_HEADER) / WORD_TO_BYTE_MULTIPLIER;
+        if(msg->data[0] == SDP_COMMAND_FOR_START_OF_MISSING_SDP_RANGES ||
+                msg->data[0] == SDP_COMMAND_FOR_MORE_MISSING_SDP_RANGES){
+            store_missing_seq_ranges(msg->data, length, first);
+        }
+        else{
+            store_missing_seq_nums(msg->data, length, first);
+        }
         //log_info("free message");
         spin1_msg_free((sdp_msg_t *) msg);
 
@@ -435,6 +1018,49 @@ void sdp_reception(uint mailbox, uint port){
         }
     }
 
+    // queue gaps reported while the original transmission is still going
+    else if(msg->data[0] == SDP_COMMAND_FOR_INTERIM_MISSING_SDP_RANGES){
+        if(!has_finished){
+            queue_interim_repairs(
+                msg->data,
+                (msg->length - LENGTH_OF_SDP_HEADER) /
+                WORD_TO_BYTE_MULTIPLIER);
+        }
+        spin1_msg_free((sdp_msg_t *) msg);
+    }
+
+    // queue what the transfer before this one is missing, sending it
+    // straight away if nothing else is being sent
+    else if(msg->data[0] == SDP_COMMAND_FOR_PREVIOUS_MISSING_SDP_RANGES){
+        queue_previous_repairs(
+            msg->data,
+            (msg->length - LENGTH_OF_SDP_HEADER) / WORD_TO_BYTE_MULTIPLIER);
+        spin1_msg_free((sdp_msg_t *) msg);
+        if(has_finished){
+            while (previous_repairs_sent != previous_repairs_added){
+                send_previous_repair();
+            }
+        }
+    }
+
+    // compress a region, to be asked for once its compressed copy is ready
+    else if(msg->data[0] == SDP_COMMAND_FOR_COMPRESSING_REGION){
+        address_t data = (address_t) msg->data[1];
+        uint32_t n_bytes = msg->data[2];
+        spin1_msg_free((sdp_msg_t *) msg);
+        compress_region(data, n_bytes);
+    }
+
+    // checksum the pages of a region, to find which have changed since
+    // they were last read
+    else if(msg->data[0] == SDP_COMMAND_FOR_PAGE_CHECKSUMS){
+        address_t data = (address_t) msg->data[1];
+        uint32_t n_bytes = msg->data[2];
+        uint32_t page_size = msg->data[3];
+        spin1_msg_free((sdp_msg_t *) msg);
+        checksum_pages(data, n_bytes, page_size);
+    }
+
     else{
         log_error("received unknown sdp packet");
     }
@@ -12,7 +12,6 @@ from spinnaker_graph_front_end.examples.\
     speed_tracker_with_protocol_search_c_code_version.\
     sdram_reader_and_transmitter_with_protocol import \
     SDRAMReaderAndTransmitterWithProtocol
-import time
 from spinnaker_graph_front_end.examples import \
     speed_tracker_with_protocol_search_c_code_version
 
@@ -66,12 +65,10 @@ class Runner(object):
 
         try:
             print("starting data gathering")
-            start = float(time.time())
-            data, lost_seq_data = receiver.get_data(
+            data, telemetry = receiver.get_data(
                 sim.transceiver(),
                 placements.get_placement_of_vertex(reader),
                 extra_monitor_vertices, placements)
-            end = float(time.time())
             # end sim
             sim.stop()
 
@@ -87,11 +84,16 @@ class Runner(object):
                     start_value += 1
 
             # print data
-            seconds = float(end - start)
+            seconds = telemetry.total_time
             speed = (mbs * 8) / seconds
             print("Read {} MB in {} seconds ({} Mb/s)".format(
                 mbs, seconds, speed))
-            return speed, True, False, "", lost_seq_data
+
+            # keep the whole record, to see where the time went
+            with open("extraction_telemetry.json", "a") as f:
+                f.write(telemetry.to_json())
+                f.write("\n")
+            return speed, True, False, "", telemetry.missing_per_round
 
         except Exception as e:
             # if boomed. end so that we can get iobuf
@@ -10,11 +10,13 @@ from spinn_front_end_common.abstract_models.impl import \
 from spinn_front_end_common.utilities.utility_objs import ExecutableType
 from spinn_front_end_common.utilities import constants
 from spinn_front_end_common.interface.simulation import simulation_utilities
+from spinnaker_graph_front_end.extraction import \
+    AbstractProvidesExtractionSize
 
 
 class SDRAMReaderAndTransmitterWithProtocol(
         MachineVertex, MachineDataSpecableVertex, AbstractHasAssociatedBinary,
-        AbstractProvidesNKeysForPartition):
+        AbstractProvidesNKeysForPartition, AbstractProvidesExtractionSize):
 
     SDRAM_READING_SIZE_IN_BYTES_CONVERTER = 1024*1024
     KEY_REGION_SIZE = 8
@@ -25,10 +27,14 @@ class SDRAMReaderAndTransmitterWithProtocol(
                ('CONFIG', 1)])
 
     def __init__(self, mbs):
-        self._mbs = mbs * self.SDRAM_READING_SIZE_IN_BYTES_CONVERTER
+        self._mbs = int(mbs * self.SDRAM_READING_SIZE_IN_BYTES_CONVERTER)
         super(SDRAMReaderAndTransmitterWithProtocol, self).__init__(
             label="speed", constraints=None)
 
+    @property
+    def n_bytes_to_extract(self):
+        return self._mbs
+
     @property
     def resources_required(self):
         return ResourceContainer(sdram=SDRAMResource(
@@ -0,0 +1,49 @@
+from .abstract_output_sink import AbstractOutputSink
+from .abstract_provides_extraction_size import \
+    AbstractProvidesExtractionSize
+from .abstract_transport import AbstractTransport
+from .bytearray_output_sink import BytearrayOutputSink
+from .capturing_transport import CapturingTransport
+from .data_extraction import extract_data, extract_data_chunks, \
+    extract_data_multiplexed, extract_data_pipelined
+from .data_extraction_stream import DataExtractionStream
+from .delta_rle import compress_delta_rle, decompress_delta_rle
+from .extraction_session import ExtractionSession
+from .extraction_telemetry import ExtractionTelemetry
+from .in_memory_transport import InMemoryTransport
+from .incremental_extraction import RegionCache, extract_data_incremental, \
+    page_checksums
+from .local_board import LocalBoard
+from .local_board_benchmark import benchmark_extraction
+from .memory_mapped_output_sink import MemoryMappedOutputSink
+from .nack_pacer import NackPacer
+from .packet_gatherer_with_protocol import PacketGathererWithProtocol
+from .packet_ring import PacketReceiverThread, PacketRing
+from .packet_trace import PacketTraceReader, PacketTraceWriter
+from .receive_timeout_estimator import ReceiveTimeoutEstimator
+from .received_sequence_tracker import ReceivedSequenceTracker
+from .replay_transport import ReplayTransport
+from .router_timeout_tuner import RouterTimeoutTuner
+from .stream_demultiplexer import StreamDemultiplexer
+from .trace_replay import replay_trace
+from .udp_connection_pool import UDPConnectionPool, default_connection_pool
+from .udp_packet_ingest import UDPPacketIngest
+from .udp_sdp_transport import UDPSDPTransport
+
+__all__ = ["AbstractOutputSink", "AbstractProvidesExtractionSize",
+           "AbstractTransport", "BytearrayOutputSink",
+           "CapturingTransport", "DataExtractionStream",
+           "ExtractionSession", "ExtractionTelemetry", "InMemoryTransport",
+           "LocalBoard",
+           "MemoryMappedOutputSink", "NackPacer",
+           "PacketGathererWithProtocol", "PacketReceiverThread",
+           "PacketRing", "PacketTraceReader", "PacketTraceWriter",
+           "ReceiveTimeoutEstimator", "ReceivedSequenceTracker",
+           "RegionCache", "ReplayTransport", "RouterTimeoutTuner",
+           "StreamDemultiplexer",
+           "UDPConnectionPool", "UDPPacketIngest", "UDPSDPTransport",
+           "benchmark_extraction", "compress_delta_rle",
+           "decompress_delta_rle", "default_connection_pool",
+           "extract_data", "extract_data_chunks",
+           "extract_data_incremental", "extract_data_multiplexed",
+           "extract_data_pipelined", "page_checksums", "replay_trace"]
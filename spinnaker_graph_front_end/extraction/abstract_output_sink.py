@@ -0,0 +1,49 @@
+from six import add_metaclass
+
+from spinn_utilities.abstract_base import AbstractBase, abstractmethod
+
+
+@add_metaclass(AbstractBase)
+class AbstractOutputSink(object):
+    """ Somewhere for an extraction to put the data it receives.  Packets\
+        can arrive in any order, so the sink provides the whole output up\
+        front and each packet is written straight to its own offset.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def allocate(self, n_bytes):
+        """ Provide the storage for the whole of an extraction
+
+        :param n_bytes: the size of the data being extracted
+        :type n_bytes: int
+        :return: a writable buffer of exactly that size, which is also what\
+            the extraction hands back as its result
+        :rtype: bytearray or numpy.ndarray
+        """
+
+    def save_checkpoint(self, output, received):
+        """ Keep what an unfinished extraction has received so far, so\
+            that a later extraction can resume from it.  By default a sink\
+            cannot keep checkpoints, and this does nothing.
+
+        :param output: the output, as allocated by this sink
+        :type output: bytearray or numpy.ndarray
+        :param received: one flag per sequence number, set where that\
+            sequence number has arrived
+        :type received: numpy.ndarray
+        """
+
+    def load_checkpoint(self):
+        """ Get what an earlier unfinished extraction had received
+
+        :return: the output and the received flags of the last checkpoint,\
+            or None if there is none
+        :rtype: tuple(bytearray or numpy.ndarray, numpy.ndarray) or None
+        """
+        return None
+
+    def remove_checkpoint(self):
+        """ Forget any checkpoint, as the extraction has finished
+        """
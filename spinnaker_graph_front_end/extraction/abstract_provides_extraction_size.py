@@ -0,0 +1,20 @@
+from six import add_metaclass
+
+from spinn_utilities.abstract_base import AbstractBase, abstractproperty
+
+
+@add_metaclass(AbstractBase)
+class AbstractProvidesExtractionSize(object):
+    """ A vertex whose reader core knows how much data it will send before\
+        it is asked, so that the host can make the output ready up front\
+        and ask for any packet again, the first included, if it is lost.
+    """
+
+    __slots__ = ()
+
+    @abstractproperty
+    def n_bytes_to_extract(self):
+        """ The size of the data the reader core sends
+
+        :rtype: int
+        """
@@ -0,0 +1,56 @@
+from six import add_metaclass
+
+from spinn_utilities.abstract_base import AbstractBase, abstractmethod
+
+
+@add_metaclass(AbstractBase)
+class AbstractTransport(object):
+    """ How an extraction talks to a reader core: requests go out as SDP\
+        messages, and the packets of data come back one at a time.  This\
+        keeps the protocol itself independent of the sockets and the\
+        machine, so that it can be run against a stand-in for a board.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def send(self, message):
+        """ Send a request to the reader core
+
+        :param message: the request
+        :type message: SDPMessage
+        """
+
+    @abstractmethod
+    def receive(self, timeout):
+        """ Get the next packet from the reader core
+
+        :param timeout: how long to wait for a packet, in seconds
+        :type timeout: float
+        :return: the packet, with its SDP header stripped, or None if none\
+            arrived in time; the packet is only valid until the next call
+        :rtype: bytes or memoryview
+        """
+
+    def size_receive_buffer_for(self, n_packets):
+        """ Make room for a whole transfer to be waiting to be received,\
+            once its size is known.  By default, this does nothing.
+
+        :param n_packets: how many packets the transfer is
+        :type n_packets: int
+        """
+
+    @property
+    def n_kernel_drops(self):
+        """ How many packets the kernel has dropped on the way to the\
+            transport, or None if it cannot be told.  By default, this\
+            cannot be told.
+
+        :rtype: int
+        """
+        return None
+
+    @abstractmethod
+    def close(self):
+        """ Release anything the transport holds
+        """
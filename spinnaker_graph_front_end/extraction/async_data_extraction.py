@@ -0,0 +1,277 @@
+import asyncio
+import collections
+import socket
+
+from .extraction_telemetry import ExtractionTelemetry
+from .udp_packet_ingest import UDPPacketIngest
+
+
+class DataExtractionProtocol(asyncio.DatagramProtocol):
+    """ Drives a :py:class:`DataExtractionStream` from an asyncio event\
+        loop: datagrams are handed to the stream as they arrive, and the\
+        receive timeout and the pacing of retransmission requests are\
+        timers on the loop rather than blocking calls, so one thread can\
+        run many extractions at once.
+    """
+
+    def __init__(
+            self, stream, transceiver, timeouts, pacer, loop, resume=False,
+            checkpoint_interval=None, connection=None):
+        """
+        :param stream: the extraction to drive
+        :type stream: DataExtractionStream
+        :param transceiver: the transceiver to send requests with
+        :param timeouts: \
+            decides how long to wait for data before asking for missing data
+        :type timeouts: ReceiveTimeoutEstimator
+        :param pacer: chooses the gap to leave between request packets so\
+            that the reader core does not drop them
+        :type pacer: NackPacer
+        :param loop: the event loop to run on
+        :param resume: whether to carry on from the checkpoint an earlier\
+            extraction left in the stream's output sink
+        :type resume: bool
+        :param checkpoint_interval: how often to save a checkpoint in the\
+            output sink, in seconds, or None to only save one if the\
+            extraction does not finish
+        :type checkpoint_interval: float
+        :param connection: the socket the data arrives on, to count the\
+            datagrams the kernel drops on it, or None not to count them
+        :type connection: UDPPacketIngest
+        """
+        self._stream = stream
+        self._transceiver = transceiver
+        self._timeouts = timeouts
+        self._pacer = pacer
+        self._loop = loop
+        self._resume = resume
+        self._checkpoint_interval = checkpoint_interval
+        self._connection = connection
+        self._telemetry = ExtractionTelemetry(stream)
+        self._next_checkpoint = None
+        self._transport = None
+        self._last_activity = None
+        self._timer = None
+        self._check_time = None
+        self._to_send = collections.deque()
+        self._sending = False
+        self._done = loop.create_future()
+        self._done.add_done_callback(self._close)
+
+    @property
+    def done(self):
+        """ A future that resolves to the data and the record of how the\
+            extraction went once the extraction ends
+
+        :rtype: asyncio.Future
+        """
+        return self._done
+
+    def connection_made(self, transport):
+        self._transport = transport
+        self._set_receive_buffer_size(
+            UDPPacketIngest.DEFAULT_RECEIVE_BUFFER_SIZE)
+        self._last_activity = self._loop.time()
+        if self._checkpoint_interval is not None:
+            self._next_checkpoint = (
+                self._last_activity + self._checkpoint_interval)
+
+        # ask for just what is missing if carrying on from a checkpoint
+        messages = self._stream.resume() if self._resume else None
+        if messages is None:
+            messages = [self._stream.start_message()]
+        else:
+            self._set_receive_buffer_size_for(self._stream.max_seq_num + 1)
+        self._telemetry.started(self._last_activity, self._n_kernel_drops())
+        self._send(messages)
+        self._check_finished()
+        self._schedule_check(self._loop.time() + self._timeouts.timeout)
+
+    def datagram_received(self, data, addr):
+        if self._done.done():
+            return
+        self._last_activity = self._loop.time()
+        self._timeouts.packet_received(self._last_activity)
+        self._pacer.data_received()
+
+        # the timeout may have shrunk now there is more to go on
+        check_time = self._last_activity + self._timeouts.timeout
+        if check_time < self._check_time:
+            self._schedule_check(check_time)
+        was_first = self._stream.max_seq_num is None
+        try:
+            messages = self._stream.process_packet(data)
+        except Exception as e:
+            self._done.set_exception(e)
+            return
+        self._telemetry.packet_received(self._last_activity)
+        self._send(messages)
+
+        # report gaps while the reader core is still sending
+        messages = self._stream.interim_repair_messages()
+        for message in messages:
+            self._transceiver.send_sdp_message(message=message)
+        self._telemetry.requests_sent(len(messages))
+
+        # now the size is known, make room for the whole transfer in the
+        # kernel so bursts are not dropped
+        if was_first and self._stream.max_seq_num is not None:
+            self._set_receive_buffer_size_for(self._stream.max_seq_num + 1)
+
+        # keep what has arrived, in case this does not finish
+        if (self._next_checkpoint is not None and
+                self._last_activity >= self._next_checkpoint):
+            self._stream.save_checkpoint()
+            self._next_checkpoint = (
+                self._last_activity + self._checkpoint_interval)
+        self._check_finished()
+
+    def error_received(self, exc):
+        if not self._done.done():
+            self._done.set_exception(exc)
+
+    def connection_lost(self, exc):
+        if not self._done.done():
+            self._done.set_exception(
+                exc if exc is not None else
+                Exception("the extraction socket was closed"))
+
+    def _set_receive_buffer_size_for(self, n_packets):
+        self._set_receive_buffer_size(n_packets * (
+            UDPPacketIngest.DEFAULT_SLOT_SIZE +
+            UDPPacketIngest.KERNEL_OVERHEAD_PER_DATAGRAM))
+
+    def _set_receive_buffer_size(self, n_bytes):
+        sock = self._transport.get_extra_info("socket")
+        try:
+            sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF,
+                int(min(max(n_bytes,
+                            UDPPacketIngest.DEFAULT_RECEIVE_BUFFER_SIZE),
+                        UDPPacketIngest.MAX_RECEIVE_BUFFER_SIZE)))
+        except socket.error:
+            # keep whatever buffer we already have
+            pass
+
+    def _schedule_check(self, when):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._check_time = when
+        self._timer = self._loop.call_at(when, self._check_timeout)
+
+    def _check_timeout(self):
+        if self._done.done():
+            return
+
+        # still sending requests, or heard from the core recently
+        now = self._loop.time()
+        timeout = self._timeouts.timeout
+        remaining = self._last_activity + timeout - now
+        if self._sending or remaining > 0:
+            self._schedule_check(
+                now + (remaining if remaining > 0 else timeout))
+            return
+
+        self._timeouts.timed_out()
+        self._pacer.timed_out()
+        try:
+            messages = self._stream.process_timeout()
+        except Exception as e:
+            self._done.set_exception(e)
+            return
+        self._telemetry.timed_out(now)
+        self._send(messages)
+        self._last_activity = self._loop.time()
+        self._schedule_check(self._last_activity + self._timeouts.timeout)
+        self._check_finished()
+
+    def _check_finished(self):
+        if self._stream.is_finished and not self._done.done():
+            self._telemetry.finished(self._loop.time(), self._n_kernel_drops())
+            self._done.set_result((self._stream.output, self._telemetry))
+
+    def _n_kernel_drops(self):
+        if self._connection is None:
+            return None
+        return self._connection.n_kernel_drops
+
+    def _send(self, messages):
+        if not messages:
+            return
+        self._pacer.request_sent(len(messages))
+        self._telemetry.requests_sent(len(messages))
+        self._to_send.extend(messages)
+        if not self._sending:
+            self._send_next()
+
+    def _send_next(self):
+        self._transceiver.send_sdp_message(message=self._to_send.popleft())
+        if self._done.done() or not self._to_send:
+            # the timeout runs from when the last request went out
+            self._sending = False
+            self._last_activity = self._loop.time()
+            self._timeouts.request_sent(self._last_activity)
+            return
+        self._sending = True
+        self._loop.call_later(self._pacer.interval, self._send_next)
+
+    def _close(self, _future):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._transport is not None:
+            self._transport.close()
+        if self._stream.is_finished:
+            self._stream.remove_checkpoint()
+        else:
+            self._telemetry.finished(self._loop.time(), self._n_kernel_drops())
+            self._stream.save_checkpoint()
+
+
+def extract_data_async(
+        stream, transceiver, connection, timeouts, pacer, resume=False,
+        checkpoint_interval=None, loop=None):
+    """ Start an extraction on an event loop
+
+    :param stream: the extraction to drive
+    :type stream: DataExtractionStream
+    :param transceiver: the transceiver to send requests with
+    :param connection: the socket the IP tag sends the data to; it is\
+        borrowed and left open when the extraction ends
+    :type connection: UDPPacketIngest
+    :param timeouts: decides how long to wait for data before asking for\
+        missing data
+    :type timeouts: ReceiveTimeoutEstimator
+    :param pacer: chooses the gap to leave between request packets
+    :type pacer: NackPacer
+    :param resume: whether to carry on from the checkpoint an earlier\
+        extraction left in the stream's output sink
+    :type resume: bool
+    :param checkpoint_interval: how often to save a checkpoint in the output\
+        sink, in seconds, or None to only save one if the extraction does\
+        not finish
+    :type checkpoint_interval: float
+    :param loop: the event loop to run on, or None for the current one
+    :return: a future that resolves to the data and the record of how the\
+        extraction went
+    :rtype: asyncio.Future
+    """
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    protocol = DataExtractionProtocol(
+        stream, transceiver, timeouts, pacer, loop, resume=resume,
+        checkpoint_interval=checkpoint_interval, connection=connection)
+    connection.discard_pending()
+    endpoint = asyncio.ensure_future(loop.create_datagram_endpoint(
+        lambda: protocol, sock=connection.duplicate_socket()), loop=loop)
+
+    def _endpoint_created(future):
+        if future.cancelled():
+            protocol.done.cancel()
+        elif future.exception() is not None:
+            if not protocol.done.done():
+                protocol.done.set_exception(future.exception())
+        elif protocol.done.done():
+            # cancelled while the socket was being bound
+            future.result()[0].close()
+    endpoint.add_done_callback(_endpoint_created)
+    return protocol.done
@@ -0,0 +1,11 @@
+from .abstract_output_sink import AbstractOutputSink
+
+
+class BytearrayOutputSink(AbstractOutputSink):
+    """ An output sink that keeps the extracted data in host memory
+    """
+
+    __slots__ = ()
+
+    def allocate(self, n_bytes):
+        return bytearray(n_bytes)
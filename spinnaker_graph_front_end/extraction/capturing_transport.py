@@ -0,0 +1,46 @@
+from .abstract_transport import AbstractTransport
+
+
+class CapturingTransport(AbstractTransport):
+    """ Passes everything through to another transport, writing every\
+        packet received, and every receive that timed out, to a trace
+    """
+
+    __slots__ = [
+        # the transport being captured
+        "_transport",
+
+        # where the trace is written
+        "_writer"]
+
+    def __init__(self, transport, writer):
+        """
+        :param transport: the transport to capture
+        :type transport: AbstractTransport
+        :param writer: where to write the trace; closed with the transport
+        :type writer: PacketTraceWriter
+        """
+        self._transport = transport
+        self._writer = writer
+
+    def send(self, message):
+        self._transport.send(message)
+
+    def receive(self, timeout):
+        packet = self._transport.receive(timeout)
+        if packet is None:
+            self._writer.timed_out()
+        else:
+            self._writer.packet_received(packet)
+        return packet
+
+    def size_receive_buffer_for(self, n_packets):
+        self._transport.size_receive_buffer_for(n_packets)
+
+    @property
+    def n_kernel_drops(self):
+        return self._transport.n_kernel_drops
+
+    def close(self):
+        self._writer.close()
+        self._transport.close()
@@ -0,0 +1,5 @@
+import time
+
+#: the time in seconds on a clock that never goes backwards, for timing\
+#: intervals; Python 2 has no such clock, so there it is the time of day
+monotonic = getattr(time, "monotonic", time.time)
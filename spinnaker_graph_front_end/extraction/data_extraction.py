@@ -0,0 +1,423 @@
+import struct
+import time
+
+from .data_extraction_stream import DataExtractionStream
+from .extraction_telemetry import ExtractionTelemetry
+from .stream_demultiplexer import StreamDemultiplexer
+
+#: how often the multiplexed driver checks which extractions have timed out
+DEADLINE_CHECK_INTERVAL_IN_SECONDS = 0.005
+
+_FIRST_WORD = struct.Struct("<I")
+
+
+def extract_data_chunks(
+        stream, transport, timeouts, pacer, messages=None,
+        checkpoint_interval=None, telemetry=None):
+    """ Extract the data from a reader core, handing it out in pieces as\
+        soon as everything before each piece has arrived, so that\
+        processing can overlap with the transfer.
+
+        The views handed out are onto the whole output, which stays\
+        allocated until the extraction ends.  The transport is not closed.
+
+    :param stream: the extraction to drive
+    :type stream: DataExtractionStream
+    :param transport: how to talk to the reader core
+    :type transport: AbstractTransport
+    :param timeouts: \
+        decides how long to wait for data before asking for missing data
+    :type timeouts: ReceiveTimeoutEstimator
+    :param pacer: chooses the gap to leave between request packets so that\
+        the reader core does not drop them
+    :type pacer: NackPacer
+    :param messages: the messages that start the extraction, or None to\
+        ask the reader core to send everything
+    :type messages: list(SDPMessage)
+    :param checkpoint_interval: how often to save a checkpoint in the\
+        output sink, in seconds, or None to only save one if the\
+        extraction does not finish
+    :type checkpoint_interval: float
+    :param telemetry: where to record how the extraction went, or None to\
+        not record it
+    :type telemetry: ExtractionTelemetry
+    :return: an iterable of the offset of each piece and a view of it, in\
+        ascending order of offset
+    :rtype: iterable(tuple(int, memoryview))
+    """
+    if telemetry is None:
+        telemetry = ExtractionTelemetry(stream)
+    telemetry.started(time.time(), transport.n_kernel_drops)
+    if messages is None:
+        messages = [stream.start_message()]
+    elif stream.max_seq_num is not None:
+        # carrying on, so the size is already known
+        transport.size_receive_buffer_for(stream.max_seq_num + 1)
+    _send_messages(transport, messages, timeouts, pacer, telemetry)
+    next_checkpoint = None
+    if checkpoint_interval is not None:
+        next_checkpoint = time.time() + checkpoint_interval
+
+    try:
+        while not stream.is_finished:
+            data = transport.receive(timeouts.timeout)
+            if data is None:
+                timeouts.timed_out()
+                pacer.timed_out()
+                messages = stream.process_timeout()
+                telemetry.timed_out(time.time())
+                _send_messages(transport, messages, timeouts, pacer, telemetry)
+                continue
+
+            now = time.time()
+            timeouts.packet_received(now)
+            pacer.data_received()
+            was_first = stream.max_seq_num is None
+            messages = stream.process_packet(data)
+            telemetry.packet_received(now)
+            _send_messages(transport, messages, timeouts, pacer, telemetry)
+
+            # report gaps while the reader core is still sending
+            _send_interim_messages(transport, stream, telemetry)
+
+            # now the size is known, make room for the whole transfer so
+            # bursts are not dropped
+            if was_first and stream.max_seq_num is not None:
+                transport.size_receive_buffer_for(stream.max_seq_num + 1)
+
+            # keep what has arrived, in case this does not finish
+            if next_checkpoint is not None and now >= next_checkpoint:
+                stream.save_checkpoint()
+                next_checkpoint = now + checkpoint_interval
+
+            chunk = stream.take_completed_chunk()
+            if chunk is not None:
+                yield chunk
+    finally:
+        telemetry.finished(time.time(), transport.n_kernel_drops)
+        if stream.is_finished:
+            stream.remove_checkpoint()
+        else:
+            stream.save_checkpoint()
+
+
+def extract_data(
+        stream, transport, timeouts, pacer, messages=None,
+        checkpoint_interval=None):
+    """ Extract all the data from a reader core
+
+    :param stream: the extraction to drive
+    :type stream: DataExtractionStream
+    :param transport: how to talk to the reader core
+    :type transport: AbstractTransport
+    :param timeouts: \
+        decides how long to wait for data before asking for missing data
+    :type timeouts: ReceiveTimeoutEstimator
+    :param pacer: chooses the gap to leave between request packets so that\
+        the reader core does not drop them
+    :type pacer: NackPacer
+    :param messages: the messages that start the extraction, or None to\
+        ask the reader core to send everything
+    :type messages: list(SDPMessage)
+    :param checkpoint_interval: how often to save a checkpoint in the\
+        output sink, in seconds, or None to only save one if the\
+        extraction does not finish
+    :type checkpoint_interval: float
+    :return: the data and the record of how the extraction went
+    :rtype: tuple(bytearray, ExtractionTelemetry)
+    """
+    telemetry = ExtractionTelemetry(stream)
+    for _ in extract_data_chunks(
+            stream, transport, timeouts, pacer, messages,
+            checkpoint_interval, telemetry):
+        pass
+    return stream.output, telemetry
+
+
+def extract_data_multiplexed(
+        extractions, transport, new_timeouts, pacer,
+        checkpoint_interval=None):
+    """ Extract the data from many reader cores at once, through one\
+        transport whose packets keep their SDP headers, so that one socket\
+        and one receive thread serve them all.  Each extraction needs a\
+        packet gatherer of its own, which is how its packets are told apart.
+
+    :param extractions: the placement of the gatherer of each extraction\
+        and the extraction itself
+    :type extractions: \
+        list(tuple(pacman.model.placements.Placement, DataExtractionStream))
+    :param transport: how to talk to the reader cores
+    :type transport: AbstractTransport
+    :param new_timeouts: makes what decides how long to wait for data for\
+        each extraction before asking for missing data
+    :type new_timeouts: callable() -> ReceiveTimeoutEstimator
+    :param pacer: chooses the gap to leave between request packets so that\
+        the reader cores do not drop them
+    :type pacer: NackPacer
+    :param checkpoint_interval: how often to save a checkpoint of each\
+        extraction in its output sink, in seconds, or None to only save one\
+        if an extraction does not finish
+    :type checkpoint_interval: float
+    :return: the data and the record of how the extraction went of each\
+        extraction, in the order given
+    :rtype: list(tuple(bytearray, ExtractionTelemetry))
+    """
+    demultiplexer = StreamDemultiplexer()
+    timeouts = dict()
+    deadlines = dict()
+    placements = dict()
+    telemetry = dict()
+    for gatherer_placement, stream in extractions:
+        demultiplexer.add(gatherer_placement, stream)
+        placements[stream] = gatherer_placement
+        timeouts[stream] = new_timeouts()
+        telemetry[stream] = ExtractionTelemetry(stream)
+
+    now = time.time()
+    n_kernel_drops = transport.n_kernel_drops
+    for stream, stream_timeouts in timeouts.items():
+        telemetry[stream].started(time.time(), n_kernel_drops)
+        _send_messages(
+            transport, [stream.start_message()], stream_timeouts, pacer,
+            telemetry[stream])
+        deadlines[stream] = time.time() + stream_timeouts.timeout
+    next_checkpoint = None
+    if checkpoint_interval is not None:
+        next_checkpoint = now + checkpoint_interval
+    n_packets_expected = 0
+    next_deadline_check = now
+    last_packet_time = now
+
+    try:
+        while deadlines:
+            data = transport.receive(max(
+                next_deadline_check - time.time(), 0.0))
+            now = time.time()
+            if data is not None:
+                last_packet_time = now
+                stream, packet = demultiplexer.route(data)
+                if stream is not None:
+                    stream_timeouts = timeouts[stream]
+                    stream_timeouts.packet_received(now)
+                    pacer.data_received()
+                    was_first = stream.max_seq_num is None
+                    messages = stream.process_packet(packet)
+                    telemetry[stream].packet_received(now)
+                    _send_messages(
+                        transport, messages, stream_timeouts, pacer,
+                        telemetry[stream])
+                    _send_interim_messages(
+                        transport, stream, telemetry[stream])
+                    deadlines[stream] = now + stream_timeouts.timeout
+                    if stream.is_finished:
+                        telemetry[stream].finished(
+                            now, transport.n_kernel_drops)
+
+                    # make room for everything still to come at once
+                    if was_first and stream.max_seq_num is not None:
+                        n_packets_expected += stream.max_seq_num + 1
+                        transport.size_receive_buffer_for(n_packets_expected)
+
+            if now < next_deadline_check:
+                continue
+            next_deadline_check = now + DEADLINE_CHECK_INTERVAL_IN_SECONDS
+            for stream in list(deadlines):
+                if stream.is_finished:
+                    demultiplexer.remove(placements[stream])
+                    del deadlines[stream]
+                    stream.remove_checkpoint()
+                elif deadlines[stream] <= now:
+                    stream_timeouts = timeouts[stream]
+
+                    # the first packet may just be queued behind those of
+                    # the others, so only give up on it once nothing at all
+                    # is arriving
+                    if (stream.max_seq_num is None and
+                            now - last_packet_time < stream_timeouts.timeout):
+                        deadlines[stream] = now + stream_timeouts.timeout
+                        continue
+                    stream_timeouts.timed_out()
+                    pacer.timed_out()
+                    messages = stream.process_timeout()
+                    telemetry[stream].timed_out(now)
+                    if stream.is_finished:
+                        telemetry[stream].finished(
+                            now, transport.n_kernel_drops)
+                    _send_messages(
+                        transport, messages, stream_timeouts, pacer,
+                        telemetry[stream])
+                    deadlines[stream] = time.time() + stream_timeouts.timeout
+
+            # keep what has arrived, in case this does not finish
+            if next_checkpoint is not None and now >= next_checkpoint:
+                for stream in deadlines:
+                    stream.save_checkpoint()
+                next_checkpoint = now + checkpoint_interval
+    finally:
+        now = time.time()
+        for stream in deadlines:
+            if stream.is_finished:
+                stream.remove_checkpoint()
+            else:
+                telemetry[stream].finished(now, transport.n_kernel_drops)
+                stream.save_checkpoint()
+    return [(stream.output, telemetry[stream]) for _, stream in extractions]
+
+
+def extract_data_pipelined(streams, transport, new_timeouts, pacer):
+    """ Extract regions from one reader core back to back, starting each\
+        as soon as the reader core has ended a round of the one before,\
+        so that the repair of one region overlaps the first pass of the\
+        next.  The reader core sends the repairs of the region before the\
+        one it is sending flagged, alongside the new data, so at most two\
+        regions are ever on their way at once.
+
+    :param streams: the extractions, in the order to run them, all from the\
+        same reader core, and each with the address and size of its region;\
+        a region the reader core makes a copy of to send, such as a\
+        compressed copy, only starts once those before have finished, as\
+        the reader core keeps sending the region before until the copy is\
+        made
+    :type streams: list(DataExtractionStream)
+    :param transport: how to talk to the reader core
+    :type transport: AbstractTransport
+    :param new_timeouts: makes what decides how long to wait for data for\
+        each extraction before asking for missing data
+    :type new_timeouts: callable() -> ReceiveTimeoutEstimator
+    :param pacer: chooses the gap to leave between request packets so that\
+        the reader core does not drop them
+    :type pacer: NackPacer
+    :return: the data and the record of how the extraction went of each\
+        extraction, in the order given
+    :rtype: list(tuple(bytearray, ExtractionTelemetry))
+    """
+    for stream in streams:
+        # the size of the first packet must not look like a flag
+        if not stream.needs_preparation and (
+                stream.region_address is None or stream.n_bytes is None or
+                stream.n_bytes & DataExtractionStream.SEQ_NUM_FLAGS):
+            raise Exception(
+                "Each region extracted back to back needs an address and a "
+                "size of less than {} bytes".format(
+                    DataExtractionStream.PREVIOUS_TRANSFER_SEQ_NUM_FLAG))
+    timeouts = [new_timeouts() for _ in streams]
+    telemetry = [ExtractionTelemetry(stream) for stream in streams]
+    deadlines = dict()
+    current = None
+    previous = None
+    next_index = 0
+
+    try:
+        while True:
+            # with nothing left of the current region to send, and nothing
+            # left to repair of the one before, start the next region
+            if (next_index < len(streams) and previous is None and (
+                    current is None or streams[current].is_finished)):
+                current = next_index
+                next_index += 1
+                _start_region(
+                    streams[current], transport, timeouts[current], pacer,
+                    telemetry[current])
+                deadlines[current] = time.time() + timeouts[current].timeout
+            if not deadlines:
+                break
+
+            data = transport.receive(max(
+                min(deadlines.values()) - time.time(), 0.0))
+            now = time.time()
+            if data is None:
+                for index in [index for index, deadline in deadlines.items()
+                              if deadline <= now]:
+                    timeouts[index].timed_out()
+                    pacer.timed_out()
+                    messages = streams[index].process_timeout()
+                    telemetry[index].timed_out(now)
+                    _send_messages(
+                        transport, messages, timeouts[index], pacer,
+                        telemetry[index])
+                    deadlines[index] = time.time() + timeouts[index].timeout
+                    if streams[index].is_finished:
+                        telemetry[index].finished(
+                            now, transport.n_kernel_drops)
+                        del deadlines[index]
+                        if index == previous:
+                            previous = None
+                continue
+
+            # repairs of the region before are flagged; anything left over
+            # from a region already finished is dropped
+            first_word = _FIRST_WORD.unpack_from(data)[0]
+            index = current
+            if (first_word & DataExtractionStream.SEQ_NUM_FLAGS ==
+                    DataExtractionStream.PREVIOUS_TRANSFER_SEQ_NUM_FLAG):
+                index = previous
+            if index not in deadlines:
+                continue
+            stream = streams[index]
+            timeouts[index].packet_received(now)
+            pacer.data_received()
+            was_started = stream.max_seq_num is not None
+            messages = stream.process_packet(data)
+            telemetry[index].packet_received(now)
+            deadlines[index] = now + timeouts[index].timeout
+            if not was_started and stream.max_seq_num is not None:
+                # a compressed region is ready to be sent
+                transport.size_receive_buffer_for(stream.max_seq_num + 1)
+
+            # a round has ended, so the reader core is free to move on to
+            # the next region and repair this one alongside it
+            elif (index == current and messages and previous is None and
+                    next_index < len(streams) and
+                    not streams[next_index].needs_preparation):
+                messages = stream.supersede()
+                previous = current
+                current = next_index
+                next_index += 1
+                _start_region(
+                    streams[current], transport, timeouts[current], pacer,
+                    telemetry[current])
+                deadlines[current] = time.time() + timeouts[current].timeout
+            _send_messages(
+                transport, messages, timeouts[index], pacer, telemetry[index])
+            if index == current:
+                _send_interim_messages(transport, stream, telemetry[index])
+            if stream.is_finished:
+                telemetry[index].finished(now, transport.n_kernel_drops)
+                del deadlines[index]
+                if index == previous:
+                    previous = None
+    finally:
+        now = time.time()
+        for index in deadlines:
+            telemetry[index].finished(now, transport.n_kernel_drops)
+    return [(stream.output, telemetry[index])
+            for index, stream in enumerate(streams)]
+
+
+def _start_region(stream, transport, timeouts, pacer, telemetry):
+    telemetry.started(time.time(), transport.n_kernel_drops)
+    _send_messages(
+        transport, [stream.start_message()], timeouts, pacer, telemetry)
+    if stream.max_seq_num is not None:
+        transport.size_receive_buffer_for(stream.max_seq_num + 1)
+
+
+def _send_interim_messages(transport, stream, telemetry):
+    messages = stream.interim_repair_messages()
+    for message in messages:
+        transport.send(message)
+    telemetry.requests_sent(len(messages))
+
+
+def _send_messages(transport, messages, timeouts, pacer, telemetry):
+    for index, message in enumerate(messages):
+        # sleep for ensuring core doesnt lose packets
+        if index > 0:
+            time.sleep(pacer.interval)
+
+        # send message to core
+        transport.send(message)
+    if messages:
+        pacer.request_sent(len(messages))
+        timeouts.request_sent(time.time())
+        telemetry.requests_sent(len(messages))
@@ -0,0 +1,1179 @@
+import math
+import numpy
+import struct
+
+from spinnman.messages.sdp import SDPMessage, SDPHeader, SDPFlag
+
+from .bytearray_output_sink import BytearrayOutputSink
+from .delta_rle import decompress_delta_rle
+from .received_sequence_tracker import ReceivedSequenceTracker
+
+
+class DataExtractionStream(object):
+    """ The host side of one extraction of data from a reader core using the\
+        SDP retransmission protocol: reassembles the data packets into the\
+        output and builds the requests for retransmission of any sequence\
+        numbers that go missing.
+
+        The stream does no I/O of its own.  It is handed each packet that\
+        arrives (and told when none arrived in time) and hands back the SDP\
+        messages that should be sent to the reader core, so the same state\
+        machine can be driven from a blocking loop or from an event loop.
+    """
+
+    __slots__ = [
+        # the placement of the reader core
+        "_placement",
+
+        # where the output is stored
+        "_sink",
+
+        # the size of the data, or None until it is known
+        "_n_bytes",
+
+        # the data extracted so far
+        "_output",
+
+        # a view over the output
+        "_view",
+
+        # the highest sequence number in the transfer
+        "_max_seq_num",
+
+        # the sequence numbers received so far
+        "_seq_nums",
+
+        # True once every packet has been received
+        "_finished",
+
+        # the number of sequence numbers missing at each retransmission
+        "_lost_seq_nums",
+
+        # how much of the output has been handed out as completed chunks
+        "_n_bytes_taken",
+
+        # True if gaps are reported while the reader core is still sending
+        "_streaming_repair",
+
+        # True once the reader core has finished its first pass of the data
+        "_first_pass_done",
+
+        # the number of packets received since gaps were last reported
+        "_packets_since_report",
+
+        # the sequence number below which gaps have been reported
+        "_reported_up_to",
+
+        # the newest sequence number received, or None if none has been
+        "_newest_seq_num",
+
+        # how many data packets each parity packet covers, or 0 if the\
+        # reader core sends no parity packets
+        "_fec_group_size",
+
+        # the parity of each group not yet used, by group number
+        "_parities",
+
+        # True if the reader core sends a checksum of each data packet
+        "_packet_checksums",
+
+        # the checksum of each data packet, where known
+        "_checksums",
+
+        # which sequence numbers have a known checksum
+        "_checksum_known",
+
+        # which sequence numbers have been checked against their checksum
+        "_checksum_verified",
+
+        # how many packets have failed their checksum
+        "_n_corrupted",
+
+        # how many data packets have arrived that had already been received
+        "_n_duplicates",
+
+        # True if the reader core accepts requests for ranges of sequence\
+        # numbers
+        "_range_requests",
+
+        # where the data is in the SDRAM of the reader core, or None for\
+        # the data the reader core sends of its own accord
+        "_region_address",
+
+        # True once the reader core has moved on to the next transfer, so\
+        # that this one is repaired alongside it
+        "_superseded",
+
+        # how many rounds of repairs of this transfer have been asked for\
+        # since it was superseded
+        "_n_previous_rounds",
+
+        # True if the reader core compresses the region before sending it
+        "_compression",
+
+        # the size of the pages whose checksums are sent in place of the\
+        # region, or None to send the region
+        "_page_size",
+
+        # the command that has the reader core make the copy of the region\
+        # it sends, such as a compressed copy, or None to send the region
+        "_preparation_command",
+
+        # the sequence number of the packet that says where the copy is
+        "_ready_seq_num",
+
+        # where the region the copy is made of is and how big it is
+        "_source_region_address",
+        "_source_n_bytes",
+
+        # where the decompressed output is stored
+        "_uncompressed_sink",
+
+        # the decompressed output, once the transfer has finished
+        "_uncompressed_output",
+
+        # how many times nothing has arrived while waiting for the copy of\
+        # the region to be made
+        "_n_preparation_timeouts"]
+
+    DATA_PER_FULL_PACKET = 68  # 272 bytes as removed scp header
+    DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM = DATA_PER_FULL_PACKET - 1
+    WORD_TO_BYTE_CONVERTER = 4
+
+    SDP_PACKET_START_SENDING_COMMAND_ID = 100
+    SDP_PACKET_START_MISSING_SEQ_COMMAND_ID = 1000
+    SDP_PACKET_MISSING_SEQ_COMMAND_ID = 1001
+    SDP_PACKET_START_MISSING_RANGES_COMMAND_ID = 1002
+    SDP_PACKET_MISSING_RANGES_COMMAND_ID = 1003
+    SDP_PACKET_INTERIM_MISSING_RANGES_COMMAND_ID = 1004
+    SDP_PACKET_PREVIOUS_MISSING_RANGES_COMMAND_ID = 1005
+    SDP_PACKET_COMPRESS_REGION_COMMAND_ID = 1006
+    SDP_PACKET_PAGE_CHECKSUMS_COMMAND_ID = 1007
+    SDP_PACKET_PORT = 2
+
+    END_FLAG = 0xFFFFFFFF
+    END_FLAG_SIZE = 4
+    SEQUENCE_NUMBER_SIZE = 4
+
+    #: in streaming repair mode, how many packets to receive between reports
+    #: of gaps
+    REPAIR_REPORT_INTERVAL = 256
+
+    #: in streaming repair mode, how far behind the newest packet a gap must\
+    #: be before it is reported, to allow for packets arriving out of order
+    REPAIR_WATERMARK_LAG = 64
+
+    #: the most ranges that fit in one report of gaps
+    MAX_RANGES_PER_REPAIR_REPORT = (DATA_PER_FULL_PACKET - 1) // 2
+
+    #: set in the sequence number of a parity packet, whose other bits are\
+    #: the number of the group of data packets it covers
+    PARITY_SEQ_NUM_FLAG = 0x80000000
+
+    #: set in the sequence number of a checksum packet, whose other bits are\
+    #: the number of the block of data packets whose checksums it holds
+    CHECKSUM_SEQ_NUM_FLAG = 0x40000000
+
+    #: set in the sequence number of a data packet sent again for the\
+    #: transfer before the one the reader core is sending now
+    PREVIOUS_TRANSFER_SEQ_NUM_FLAG = 0x20000000
+
+    #: the sequence number of the packet that ends a round of repairs of the\
+    #: transfer before the one the reader core is sending now
+    PREVIOUS_TRANSFER_ROUND_END = PREVIOUS_TRANSFER_SEQ_NUM_FLAG | 0x1FFFFFFF
+
+    #: the sequence number of the packet that says where the compressed copy\
+    #: of a region is and how big it is
+    COMPRESSED_REGION_READY = 0x1FFFFFFF
+
+    #: the sequence number of the packet that says where the checksums of\
+    #: the pages of a region are and how big they are
+    PAGE_CHECKSUMS_READY = 0x1FFFFFFE
+
+    #: how many times nothing may arrive while waiting for the copy of a\
+    #: region to be made before giving up
+    MAX_PREPARATION_TIMEOUTS = 10
+
+    #: the bits of a sequence number that say which kind of packet it is
+    SEQ_NUM_FLAGS = (
+        PARITY_SEQ_NUM_FLAG | CHECKSUM_SEQ_NUM_FLAG |
+        PREVIOUS_TRANSFER_SEQ_NUM_FLAG)
+
+    #: the most repairs of the previous transfer the reader core can hold\
+    #: at once; any more are asked for in the next round
+    MAX_PREVIOUS_TRANSFER_REPAIRS = 1024
+
+    #: the most ranges that fit in one report of what the previous transfer\
+    #: is missing, after the command, the round and the size of the round
+    MAX_RANGES_PER_PREVIOUS_TRANSFER_REPORT = (DATA_PER_FULL_PACKET - 3) // 2
+
+    #: what each word of a data packet is multiplied by in its checksum;\
+    #: being odd, any change to a single word changes the checksum
+    CHECKSUM_WEIGHTS = numpy.arange(
+        1, 2 * DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM, 2, dtype=numpy.uint64)
+
+    def __init__(
+            self, placement, sink=None, streaming_repair=False,
+            fec_group_size=0, packet_checksums=False, range_requests=True,
+            n_bytes=None, region_address=None, compression=False,
+            page_size=None):
+        """
+        :param placement: the placement of the reader core
+        :type placement: pacman.model.placements.Placement
+        :param sink: where to store the output, or None to keep it in memory
+        :type sink: AbstractOutputSink
+        :param streaming_repair: whether to report gaps to the reader core\
+            while it is still sending, so that it can repair them alongside\
+            the rest of the data
+        :type streaming_repair: bool
+        :param fec_group_size: \
+            how many data packets the reader core should send a parity\
+            packet for, so that one packet lost from each group can be\
+            rebuilt without asking for it again, or 0 for no parity packets
+        :type fec_group_size: int
+        :param packet_checksums: whether the reader core should send a\
+            checksum of each data packet, so that corrupted packets are\
+            asked for again
+        :type packet_checksums: bool
+        :param range_requests: whether the reader core accepts requests\
+            for ranges of sequence numbers; older reader cores only accept\
+            lists of sequence numbers
+        :type range_requests: bool
+        :param n_bytes: the size of the data, if known before the transfer\
+            starts, so that the output can be made ready up front and the\
+            first packet can be asked for again like any other; otherwise\
+            the size is taken from the first packet to arrive, which must\
+            then be the first packet of the data
+        :type n_bytes: int
+        :param region_address: where in the SDRAM of the reader core the\
+            data is, so that the reader core can send any region asked for\
+            rather than just its own data; the size must then be given too
+        :type region_address: int
+        :param compression: whether the reader core should compress the\
+            region before sending it, which is only worth it for data that\
+            changes in regular steps, such as counters and empty buffers;\
+            the output is then only ready once the transfer has finished,\
+            and cannot be checkpointed
+        :type compression: bool
+        :param page_size: if given, extract a checksum of each page of\
+            this many bytes of the region, made by the reader core, rather\
+            than the region itself, to find which pages have changed since\
+            they were last extracted
+        :type page_size: int
+        """
+        if n_bytes is not None:
+            # a size worked out from megabytes may arrive as a float
+            if n_bytes < 0 or n_bytes != int(n_bytes):
+                raise Exception(
+                    "The size of the data must be a whole number of bytes, "
+                    "not {}".format(n_bytes))
+            n_bytes = int(n_bytes)
+        self._placement = placement
+        self._sink = BytearrayOutputSink() if sink is None else sink
+        self._n_bytes = n_bytes
+        self._output = None
+        self._view = None
+        self._max_seq_num = None
+        self._seq_nums = None
+        self._finished = False
+        self._lost_seq_nums = list()
+        self._n_bytes_taken = 0
+        self._streaming_repair = streaming_repair
+        self._first_pass_done = False
+        self._packets_since_report = 0
+        self._reported_up_to = 0
+        self._newest_seq_num = None
+        self._fec_group_size = fec_group_size
+        self._parities = dict()
+        self._packet_checksums = packet_checksums
+        self._checksums = None
+        self._checksum_known = None
+        self._checksum_verified = None
+        self._n_corrupted = 0
+        self._n_duplicates = 0
+        self._range_requests = range_requests
+        self._region_address = region_address
+        self._superseded = False
+        self._n_previous_rounds = 0
+        self._compression = compression
+        self._page_size = page_size
+        self._preparation_command = None
+        self._ready_seq_num = None
+        self._source_region_address = None
+        self._source_n_bytes = None
+        self._uncompressed_sink = None
+        self._uncompressed_output = None
+        self._n_preparation_timeouts = 0
+        if compression and page_size is not None:
+            raise Exception(
+                "The checksums of the pages of a region are not compressed")
+        if compression:
+            self._preparation_command = \
+                self.SDP_PACKET_COMPRESS_REGION_COMMAND_ID
+            self._ready_seq_num = self.COMPRESSED_REGION_READY
+            self._uncompressed_sink = self._sink
+            self._sink = BytearrayOutputSink()
+        elif page_size is not None:
+            if page_size <= 0 or page_size % self.WORD_TO_BYTE_CONVERTER:
+                raise Exception(
+                    "A page must be a whole number of words, not {} "
+                    "bytes".format(page_size))
+            self._preparation_command = \
+                self.SDP_PACKET_PAGE_CHECKSUMS_COMMAND_ID
+            self._ready_seq_num = self.PAGE_CHECKSUMS_READY
+        if self._preparation_command is not None:
+            if region_address is None or n_bytes is None:
+                raise Exception(
+                    "Only a region of known size can be compressed or "
+                    "checksummed")
+
+            # what is transferred is the copy, whose size is only known
+            # once the reader core has made it
+            self._source_region_address = region_address
+            self._source_n_bytes = n_bytes
+            self._n_bytes = None
+            self._region_address = None
+
+    @property
+    def placement(self):
+        """ The placement of the reader core
+
+        :rtype: pacman.model.placements.Placement
+        """
+        return self._placement
+
+    @property
+    def fec_group_size(self):
+        """ How many data packets the reader core sends a parity packet for,\
+            or 0 if it sends none
+
+        :rtype: int
+        """
+        return self._fec_group_size
+
+    @property
+    def packet_checksums(self):
+        """ Whether the reader core sends a checksum of each data packet
+
+        :rtype: bool
+        """
+        return self._packet_checksums
+
+    @property
+    def streaming_repair(self):
+        """ Whether gaps are reported while the reader core is still sending
+
+        :rtype: bool
+        """
+        return self._streaming_repair
+
+    @property
+    def range_requests(self):
+        """ Whether the reader core accepts requests for ranges of sequence\
+            numbers
+
+        :rtype: bool
+        """
+        return self._range_requests
+
+    @property
+    def region_address(self):
+        """ Where in the SDRAM of the reader core the data is, or None for\
+            the data the reader core sends of its own accord
+
+        :rtype: int
+        """
+        return self._region_address
+
+    @property
+    def n_bytes(self):
+        """ The size of the data, or None if not yet known
+
+        :rtype: int
+        """
+        return self._n_bytes
+
+    @property
+    def compression(self):
+        """ Whether the reader core compresses the region before sending it
+
+        :rtype: bool
+        """
+        return self._compression
+
+    @property
+    def page_size(self):
+        """ The size of the pages whose checksums are extracted in place of\
+            the region, or None if the region itself is extracted
+
+        :rtype: int
+        """
+        return self._page_size
+
+    @property
+    def needs_preparation(self):
+        """ Whether the reader core makes a copy of the region to send,\
+            such as a compressed copy, once asked for the region, and keeps\
+            sending what it was sending before until then
+
+        :rtype: bool
+        """
+        return self._preparation_command is not None
+
+    @property
+    def output(self):
+        """ The data extracted, as provided by the output sink, or None if\
+            no data has arrived yet, or if compressed, until the transfer\
+            has finished
+
+        :rtype: bytearray or numpy.ndarray
+        """
+        if not self._compression:
+            return self._output
+        if self._uncompressed_output is None and self._finished:
+            self._uncompressed_output = decompress_delta_rle(
+                self._view, self._uncompressed_sink.allocate(
+                    self._source_n_bytes))
+        return self._uncompressed_output
+
+    @property
+    def max_seq_num(self):
+        """ The highest sequence number in the transfer, or None if not yet\
+            known
+
+        :rtype: int
+        """
+        return self._max_seq_num
+
+    @property
+    def seq_nums(self):
+        """ The sequence numbers received so far, or None if the first\
+            packet has not yet arrived
+
+        :rtype: ReceivedSequenceTracker
+        """
+        return self._seq_nums
+
+    @property
+    def is_finished(self):
+        """ True once all the data has been received
+
+        :rtype: bool
+        """
+        return self._finished
+
+    @property
+    def lost_seq_nums(self):
+        """ The number of sequence numbers found missing at each attempt to\
+            request retransmission
+
+        :rtype: list(int)
+        """
+        return self._lost_seq_nums
+
+    @property
+    def n_corrupted(self):
+        """ How many packets have failed their checksum and been asked for\
+            again
+
+        :rtype: int
+        """
+        return self._n_corrupted
+
+    @property
+    def n_duplicate_packets(self):
+        """ How many data packets have arrived that had already been\
+            received
+
+        :rtype: int
+        """
+        return self._n_duplicates
+
+    @property
+    def contiguous_length(self):
+        """ How many bytes from the start of the output have all arrived
+
+        :rtype: int
+        """
+        if self._compression:
+            return self._source_n_bytes if self._finished else 0
+        if self._output is None:
+            return 0
+        return min(len(self._output), self._calculate_offset(
+            self._seq_nums.first_seq_num + self._seq_nums.n_contiguous))
+
+    def take_completed_chunk(self):
+        """ Get the data that has become contiguous with the start of the\
+            output since this was last called
+
+        :return: the offset of the chunk in the output and a view of it,\
+            or None if nothing new is complete
+        :rtype: tuple(int, memoryview)
+        """
+        end = self.contiguous_length
+        if end <= self._n_bytes_taken:
+            return None
+        start = self._n_bytes_taken
+        self._n_bytes_taken = end
+        if self._compression:
+            return start, memoryview(self.output)[start:end]
+        return start, self._view[start:end]
+
+    def _sdp_message(self, data):
+        return SDPMessage(
+            sdp_header=SDPHeader(
+                destination_chip_x=self._placement.x,
+                destination_chip_y=self._placement.y,
+                destination_cpu=self._placement.p,
+                destination_port=self.SDP_PACKET_PORT,
+                flags=SDPFlag.REPLY_NOT_EXPECTED),
+            data=data)
+
+    def start_message(self):
+        """ Get the message that tells the reader core to start sending,\
+            making the output ready first if the size of the data is known
+
+        :rtype: SDPMessage
+        """
+        if self._preparation_command is not None and \
+                self._region_address is None:
+            words = [self._preparation_command, self._source_region_address,
+                     self._source_n_bytes]
+            if self._page_size is not None:
+                words.append(self._page_size)
+            return self._sdp_message(
+                struct.pack("<{}I".format(len(words)), *words))
+        if self._output is None and self._n_bytes is not None:
+            self._allocate(self._n_bytes)
+        if self._region_address is None:
+            return self._sdp_message(struct.pack(
+                "<3I", self.SDP_PACKET_START_SENDING_COMMAND_ID,
+                self._fec_group_size, int(self._packet_checksums)))
+        if self._n_bytes is None:
+            raise Exception(
+                "The size of a region must be known to ask for it")
+        return self._sdp_message(struct.pack(
+            "<5I", self.SDP_PACKET_START_SENDING_COMMAND_ID,
+            self._fec_group_size, int(self._packet_checksums),
+            self._region_address, self._n_bytes))
+
+    def supersede(self):
+        """ Note that the reader core has moved on to sending the next\
+            region, at the end of a round of this transfer, so that from now\
+            on what is missing is asked for as repairs of the previous\
+            transfer, which the reader core sends alongside the next
+
+        :return: the messages asking for what is missing now, in place of\
+            those handed back at the end of the round
+        :rtype: list(SDPMessage)
+        """
+        self._superseded = True
+        return self._previous_transfer_messages()
+
+    def resume(self):
+        """ Carry on from the checkpoint left in the output sink by an\
+            earlier extraction from the same reader core that did not\
+            finish, instead of starting again
+
+        :return: the messages to send to the reader core to ask for what\
+            the earlier extraction did not receive, or None if there is no\
+            checkpoint to carry on from
+        :rtype: list(SDPMessage) or None
+        """
+        checkpoint = self._sink.load_checkpoint()
+        if checkpoint is None:
+            return None
+        output, received = checkpoint
+        if self._n_bytes is not None and len(output) != self._n_bytes:
+            # not a checkpoint of this extraction
+            return None
+        self._output = output
+        self._n_bytes = len(output)
+        self._view = memoryview(self._output)
+        self._start_tracking()
+        if len(received) != self._seq_nums.n_sequence_numbers:
+            # not a checkpoint of this extraction
+            self._output = None
+            self._view = None
+            return None
+        self._seq_nums.add_received_flags(received)
+        self._first_pass_done = True
+        return self._missing_seq_num_messages()
+
+    def rerequest(self, seq_nums):
+        """ Forget that some sequence numbers were received, so that they\
+            are asked for again, even if the extraction had finished
+
+        :param seq_nums: the sequence numbers to ask for again
+        :type seq_nums: iterable(int)
+        :return: the messages to send to the reader core to ask for them
+        :rtype: list(SDPMessage)
+        """
+        for seq_num in seq_nums:
+            self._seq_nums.discard(seq_num)
+        self._finished = False
+        return self._missing_seq_num_messages()
+
+    def save_checkpoint(self):
+        """ Save what has been received so far in the output sink, if it\
+            can keep checkpoints, so that a later extraction can resume\
+            from it
+        """
+        if self._seq_nums is not None and not self._finished:
+            self._sink.save_checkpoint(
+                self._output, self._seq_nums.received_flags)
+
+    def remove_checkpoint(self):
+        """ Remove any checkpoint from the output sink, once it is no\
+            longer needed
+        """
+        self._sink.remove_checkpoint()
+
+    def _allocate(self, n_bytes):
+        """ Make the output ready, once the size of the data is known
+
+        :param n_bytes: the size of the data
+        :type n_bytes: int
+        """
+        self._check_size_is_unambiguous(n_bytes)
+        self._n_bytes = n_bytes
+        self._output = self._sink.allocate(n_bytes)
+        self._view = memoryview(self._output)
+        self._start_tracking()
+
+    def _check_size_is_unambiguous(self, n_bytes):
+        """ Check that the size of the data, which the first packet holds\
+            in place of its sequence number, cannot be taken for the\
+            sequence number of a parity or checksum packet of the same data
+
+        :param n_bytes: the size of the data
+        :type n_bytes: int
+        """
+        n_packets = -(-n_bytes // (
+            self.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM *
+            self.WORD_TO_BYTE_CONVERTER))
+        n_blocks = -(-n_packets // self.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM)
+        if (self._packet_checksums and
+                0 <= n_bytes - self.CHECKSUM_SEQ_NUM_FLAG < n_blocks):
+            raise Exception(
+                "The first packet of {} bytes of data cannot be told apart "
+                "from a checksum packet; extract it without "
+                "checksums".format(n_bytes))
+        if (self._fec_group_size and
+                0 <= n_bytes - self.PARITY_SEQ_NUM_FLAG <
+                n_packets // self._fec_group_size):
+            raise Exception(
+                "The first packet of {} bytes of data cannot be told apart "
+                "from a parity packet; extract it without parity".format(
+                    n_bytes))
+
+    def _start_tracking(self):
+        """ Set up the record of what has been received, once the size of\
+            the output is known
+        """
+        self._max_seq_num = self._calculate_max_seq_num()
+        n_seq_nums = self._max_seq_num + 1
+        self._seq_nums = ReceivedSequenceTracker(n_seq_nums, first_seq_num=0)
+        if self._packet_checksums:
+            self._checksums = numpy.zeros(n_seq_nums, dtype=numpy.uint32)
+            self._checksum_known = numpy.zeros(n_seq_nums, dtype=bool)
+            self._checksum_verified = numpy.zeros(n_seq_nums, dtype=bool)
+
+    def process_packet(self, data):
+        """ Handle a packet received from the reader core
+
+        :param data: the packet, with the SDP header stripped
+        :type data: bytes or bytearray or memoryview
+        :return: the messages to send to the reader core in response
+        :rtype: list(SDPMessage)
+        """
+        length_of_data = len(data)
+        first_packet_element = struct.unpack_from("<I", data, 0)[0]
+        if first_packet_element in (
+                self.COMPRESSED_REGION_READY, self.PAGE_CHECKSUMS_READY):
+            return self._prepared_region_ready(first_packet_element, data)
+        if self._preparation_command is not None and \
+                self._region_address is None:
+            # left over from before the copy of the region was made
+            return []
+        if self._output is None:
+            # the size was not known up front, so this must be the first
+            # packet, which holds it, unless it is the end of a transfer
+            # left over from before
+            if length_of_data == self.END_FLAG_SIZE:
+                return []
+            self._allocate(first_packet_element)
+        last_mc_packet = struct.unpack_from(
+            "<I", data, length_of_data - self.END_FLAG_SIZE)[0]
+
+        # if received a last flag on its own, its during retransmission.
+        #  check and try again if required
+        if (last_mc_packet == self.END_FLAG and
+                length_of_data == self.END_FLAG_SIZE):
+            self._first_pass_done = True
+            self._repair()
+            if not self._check():
+                return self._missing_seq_num_messages()
+            self._finished = True
+            return []
+
+        # the first packet of the first pass holds the size of the data
+        # where the others hold their sequence number; no sequence number
+        # is as big as the size, but a big enough size has flag bits set,
+        # so it is looked for first
+        if first_packet_element == self._n_bytes:
+            seq_num = 0
+        elif (first_packet_element & self.SEQ_NUM_FLAGS ==
+                self.PREVIOUS_TRANSFER_SEQ_NUM_FLAG):
+            # only a superseded transfer is repaired this way; anything
+            # else is left over from a transfer already finished
+            if not self._superseded:
+                return []
+            if first_packet_element == self.PREVIOUS_TRANSFER_ROUND_END:
+                self._repair()
+                if not self._check():
+                    return self._missing_seq_num_messages()
+                self._finished = True
+                return []
+            seq_num = (
+                first_packet_element & ~self.PREVIOUS_TRANSFER_SEQ_NUM_FLAG)
+        elif first_packet_element & self.PARITY_SEQ_NUM_FLAG:
+            # left over from another transfer unless parity was asked for
+            if self._fec_group_size:
+                self._add_parity(
+                    first_packet_element & ~self.PARITY_SEQ_NUM_FLAG, data)
+            return []
+        elif first_packet_element & self.CHECKSUM_SEQ_NUM_FLAG:
+            # left over from another transfer unless checksums were asked for
+            if self._packet_checksums:
+                self._add_checksums(
+                    first_packet_element & ~self.CHECKSUM_SEQ_NUM_FLAG, data)
+            return []
+        else:
+            seq_num = first_packet_element
+        if seq_num > self._max_seq_num:
+            raise Exception(
+                "got an insane sequence number. got {} when "
+                "the max is {} with a length of {}".format(
+                    seq_num, self._max_seq_num, length_of_data))
+        if not self._seq_nums.add(seq_num):
+            self._n_duplicates += 1
+        if self._checksum_verified is not None:
+            self._checksum_verified[seq_num] = False
+        if self._newest_seq_num is None or seq_num > self._newest_seq_num:
+            self._newest_seq_num = seq_num
+
+        # figure offset for where data is to be put
+        offset = self._calculate_offset(seq_num)
+
+        # write excess data as required
+        if last_mc_packet == self.END_FLAG:
+
+            # adjust for end flag
+            true_data_length = (
+                length_of_data - self.END_FLAG_SIZE -
+                self.SEQUENCE_NUMBER_SIZE)
+
+            # write data
+            self._write_into_view(
+                offset, offset + true_data_length,
+                data, self.SEQUENCE_NUMBER_SIZE,
+                length_of_data - self.END_FLAG_SIZE, seq_num,
+                length_of_data, True)
+
+            # check if need to retry
+            self._first_pass_done = True
+            self._repair()
+            if not self._check():
+                return self._missing_seq_num_messages()
+            self._finished = True
+
+        else:  # full block of data, just write it in
+            # the last packet is padded when sent again
+            true_data_length = min(
+                offset + length_of_data - self.SEQUENCE_NUMBER_SIZE,
+                len(self._output))
+            length_of_data = (
+                true_data_length - offset + self.SEQUENCE_NUMBER_SIZE)
+            self._write_into_view(
+                offset, true_data_length, data,
+                self.SEQUENCE_NUMBER_SIZE,
+                length_of_data, seq_num, length_of_data, False)
+        return []
+
+    def _prepared_region_ready(self, ready_seq_num, data):
+        """ Start the transfer of the copy of the region, once the reader\
+            core has said where it is
+        """
+        if (ready_seq_num != self._ready_seq_num or
+                self._region_address is not None):
+            # said again, as the copy was asked for again, or left over
+            # from another transfer
+            return []
+        self._region_address, self._n_bytes = struct.unpack_from(
+            "<2I", data, self.SEQUENCE_NUMBER_SIZE)
+        return [self.start_message()]
+
+    def process_timeout(self):
+        """ Handle nothing having arrived from the reader core for a while
+
+        :return: the messages to send to the reader core in response
+        :rtype: list(SDPMessage)
+        """
+        if self._preparation_command is not None and \
+                self._region_address is None:
+            # the copy may just be taking a while to make
+            self._n_preparation_timeouts += 1
+            if self._n_preparation_timeouts < self.MAX_PREPARATION_TIMEOUTS:
+                return [self.start_message()]
+        if self._output is None:
+            raise Exception(
+                "no data has arrived from the reader core on {}:{}:{}".format(
+                    self._placement.x, self._placement.y, self._placement.p))
+        self._first_pass_done = True
+        self._repair()
+        return self._missing_seq_num_messages()
+
+    def interim_repair_messages(self):
+        """ In streaming repair mode, get the report of gaps to send to the\
+            reader core while it is still sending, if one is due.  Reports\
+            only cover gaps far enough behind the newest packet not to be\
+            packets arriving out of order, and any repair that is itself\
+            lost is asked for again once the reader core finishes.
+
+        :return: the messages to send to the reader core
+        :rtype: list(SDPMessage)
+        """
+        if (not self._streaming_repair or self._first_pass_done or
+                self._newest_seq_num is None):
+            return []
+        self._packets_since_report += 1
+        if self._packets_since_report < self.REPAIR_REPORT_INTERVAL:
+            return []
+        self._packets_since_report = 0
+
+        watermark = self._newest_seq_num - self.REPAIR_WATERMARK_LAG
+        if watermark <= self._reported_up_to:
+            return []
+        run_starts, run_counts = self._seq_nums.missing_runs(
+            self._reported_up_to, watermark)
+        if len(run_starts) > self.MAX_RANGES_PER_REPAIR_REPORT:
+            # leave the rest for the next report
+            run_starts = run_starts[:self.MAX_RANGES_PER_REPAIR_REPORT]
+            run_counts = run_counts[:self.MAX_RANGES_PER_REPAIR_REPORT]
+            watermark = int(run_starts[-1] + run_counts[-1])
+        self._reported_up_to = watermark
+        if len(run_starts) == 0:
+            return []
+        return [self._sdp_message(
+            struct.pack(
+                "<I", self.SDP_PACKET_INTERIM_MISSING_RANGES_COMMAND_ID) +
+            numpy.column_stack((run_starts, run_counts)).astype(
+                "<u4").tobytes())]
+
+    def _add_parity(self, group, data):
+        """ Store the parity packet of a group of data packets, and use it\
+            straight away if one packet of the group is missing
+
+        :param group: the number of the group
+        :param data: the parity packet
+        """
+        # the reader core only sends parity for whole groups of full packets
+        if len(data) != (
+                self.DATA_PER_FULL_PACKET * self.WORD_TO_BYTE_CONVERTER):
+            return
+        self._parities[group] = self._packet_words_of(data).copy()
+        self._recover_with_parity(group)
+
+    def _recover_with_parity(self, group):
+        """ Rebuild the one missing data packet of a group, if there is\
+            exactly one, from the group's parity and the other packets
+
+        :param group: the number of the group
+        """
+        first_seq_num = group * self._fec_group_size
+        stop_seq_num = first_seq_num + self._fec_group_size
+        missing = self._seq_nums.missing(first_seq_num, stop_seq_num)
+        if len(missing) > 1:
+            return
+        parity = self._parities.pop(group)
+        if len(missing) == 0:
+            return
+
+        # the parity is the xor of every packet, so xor out the others
+        words = self._output_words(
+            self._calculate_offset(first_seq_num),
+            self._calculate_offset(stop_seq_num)).reshape(
+                self._fec_group_size, -1)
+        rebuilt = numpy.bitwise_xor.reduce(numpy.delete(
+            words, int(missing[0]) - first_seq_num, axis=0), axis=0)
+        offset = self._calculate_offset(int(missing[0]))
+        self._view[offset:offset + len(parity) * self.WORD_TO_BYTE_CONVERTER] \
+            = (rebuilt ^ parity).astype("<u4").tobytes()
+        self._seq_nums.add(int(missing[0]))
+
+    @classmethod
+    def _packet_words_of(cls, data):
+        """ Get the words of a packet after its sequence number
+
+        :param data: the packet
+        :type data: bytes or bytearray or memoryview
+        :rtype: numpy.ndarray
+        """
+        # Python 2 numpy cannot read a memoryview
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return numpy.frombuffer(
+            data, dtype="<u4", offset=cls.SEQUENCE_NUMBER_SIZE)
+
+    def _output_words(self, start, stop):
+        """ Get part of the output as words, without copying it
+
+        :param start: where the part starts, in bytes
+        :type start: int
+        :param stop: where the part ends, in bytes
+        :type stop: int
+        :rtype: numpy.ndarray
+        """
+        # the output itself, as Python 2 numpy cannot read a memoryview
+        return numpy.frombuffer(
+            self._output, dtype="<u4", offset=start,
+            count=(stop - start) // self.WORD_TO_BYTE_CONVERTER)
+
+    def _add_checksums(self, block, data):
+        """ Store the checksums of a block of data packets, and check the\
+            packets of the block received so far
+
+        :param block: the number of the block, which holds the checksums\
+            of as many packets as a packet holds words
+        :param data: the checksum packet
+        """
+        first_seq_num = block * self.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM
+        checksums = self._packet_words_of(data)
+
+        # the block after the last packet is padded
+        checksums = checksums[:max(len(self._checksums) - first_seq_num, 0)]
+        self._checksums[first_seq_num:first_seq_num + len(checksums)] = \
+            checksums
+        self._checksum_known[first_seq_num:first_seq_num + len(checksums)] = \
+            True
+        self._verify_checksums(first_seq_num, first_seq_num + len(checksums))
+
+    def _verify_checksums(self, start=0, stop=None):
+        """ Check every received packet with a known checksum that has not\
+            been checked yet, and forget any that fail so that they are\
+            asked for again
+
+        :param start: the lowest sequence number to check
+        :type start: int
+        :param stop: one more than the highest sequence number to check, or\
+            None for the last
+        :type stop: int
+        """
+        if self._checksums is None:
+            return
+        if stop is None:
+            stop = len(self._checksums)
+        seq_nums = numpy.setdiff1d(
+            numpy.flatnonzero(
+                self._checksum_known[start:stop] &
+                ~self._checksum_verified[start:stop]) + start,
+            self._seq_nums.missing(start, stop), assume_unique=True)
+        if len(seq_nums) == 0:
+            return
+
+        checksums = numpy.dot(
+            self._packet_words(seq_nums).astype(numpy.uint64),
+            self.CHECKSUM_WEIGHTS)
+        failed = seq_nums[
+            (checksums & 0xFFFFFFFF).astype(numpy.uint32) !=
+            self._checksums[seq_nums]]
+        self._checksum_verified[seq_nums] = True
+        for seq_num in failed:
+            self._seq_nums.discard(int(seq_num))
+        self._n_corrupted += len(failed)
+
+    def _packet_words(self, seq_nums):
+        """ Get the data of some packets as words, one row per packet, with\
+            a short last packet padded with zeros
+
+        :param seq_nums: the sequence numbers of the packets
+        :type seq_nums: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        words_per_packet = self.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM
+        n_full_packets = len(self._output) // self._calculate_offset(1)
+        full_end = self._calculate_offset(n_full_packets)
+        words = numpy.zeros(
+            (len(seq_nums), words_per_packet), dtype=numpy.uint32)
+        is_full = seq_nums < n_full_packets
+        words[is_full] = self._output_words(0, full_end).reshape(
+            n_full_packets, words_per_packet)[seq_nums[is_full]]
+        if not numpy.all(is_full):
+            n_tail_words = (
+                (len(self._output) - full_end) // self.WORD_TO_BYTE_CONVERTER)
+            tail = self._output_words(
+                full_end,
+                full_end + n_tail_words * self.WORD_TO_BYTE_CONVERTER)
+            words[~is_full, :len(tail)] = tail
+        return words
+
+    def _repair(self):
+        """ Deal with what can be dealt with without the reader core before\
+            checking what is missing
+        """
+        self._verify_checksums()
+        for group in list(self._parities):
+            self._recover_with_parity(group)
+
+    def _missing_seq_num_messages(self):
+        n_missing = self._seq_nums.n_missing
+        self._lost_seq_nums.append(n_missing)
+        if n_missing == 0:
+            self._finished = True
+            return []
+        if self._superseded:
+            return self._previous_transfer_messages()
+
+        # loss tends to come in bursts, so (start, count) ranges are often
+        # far smaller than the list of sequence numbers
+        run_starts, run_counts = self._seq_nums.missing_runs()
+        use_ranges = self._range_requests and (
+            self._n_request_packets(len(run_starts), 2, 3) <
+            self._n_request_packets(n_missing, 1, 2))
+        if use_ranges:
+            ranges = numpy.column_stack((run_starts, run_counts)).ravel()
+            return self._request_messages(
+                ranges, 2, self.SDP_PACKET_START_MISSING_RANGES_COMMAND_ID,
+                self.SDP_PACKET_MISSING_RANGES_COMMAND_ID, n_missing)
+        return self._request_messages(
+            self._seq_nums.missing(), 1,
+            self.SDP_PACKET_START_MISSING_SEQ_COMMAND_ID,
+            self.SDP_PACKET_MISSING_SEQ_COMMAND_ID)
+
+    def _previous_transfer_messages(self):
+        """ Build the reports of what is missing from a superseded transfer,\
+            as many as the reader core can hold at once.  Each report says\
+            which round it is of and how many sequence numbers the round\
+            asks for in all, so that the reader core only ends the round\
+            once it has had every report of it.
+
+        :rtype: list(SDPMessage)
+        """
+        if self._seq_nums.is_complete:
+            self._finished = True
+            return []
+
+        # cut the runs down to the first repairs the reader core can hold
+        run_starts, run_counts = self._seq_nums.missing_runs()
+        run_counts = run_counts.astype(numpy.int64)
+        room = numpy.maximum(
+            self.MAX_PREVIOUS_TRANSFER_REPAIRS -
+            (numpy.cumsum(run_counts) - run_counts), 0)
+        run_counts = numpy.minimum(run_counts, room)
+        kept = run_counts > 0
+        ranges = numpy.column_stack(
+            (run_starts[kept], run_counts[kept])).astype("<u4")
+        self._n_previous_rounds += 1
+        header = struct.pack(
+            "<3I", self.SDP_PACKET_PREVIOUS_MISSING_RANGES_COMMAND_ID,
+            self._n_previous_rounds, int(run_counts.sum()))
+        per_report = self.MAX_RANGES_PER_PREVIOUS_TRANSFER_REPORT
+        return [
+            self._sdp_message(
+                header + ranges[start:start + per_report].tobytes())
+            for start in range(0, len(ranges), per_report)]
+
+    def _n_request_packets(self, n_items, words_per_item, first_header_size):
+        """ Work out how many packets a request for retransmission needs
+
+        :param n_items: the number of items to request
+        :param words_per_item: the size of each item in words
+        :param first_header_size: the size of the first packet's header in\
+            words; every other packet has a one word header
+        :rtype: int
+        """
+        items_in_first = (
+            (self.DATA_PER_FULL_PACKET - first_header_size) // words_per_item)
+        items_in_others = (self.DATA_PER_FULL_PACKET - 1) // words_per_item
+        return 1 + int(math.ceil(
+            float(max(n_items - items_in_first, 0)) / float(items_in_others)))
+
+    def _request_messages(
+            self, words, words_per_item, start_command_id, more_command_id,
+            *extra_header):
+        """ Build the packets of a request for retransmission.  The first\
+            packet holds the start command, the number of packets and any\
+            extra header words; the others hold only the more command.
+
+        :param words: the items to request, as a flat array of words
+        :param words_per_item: the size of each item in words
+        :param start_command_id: the command of the first packet
+        :param more_command_id: the command of the other packets
+        :param extra_header: any extra words for the first packet's header
+        :rtype: list(SDPMessage)
+        """
+        first_header_size = 2 + len(extra_header)
+        n_packets = self._n_request_packets(
+            len(words) // words_per_item, words_per_item, first_header_size)
+        header = struct.pack(
+            "<{}I".format(first_header_size), start_command_id, n_packets,
+            *extra_header)
+        words_in_packet = (
+            (self.DATA_PER_FULL_PACKET - first_header_size) //
+            words_per_item * words_per_item)
+
+        # build missing seq as new sdp packets
+        messages = list()
+        offset = 0
+        for _ in range(n_packets):
+            data = header + words[offset:offset + words_in_packet].astype(
+                "<u4").tobytes()
+            offset += words_in_packet
+            messages.append(self._sdp_message(data))
+
+            header = struct.pack("<I", more_command_id)
+            words_in_packet = (
+                (self.DATA_PER_FULL_PACKET - 1) //
+                words_per_item * words_per_item)
+        return messages
+
+    def _calculate_offset(self, seq_num):
+        offset = (seq_num * self.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM *
+                  self.WORD_TO_BYTE_CONVERTER)
+        return offset
+
+    def _write_into_view(
+            self, view_start_position, view_end_position,
+            data, data_start_position, data_end_position, seq_num,
+            packet_length, is_final):
+        """ puts data into the view
+
+        :param view_start_position: where in view to start
+        :param view_end_position: where in view to end
+        :param data: the data holder to write from
+        :param data_start_position: where in data holder to start from
+        :param data_end_position: where in data holder to end
+        :param seq_num: the seq number to figure
+        :rtype: None
+        """
+        if view_end_position > len(self._output):
+            raise Exception(
+                "I'm trying to add to my output data, but am trying to add "
+                "outside my acceptable output positions!!!! max is {} and "
+                "I received request to fill to {} for seq num {} from max "
+                "seq num {} length of packet {} and final {}".format(
+                    len(self._output), view_end_position, seq_num,
+                    self._max_seq_num, packet_length, is_final))
+        self._view[view_start_position: view_end_position] = \
+            data[data_start_position:data_end_position]
+
+    def _check(self):
+        return self._seq_nums.is_complete
+
+    def _calculate_max_seq_num(self):
+        # every packet holds the same amount of data, the first included
+        n_sequence_numbers = int(math.ceil(float(len(self._output)) / float(
+            self.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM *
+            self.WORD_TO_BYTE_CONVERTER)))
+        return max(n_sequence_numbers - 1, 0)
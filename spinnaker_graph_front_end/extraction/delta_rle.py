@@ -0,0 +1,151 @@
+""" The word-delta and run-length encoding reader cores can compress a region\
+    of SDRAM with before sending it, for data such as counters, ramps and\
+    mostly empty buffers, whose words change by the same amount over and\
+    over.
+
+    The data is taken as little-endian 32-bit words, the last padded out,\
+    and each word is replaced by its difference from the word before it\
+    (the first from 0), modulo 2 to the 32.  The compressed data is the\
+    size of the data in bytes, in one word, followed by records of these\
+    differences, each a header word followed by:
+
+    * if the top bit of the header is set, one word, repeated as many\
+      times as the rest of the header says
+    * otherwise, as many words as the header says, each used once
+"""
+import numpy
+
+#: set in the header of a record of one difference repeated
+RUN_FLAG = 0x80000000
+
+#: the bits of a record header that hold how many differences it covers
+COUNT_MASK = 0x7FFFFFFF
+
+#: the fewest repeats of a difference worth a record of their own
+MIN_RUN_LENGTH = 4
+
+_WORD = numpy.dtype("<u4")
+
+
+def _readable(data):
+    # Python 2 numpy cannot read a memoryview
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    return data
+
+
+def _deltas(words):
+    deltas = numpy.empty_like(words)
+    if len(words):
+        deltas[0] = words[0]
+        numpy.subtract(words[1:], words[:-1], out=deltas[1:])
+    return deltas
+
+
+def compress_delta_rle(data):
+    """ Compress data the way the reader core does
+
+    :param data: the data to compress
+    :type data: bytes or bytearray or memoryview
+    :return: the compressed data
+    :rtype: bytes
+    """
+    n_bytes = len(data)
+    words = numpy.frombuffer(
+        bytes(_readable(data)) + b"\0" * (-n_bytes % _WORD.itemsize),
+        dtype=_WORD)
+    deltas = _deltas(words)
+
+    # the stretches of equal differences
+    starts = numpy.concatenate((
+        [0], numpy.flatnonzero(deltas[1:] != deltas[:-1]) + 1))
+    lengths = numpy.diff(numpy.concatenate((starts, [len(deltas)])))
+
+    records = [numpy.array([n_bytes], dtype=_WORD)]
+    literal_start = 0
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        if length < MIN_RUN_LENGTH:
+            continue
+        if literal_start < start:
+            records.append(numpy.array(
+                [start - literal_start], dtype=_WORD))
+            records.append(deltas[literal_start:start])
+        records.append(numpy.array(
+            [RUN_FLAG | length, deltas[start]], dtype=_WORD))
+        literal_start = start + length
+    if literal_start < len(deltas):
+        records.append(numpy.array(
+            [len(deltas) - literal_start], dtype=_WORD))
+        records.append(deltas[literal_start:])
+    return numpy.concatenate(records).astype(_WORD).tobytes()
+
+
+def decompressed_size(compressed):
+    """ Get the size of data once decompressed
+
+    :param compressed: the compressed data
+    :type compressed: bytes or bytearray or memoryview
+    :rtype: int
+    """
+    return int(numpy.frombuffer(
+        _readable(compressed), dtype=_WORD, count=1)[0])
+
+
+def decompress_delta_rle(compressed, output=None):
+    """ Decompress data compressed by a reader core.  Only the record\
+        headers are walked one at a time; the differences are expanded and\
+        summed as whole arrays.
+
+    :param compressed: the compressed data
+    :type compressed: bytes or bytearray or memoryview
+    :param output: where to put the data, which must be the size of the\
+        data, or None to make a new bytearray
+    :type output: bytearray or numpy.ndarray
+    :return: the data
+    :rtype: bytearray or numpy.ndarray
+    """
+    words = numpy.frombuffer(
+        _readable(compressed), dtype=_WORD,
+        count=len(compressed) // _WORD.itemsize)
+    n_bytes = int(words[0])
+    if output is None:
+        output = bytearray(n_bytes)
+    elif len(output) != n_bytes:
+        raise Exception(
+            "The data decompresses to {} bytes, not {}".format(
+                n_bytes, len(output)))
+
+    # find where the words of each record are
+    sources = list()
+    counts = list()
+    runs = list()
+    position = 1
+    while position < len(words):
+        header = int(words[position])
+        count = header & COUNT_MASK
+        sources.append(position + 1)
+        counts.append(count)
+        runs.append(bool(header & RUN_FLAG))
+        position += 2 if header & RUN_FLAG else 1 + count
+    if position != len(words):
+        raise Exception("The compressed data ends part way through a record")
+    n_words = -(-n_bytes // _WORD.itemsize)
+    counts = numpy.array(counts, dtype=numpy.int64)
+    if counts.sum() != n_words:
+        raise Exception(
+            "The compressed data holds {} words, not {}".format(
+                counts.sum(), n_words))
+
+    # a run takes its one word over and over, a literal each word in turn
+    literal = ~numpy.array(runs, dtype=bool)
+    first_indices = numpy.cumsum(counts) - counts
+    step = numpy.repeat(literal, counts)
+    indices = (
+        numpy.repeat(numpy.array(sources, dtype=numpy.int64) -
+                     first_indices * literal, counts) +
+        numpy.arange(n_words, dtype=numpy.int64) * step)
+    data = numpy.cumsum(words[indices], dtype=_WORD)
+    numpy.frombuffer(output, dtype=numpy.uint8, count=n_bytes)[:] = \
+        numpy.frombuffer(data.astype(_WORD).tobytes(), dtype=numpy.uint8,
+                         count=n_bytes)
+    return output
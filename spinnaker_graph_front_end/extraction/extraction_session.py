@@ -0,0 +1,171 @@
+import struct
+
+from data_specification.utility_calls import get_region_base_address_offset
+
+_ONE_WORD = struct.Struct("<I")
+
+
+class ExtractionSession(object):
+    """ Sets the extra monitors up for fast data extraction once, reads any\
+        number of regions through the packet gatherers, and puts the\
+        monitors back as they were at the end, even if a read fails::
+
+            with sim.extraction_session() as session:
+                for placement in placements:
+                    data = session.read_region(placement, region, n_bytes)
+
+        Setting the monitors up and putting them back costs far more than\
+        reading a small region, so doing it once for the whole batch makes\
+        it worth reading thousands of small regions this way.  A session\
+        can be entered again while already entered; only the outermost\
+        exit puts the monitors back.
+    """
+
+    __slots__ = [
+        # the transceiver to read with
+        "_transceiver",
+
+        # the placements of the graph
+        "_placements",
+
+        # the machine the graph is on
+        "_machine",
+
+        # the extra monitors on the machine
+        "_extra_monitor_vertices",
+
+        # the packet gatherer of each Ethernet chip, by (x, y)
+        "_gatherers",
+
+        # the extra monitor of each chip, by (x, y), once looked up
+        "_monitors_by_chip",
+
+        # the address of the application data of each core read, by\
+        # (x, y, p)
+        "_app_data_addresses",
+
+        # how many times the session has been entered and not exited
+        "_depth"]
+
+    def __init__(
+            self, transceiver, placements, machine, extra_monitor_vertices,
+            gatherers):
+        """
+        :param transceiver: the transceiver to read with
+        :param placements: the placements of the graph
+        :param machine: the machine the graph is on
+        :param extra_monitor_vertices: the extra monitors on the machine
+        :param gatherers: the packet gatherer of each Ethernet chip, by\
+            (x, y)
+        :type gatherers: dict(tuple(int, int), \
+            DataSpeedUpPacketGatherMachineVertex)
+        """
+        self._transceiver = transceiver
+        self._placements = placements
+        self._machine = machine
+        self._extra_monitor_vertices = extra_monitor_vertices
+        self._gatherers = gatherers
+        self._monitors_by_chip = None
+        self._app_data_addresses = dict()
+        self._depth = 0
+
+    def __enter__(self):
+        if self._depth == 0:
+            self._any_gatherer().set_cores_for_data_extraction(
+                transceiver=self._transceiver, placements=self._placements,
+                extra_monitor_cores_for_router_timeout=(
+                    self._extra_monitor_vertices))
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0:
+            self._any_gatherer().unset_cores_for_data_extraction(
+                transceiver=self._transceiver, placements=self._placements,
+                extra_monitor_cores_for_router_timeout=(
+                    self._extra_monitor_vertices))
+        return False
+
+    @property
+    def is_active(self):
+        """ Whether the monitors are set up for extraction
+
+        :rtype: bool
+        """
+        return self._depth > 0
+
+    def _any_gatherer(self):
+        # any gatherer sets up every monitor given to it
+        return next(iter(self._gatherers.values()))
+
+    def _check_active(self):
+        if not self._depth:
+            raise Exception(
+                "Data can only be read while the extraction session is "
+                "entered, with a with statement")
+
+    def _monitor_placement(self, x, y):
+        if self._monitors_by_chip is None:
+            self._monitors_by_chip = dict()
+            for vertex in self._extra_monitor_vertices:
+                placement = self._placements.get_placement_of_vertex(vertex)
+                self._monitors_by_chip[placement.x, placement.y] = placement
+        return self._monitors_by_chip[x, y]
+
+    def read(self, placement, memory_address, length_in_bytes):
+        """ Read a block of SDRAM from the chip of a placement, through the\
+            packet gatherer of its board
+
+        :param placement: the placement on the chip to read from
+        :type placement: pacman.model.placements.Placement
+        :param memory_address: where the block starts
+        :type memory_address: int
+        :param length_in_bytes: how big the block is
+        :type length_in_bytes: int
+        :rtype: bytearray
+        """
+        self._check_active()
+        chip = self._machine.get_chip_at(placement.x, placement.y)
+        gatherer = self._gatherers[
+            chip.nearest_ethernet_x, chip.nearest_ethernet_y]
+        return gatherer.get_data(
+            self._transceiver, self._monitor_placement(
+                placement.x, placement.y), memory_address, length_in_bytes)
+
+    def read_region(self, placement, region, length_in_bytes):
+        """ Read the start of a region written by a data specification, the\
+            address of the region being looked up once per core
+
+        :param placement: the placement of the core the region belongs to
+        :type placement: pacman.model.placements.Placement
+        :param region: the number of the region
+        :type region: int
+        :param length_in_bytes: how much of the region to read
+        :type length_in_bytes: int
+        :rtype: bytearray
+        """
+        self._check_active()
+        key = (placement.x, placement.y, placement.p)
+        app_data_address = self._app_data_addresses.get(key)
+        if app_data_address is None:
+            app_data_address = self._transceiver.get_cpu_information_from_core(
+                placement.x, placement.y, placement.p).user[0]
+            self._app_data_addresses[key] = app_data_address
+        region_address = _ONE_WORD.unpack(self._transceiver.read_memory(
+            placement.x, placement.y,
+            get_region_base_address_offset(app_data_address, region),
+            _ONE_WORD.size))[0]
+        return self.read(placement, region_address, length_in_bytes)
+
+    def read_many(self, reads):
+        """ Read many blocks of SDRAM in one go
+
+        :param reads: the placement, address and length of each block
+        :type reads: iterable(tuple(pacman.model.placements.Placement, \
+            int, int))
+        :return: the blocks, in the order asked for
+        :rtype: list(bytearray)
+        """
+        return [self.read(placement, memory_address, length_in_bytes)
+                for placement, memory_address, length_in_bytes in reads]
@@ -0,0 +1,307 @@
+import json
+
+
+class ExtractionTelemetry(object):
+    """ A record of where the time went in one extraction from a reader\
+        core, and of what went wrong along the way.
+
+        The driver of the extraction tells the record when the extraction\
+        starts and ends, when packets arrive and when requests are sent;\
+        what was received and what went missing is read from the stream\
+        itself.  A round ends each time the stream works out what is\
+        missing, so the first round is the first pass of the data and each\
+        later one is a retransmission.
+    """
+
+    __slots__ = [
+        # the extraction being recorded
+        "_stream",
+
+        # when the extraction started, or None if it has not
+        "_start_time",
+
+        # when the first packet arrived, or None if none has
+        "_first_packet_time",
+
+        # when the extraction ended, or None if it has not
+        "_end_time",
+
+        # when the round in progress started
+        "_round_start_time",
+
+        # how many sequence numbers were missing at the end of each round
+        "_missing_per_round",
+
+        # how long each round took, in seconds
+        "_round_durations",
+
+        # how many rounds the stream had already been through at the start
+        "_n_earlier_rounds",
+
+        # how many packets have arrived
+        "_n_packets_received",
+
+        # how many times nothing arrived in time
+        "_n_timeouts",
+
+        # how many request packets have been sent to the reader core
+        "_n_request_packets",
+
+        # the count of datagrams the kernel dropped on the socket when the\
+        # extraction started, or None if it cannot be told
+        "_kernel_drops_at_start",
+
+        # how many datagrams the kernel dropped on the socket during the\
+        # extraction, or None if it cannot be told
+        "_n_kernel_drops"]
+
+    def __init__(self, stream):
+        """
+        :param stream: the extraction to record
+        :type stream: DataExtractionStream
+        """
+        self._stream = stream
+        self._start_time = None
+        self._first_packet_time = None
+        self._end_time = None
+        self._round_start_time = None
+        self._missing_per_round = list()
+        self._round_durations = list()
+        self._n_earlier_rounds = 0
+        self._n_packets_received = 0
+        self._n_timeouts = 0
+        self._n_request_packets = 0
+        self._kernel_drops_at_start = None
+        self._n_kernel_drops = None
+
+    def started(self, now, n_kernel_drops=None):
+        """ Note that the extraction has started
+
+        :param now: the time, in seconds
+        :type now: float
+        :param n_kernel_drops: the count of datagrams the kernel has dropped\
+            on the socket so far, or None if it cannot be told
+        :type n_kernel_drops: int
+        """
+        self._start_time = now
+        self._round_start_time = now
+        self._n_earlier_rounds = len(self._stream.lost_seq_nums)
+        self._kernel_drops_at_start = n_kernel_drops
+
+    def packet_received(self, now):
+        """ Note that a packet has arrived and been handed to the stream
+
+        :param now: the time, in seconds
+        :type now: float
+        """
+        if self._first_packet_time is None:
+            self._first_packet_time = now
+        self._n_packets_received += 1
+        self._note_rounds(now)
+
+    def timed_out(self, now):
+        """ Note that nothing arrived in time, and the stream has been told
+
+        :param now: the time, in seconds
+        :type now: float
+        """
+        self._n_timeouts += 1
+        self._note_rounds(now)
+
+    def requests_sent(self, n_requests):
+        """ Note that requests have been sent to the reader core
+
+        :param n_requests: how many request packets were sent
+        :type n_requests: int
+        """
+        self._n_request_packets += n_requests
+
+    def finished(self, now, n_kernel_drops=None):
+        """ Note that the extraction has ended, whether or not it got\
+            everything
+
+        :param now: the time, in seconds
+        :type now: float
+        :param n_kernel_drops: the count of datagrams the kernel has dropped\
+            on the socket so far, or None if it cannot be told
+        :type n_kernel_drops: int
+        """
+        # nothing to record if it never got going
+        if self._start_time is None:
+            return
+        self._note_rounds(now)
+
+        # the last round ends with nothing missing, unless the stream
+        # already found that out for itself
+        if self._stream.is_finished and (
+                not self._missing_per_round or self._missing_per_round[-1]):
+            self._end_round(0, now)
+        self._end_time = now
+        if (n_kernel_drops is not None and
+                self._kernel_drops_at_start is not None):
+            self._n_kernel_drops = n_kernel_drops - self._kernel_drops_at_start
+
+    def _note_rounds(self, now):
+        lost_seq_nums = self._stream.lost_seq_nums
+        for n_missing in lost_seq_nums[
+                self._n_earlier_rounds + len(self._missing_per_round):]:
+            self._end_round(n_missing, now)
+
+    def _end_round(self, n_missing, now):
+        self._missing_per_round.append(int(n_missing))
+        self._round_durations.append(now - self._round_start_time)
+        self._round_start_time = now
+
+    @property
+    def placement(self):
+        """ The placement of the reader core
+
+        :rtype: pacman.model.placements.Placement
+        """
+        return self._stream.placement
+
+    @property
+    def total_time(self):
+        """ How long the extraction took, in seconds, or None if it has not\
+            ended
+
+        :rtype: float
+        """
+        if self._end_time is None:
+            return None
+        return self._end_time - self._start_time
+
+    @property
+    def time_to_first_packet(self):
+        """ How long the first packet took to arrive, in seconds, or None if\
+            none has
+
+        :rtype: float
+        """
+        if self._first_packet_time is None:
+            return None
+        return self._first_packet_time - self._start_time
+
+    @property
+    def n_bytes(self):
+        """ The size of the data extracted
+
+        :rtype: int
+        """
+        output = self._stream.output
+        return 0 if output is None else len(output)
+
+    @property
+    def n_packets_received(self):
+        """ How many packets arrived, including duplicates
+
+        :rtype: int
+        """
+        return self._n_packets_received
+
+    @property
+    def n_duplicate_packets(self):
+        """ How many data packets arrived that had already been received
+
+        :rtype: int
+        """
+        return self._stream.n_duplicate_packets
+
+    @property
+    def n_corrupted_packets(self):
+        """ How many packets failed their checksum
+
+        :rtype: int
+        """
+        return self._stream.n_corrupted
+
+    @property
+    def n_timeouts(self):
+        """ How many times nothing arrived in time
+
+        :rtype: int
+        """
+        return self._n_timeouts
+
+    @property
+    def n_request_packets(self):
+        """ How many request packets were sent to the reader core,\
+            including the one that started the extraction
+
+        :rtype: int
+        """
+        return self._n_request_packets
+
+    @property
+    def n_kernel_drops(self):
+        """ How many datagrams the kernel dropped on the socket during the\
+            extraction, or None if it cannot be told.  A socket shared by\
+            several extractions at once counts the drops of them all.
+
+        :rtype: int
+        """
+        return self._n_kernel_drops
+
+    @property
+    def missing_per_round(self):
+        """ How many sequence numbers were missing at the end of each round
+
+        :rtype: list(int)
+        """
+        return self._missing_per_round
+
+    @property
+    def round_durations(self):
+        """ How long each round took, in seconds
+
+        :rtype: list(float)
+        """
+        return self._round_durations
+
+    @property
+    def megabits_per_second(self):
+        """ The rate at which the data was extracted, or None if the\
+            extraction has not ended
+
+        :rtype: float
+        """
+        total_time = self.total_time
+        if not total_time:
+            return None
+        return self.n_bytes * 8 / (total_time * 1000000.0)
+
+    def as_dict(self):
+        """ Get the record as a flat dictionary, one of which is a row of a\
+            table of many extractions, such as\
+            ``pandas.DataFrame([t.as_dict() for t in telemetry])``
+
+        :rtype: dict(str, object)
+        """
+        placement = self.placement
+        return {
+            "x": placement.x,
+            "y": placement.y,
+            "p": placement.p,
+            "total_time": self.total_time,
+            "time_to_first_packet": self.time_to_first_packet,
+            "n_bytes": self.n_bytes,
+            "megabits_per_second": self.megabits_per_second,
+            "n_packets_received": self._n_packets_received,
+            "n_duplicate_packets": self.n_duplicate_packets,
+            "n_corrupted_packets": self.n_corrupted_packets,
+            "n_timeouts": self._n_timeouts,
+            "n_request_packets": self._n_request_packets,
+            "n_kernel_drops": self._n_kernel_drops,
+            "n_rounds": len(self._missing_per_round),
+            "missing_per_round": list(self._missing_per_round),
+            "round_durations": list(self._round_durations)}
+
+    def to_json(self):
+        """ Get the record as JSON
+
+        :rtype: str
+        """
+        return json.dumps(self.as_dict(), sort_keys=True)
+
+    def __repr__(self):
+        return "ExtractionTelemetry({})".format(self.to_json())
@@ -0,0 +1,316 @@
+import collections
+import struct
+
+import numpy
+
+from .abstract_transport import AbstractTransport
+from .data_extraction_stream import DataExtractionStream
+from .delta_rle import compress_delta_rle
+from .incremental_extraction import page_checksums
+
+
+class InMemoryTransport(AbstractTransport):
+    """ A stand-in for a reader core and its packet gatherer that sends\
+        data held in memory, answering requests the way the reader core\
+        does, so that the protocol can be tested and benchmarked without a\
+        board.  Packets can be dropped on their way to the host to see how\
+        the protocol recovers.
+    """
+
+    __slots__ = [
+        # the SDRAM the reader core can send regions of
+        "_memory",
+
+        # the address of the start of the SDRAM held
+        "_base_address",
+
+        # the data being sent by the reader core
+        "_data",
+
+        # the data the reader core sent before the data being sent
+        "_previous_data",
+
+        # the round of repairs of the data sent before being asked for
+        "_previous_round",
+
+        # how many repairs of the round are still to be asked for
+        "_n_previous_left",
+
+        # the last region compressed, kept just after the SDRAM held
+        "_compressed",
+
+        # the checksums of the pages of the last region checksummed, kept\
+        # just after the compressed region
+        "_page_checksums",
+
+        # decides which packets to drop, or None to drop none
+        "_drop",
+
+        # the packets on their way to the host
+        "_packets",
+
+        # the seq nums asked for by the request being received
+        "_requested",
+
+        # how many packets of the request being received are still to come
+        "_n_request_packets_left",
+
+        # the SDP header the packets keep, or None if it is stripped
+        "_sdp_header"]
+
+    _CHECKSUMS_PER_PACKET = \
+        DataExtractionStream.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM
+
+    _BYTES_PER_PACKET = (
+        DataExtractionStream.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM *
+        DataExtractionStream.WORD_TO_BYTE_CONVERTER)
+
+    def __init__(
+            self, data, drop=None, gatherer_placement=None, base_address=0):
+        """
+        :param data: the data held by the reader core, which it sends\
+            unless asked for a region of it
+        :type data: bytes
+        :param drop: called with each packet on its way to the host; the\
+            packet is lost if it returns True
+        :type drop: callable(bytes) -> bool
+        :param gatherer_placement: if given, the packets keep an SDP header\
+            from a packet gatherer here, as they do when multiplexed
+        :type gatherer_placement: pacman.model.placements.Placement
+        :param base_address: the SDRAM address the data is at, for when\
+            regions of it are asked for
+        :type base_address: int
+        """
+        self._memory = bytes(data)
+        self._base_address = base_address
+        self._data = self._memory
+        self._previous_data = self._memory
+        self._previous_round = None
+        self._n_previous_left = 0
+        self._compressed = b""
+        self._page_checksums = b""
+        self._drop = drop
+        self._packets = collections.deque()
+        self._requested = list()
+        self._n_request_packets_left = 0
+        self._sdp_header = None
+        if gatherer_placement is not None:
+            self._sdp_header = struct.pack(
+                "<2x4BHH", 0x07, 0, 0xFF, gatherer_placement.p, 0,
+                (gatherer_placement.x << 8) | gatherer_placement.y)
+
+    def send(self, message):
+        data = bytes(message.data)
+        words = struct.unpack("<{}I".format(len(data) // 4), data)
+        command = words[0]
+        stream = DataExtractionStream
+        if command == stream.SDP_PACKET_START_SENDING_COMMAND_ID:
+            self._previous_data = self._data
+            self._previous_round = None
+            if len(words) > 4:
+                self._data = self._region(words[3], words[4])
+            self._send_all(
+                words[1] if len(words) > 1 else 0,
+                len(words) > 2 and words[2] != 0)
+        elif command == stream.SDP_PACKET_START_MISSING_SEQ_COMMAND_ID:
+            self._start_request(words[1])
+            self._add_requested(words[2:], False)
+        elif command == stream.SDP_PACKET_START_MISSING_RANGES_COMMAND_ID:
+            # the header also holds how many packets are missing in all
+            self._start_request(words[1])
+            self._add_requested(words[3:], True)
+        elif command == stream.SDP_PACKET_MISSING_SEQ_COMMAND_ID:
+            self._add_requested(words[1:], False)
+        elif command == stream.SDP_PACKET_MISSING_RANGES_COMMAND_ID:
+            self._add_requested(words[1:], True)
+        elif command == stream.SDP_PACKET_INTERIM_MISSING_RANGES_COMMAND_ID:
+            for seq_num in self._expand_ranges(words[1:]):
+                if self._packet_data_end(seq_num) <= len(self._data):
+                    self._queue(self._packet(seq_num))
+        elif command == stream.SDP_PACKET_COMPRESS_REGION_COMMAND_ID:
+            self._compressed = compress_delta_rle(
+                self._region(words[1], words[2]))
+            self._queue(struct.pack(
+                "<3I", stream.COMPRESSED_REGION_READY,
+                self._compressed_address, len(self._compressed)) +
+                b"\0" * (self._BYTES_PER_PACKET - 8))
+        elif command == stream.SDP_PACKET_PAGE_CHECKSUMS_COMMAND_ID:
+            self._page_checksums = page_checksums(
+                self._region(words[1], words[2]), words[3]).tobytes()
+            self._queue(struct.pack(
+                "<3I", stream.PAGE_CHECKSUMS_READY,
+                self._page_checksums_address, len(self._page_checksums)) +
+                b"\0" * (self._BYTES_PER_PACKET - 8))
+        elif command == stream.SDP_PACKET_PREVIOUS_MISSING_RANGES_COMMAND_ID:
+            self._add_previous(words[1], words[2], words[3:])
+
+    def receive(self, timeout):
+        if not self._packets:
+            return None
+        return self._packets.popleft()
+
+    def close(self):
+        self._packets.clear()
+
+    def write(self, address, data):
+        """ Change the SDRAM held, as an application running on the core\
+            would between reads
+
+        :param address: where to write
+        :type address: int
+        :param data: what to write, which may run past the end of the\
+            SDRAM held to make it bigger
+        :type data: bytes
+        """
+        start = address - self._base_address
+        memory = self._memory + b"\0" * max(start - len(self._memory), 0)
+        self._memory = memory[:start] + bytes(data) + memory[
+            start + len(data):]
+
+    @property
+    def n_waiting(self):
+        """ How many packets are on their way to the host
+
+        :rtype: int
+        """
+        return len(self._packets)
+
+    def _queue(self, packet):
+        if self._sdp_header is not None:
+            packet = self._sdp_header + packet
+        if self._drop is None or not self._drop(packet):
+            self._packets.append(packet)
+
+    def _packet_data_end(self, seq_num):
+        return (seq_num + 1) * self._BYTES_PER_PACKET
+
+    @property
+    def _compressed_address(self):
+        return self._base_address + len(self._memory)
+
+    @property
+    def _page_checksums_address(self):
+        return self._compressed_address + len(self._compressed)
+
+    def _region(self, address, n_bytes):
+        # the checksums are where the compressed copy is if there is none
+        if address == self._page_checksums_address:
+            return self._page_checksums[:n_bytes]
+        if address == self._compressed_address:
+            return self._compressed[:n_bytes]
+        start = address - self._base_address
+        return self._memory[start:start + n_bytes]
+
+    def _add_previous(self, round_number, n_seq_nums, ranges):
+        """ Send packets of the data sent before the data being sent again,\
+            flagged, and end the round once all of it has been asked for
+        """
+        if round_number != self._previous_round:
+            self._previous_round = round_number
+            self._n_previous_left = n_seq_nums
+        flag = DataExtractionStream.PREVIOUS_TRANSFER_SEQ_NUM_FLAG
+        for seq_num in self._expand_ranges(ranges):
+            self._n_previous_left -= 1
+            data = self._previous_data[
+                seq_num * self._BYTES_PER_PACKET:
+                (seq_num + 1) * self._BYTES_PER_PACKET]
+            if data:
+                self._queue(struct.pack("<I", flag | seq_num) + data +
+                            b"\0" * (self._BYTES_PER_PACKET - len(data)))
+        if self._n_previous_left == 0:
+            self._queue(struct.pack(
+                "<I", DataExtractionStream.PREVIOUS_TRANSFER_ROUND_END) +
+                b"\0" * self._BYTES_PER_PACKET)
+
+    def _packet(self, seq_num, original=False):
+        """ Build a data packet: the first packet of the original\
+            transmission holds the size of the data in place of its\
+            sequence number, and a packet sent again is always whole, with\
+            whatever follows the data padding out the last
+        """
+        first_word = seq_num
+        if original and seq_num == 0:
+            first_word = len(self._data)
+        data = self._data[
+            seq_num * self._BYTES_PER_PACKET:self._packet_data_end(seq_num)]
+        if not original:
+            data += b"\xAA" * (self._BYTES_PER_PACKET - len(data))
+        return struct.pack("<I", first_word) + data
+
+    def _words_of(self, first_seq_num, stop_seq_num):
+        """ Get the data of some packets as words, one row per packet, with\
+            a short last packet padded with zeros
+        """
+        data = self._data[first_seq_num * self._BYTES_PER_PACKET:
+                          stop_seq_num * self._BYTES_PER_PACKET]
+        data += b"\0" * (-len(data) % self._BYTES_PER_PACKET)
+        return numpy.frombuffer(data, dtype="<u4").reshape(
+            -1, self._CHECKSUMS_PER_PACKET)
+
+    def _flagged_packet(self, flag, number, words):
+        """ Build a parity or checksum packet, or None if a word of it would\
+            look like the end flag to the packet gatherer
+        """
+        if numpy.any(words == DataExtractionStream.END_FLAG):
+            return None
+        return struct.pack("<I", flag | number) + words.astype(
+            "<u4").tobytes()
+
+    def _send_all(self, fec_group_size, packet_checksums):
+        last_seq_num = max(len(self._data) - 1, 0) // self._BYTES_PER_PACKET
+        for seq_num in range(last_seq_num + 1):
+            if seq_num == last_seq_num:
+                # the last block's checksums go before the last packet
+                block = seq_num // self._CHECKSUMS_PER_PACKET
+                if packet_checksums and seq_num > 0:
+                    self._queue_checksums(block, seq_num + 1)
+                self._queue(self._packet(seq_num, True) + struct.pack(
+                    "<I", DataExtractionStream.END_FLAG))
+                break
+            self._queue(self._packet(seq_num, True))
+
+            n_sent = seq_num + 1
+            if fec_group_size and n_sent % fec_group_size == 0:
+                parity = numpy.bitwise_xor.reduce(
+                    self._words_of(n_sent - fec_group_size, n_sent))
+                packet = self._flagged_packet(
+                    DataExtractionStream.PARITY_SEQ_NUM_FLAG,
+                    n_sent // fec_group_size - 1, parity)
+                if packet is not None:
+                    self._queue(packet)
+            if packet_checksums and n_sent % self._CHECKSUMS_PER_PACKET == 0:
+                self._queue_checksums(
+                    seq_num // self._CHECKSUMS_PER_PACKET, n_sent)
+
+    def _queue_checksums(self, block, stop_seq_num):
+        first_seq_num = block * self._CHECKSUMS_PER_PACKET
+        checksums = numpy.zeros(self._CHECKSUMS_PER_PACKET, dtype=numpy.uint32)
+        checksums[:stop_seq_num - first_seq_num] = numpy.dot(
+            self._words_of(first_seq_num, stop_seq_num).astype(numpy.uint64),
+            DataExtractionStream.CHECKSUM_WEIGHTS) & 0xFFFFFFFF
+        packet = self._flagged_packet(
+            DataExtractionStream.CHECKSUM_SEQ_NUM_FLAG, block, checksums)
+        if packet is not None:
+            self._queue(packet)
+
+    @staticmethod
+    def _expand_ranges(words):
+        for index in range(0, len(words) - 1, 2):
+            for seq_num in range(words[index], words[index] + words[
+                    index + 1]):
+                yield seq_num
+
+    def _start_request(self, n_packets):
+        self._requested = list()
+        self._n_request_packets_left = n_packets
+
+    def _add_requested(self, words, are_ranges):
+        if are_ranges:
+            self._requested.extend(self._expand_ranges(words))
+        else:
+            self._requested.extend(words)
+        self._n_request_packets_left -= 1
+        if self._n_request_packets_left == 0:
+            for seq_num in self._requested:
+                self._queue(self._packet(seq_num))
+            self._queue(struct.pack("<I", DataExtractionStream.END_FLAG))
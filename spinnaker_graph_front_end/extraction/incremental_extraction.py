@@ -0,0 +1,235 @@
+""" Extraction of only what has changed in regions read before: a copy of\
+    each region read is kept, and when it is read again, the reader core\
+    checksums the pages of the part already held, so that only the pages\
+    whose checksums differ, and anything added to the end of the region,\
+    need be sent.
+
+    The checksum of a page is the sum of its little-endian 32-bit words,\
+    each times one more than twice its index in the page, modulo 2 to the\
+    32, with the bytes past the end of the region taken as 0.  The weights\
+    being odd, any change to one word of a page changes its checksum.
+"""
+import numpy
+
+from .data_extraction import extract_data_pipelined
+from .data_extraction_stream import DataExtractionStream
+
+#: the size of page to checksum if not told otherwise
+DEFAULT_PAGE_SIZE = 4096
+
+_WORD = numpy.dtype("<u4")
+
+
+def page_checksums(data, page_size):
+    """ Checksum each page of data the way the reader core does
+
+    :param data: the data to checksum
+    :type data: bytes or bytearray or memoryview
+    :param page_size: the size of a page, a whole number of words
+    :type page_size: int
+    :return: the checksum of each page, the last of which may be short
+    :rtype: numpy.ndarray
+    """
+    words_per_page = page_size // _WORD.itemsize
+    n_bytes = len(data)
+    n_pages = -(-n_bytes // page_size)
+    words = numpy.zeros(n_pages * words_per_page, dtype=_WORD)
+    words.view(numpy.uint8)[:n_bytes] = numpy.frombuffer(
+        data, dtype=numpy.uint8, count=n_bytes)
+    weights = numpy.arange(1, 2 * words_per_page, 2, dtype=_WORD)
+    return (words.reshape(n_pages, words_per_page) * weights).sum(
+        axis=1, dtype=_WORD)
+
+
+class RegionCache(object):
+    """ The copy kept of each region read, and the checksums of its pages,\
+        so that the region can be read again by fetching only what has\
+        changed
+    """
+
+    __slots__ = [
+        # the size of the pages checksummed
+        "_page_size",
+
+        # the data and page checksums of each region, by\
+        # (x, y, p, region address)
+        "_regions"]
+
+    def __init__(self, page_size=DEFAULT_PAGE_SIZE):
+        """
+        :param page_size: the size of the pages to checksum, a whole number\
+            of words; smaller pages fetch less of a region that has changed\
+            a little, at the cost of more checksums to fetch
+        :type page_size: int
+        """
+        if page_size <= 0 or page_size % _WORD.itemsize:
+            raise Exception(
+                "A page must be a whole number of words, not {} "
+                "bytes".format(page_size))
+        self._page_size = page_size
+        self._regions = dict()
+
+    @property
+    def page_size(self):
+        """ The size of the pages checksummed
+
+        :rtype: int
+        """
+        return self._page_size
+
+    def __len__(self):
+        return len(self._regions)
+
+    def get(self, placement, region_address):
+        """ Get the copy kept of a region
+
+        :param placement: the placement of the reader core of the region
+        :type placement: pacman.model.placements.Placement
+        :param region_address: the SDRAM address of the region
+        :type region_address: int
+        :return: the data of the region and the checksums of its pages, or\
+            None if no copy is kept
+        :rtype: tuple(bytes, numpy.ndarray)
+        """
+        return self._regions.get(
+            (placement.x, placement.y, placement.p, region_address))
+
+    def store(self, placement, region_address, data):
+        """ Keep a copy of a region just read
+
+        :param placement: the placement of the reader core of the region
+        :type placement: pacman.model.placements.Placement
+        :param region_address: the SDRAM address of the region
+        :type region_address: int
+        :param data: the data of the region
+        :type data: bytes or bytearray
+        """
+        data = bytes(data)
+        self._regions[
+            placement.x, placement.y, placement.p, region_address] = (
+                data, page_checksums(data, self._page_size))
+
+    def forget(self, placement=None):
+        """ Stop keeping copies, such as when the cores are reloaded
+
+        :param placement: the placement of the reader core whose regions\
+            to forget, or None to forget all of them
+        :type placement: pacman.model.placements.Placement
+        """
+        if placement is None:
+            self._regions.clear()
+            return
+        core = (placement.x, placement.y, placement.p)
+        for key in [key for key in self._regions if key[:3] == core]:
+            del self._regions[key]
+
+
+def extract_data_incremental(
+        reads, cache, transport, new_timeouts, pacer, new_stream):
+    """ Extract regions from one reader core, fetching of each region read\
+        before only the pages that have changed since and anything added\
+        to its end, and keep the copies in the cache up to date
+
+    :param reads: the placement of the reader core, the SDRAM address and\
+        the size in bytes of each region, all from the same reader core
+    :type reads: list(tuple(pacman.model.placements.Placement, int, int))
+    :param cache: the copies of the regions read before
+    :type cache: RegionCache
+    :param transport: how to talk to the reader core
+    :type transport: AbstractTransport
+    :param new_timeouts: makes what decides how long to wait for data for\
+        each extraction before asking for missing data
+    :type new_timeouts: callable() -> ReceiveTimeoutEstimator
+    :param pacer: chooses the gap to leave between request packets so that\
+        the reader core does not drop them
+    :type pacer: NackPacer
+    :param new_stream: makes the extraction of a block of SDRAM, given the\
+        placement, address and size of the block, and if the checksums of\
+        its pages are to be extracted in place of it, the size of a page
+    :type new_stream: callable(pacman.model.placements.Placement, int, \
+        int, int) -> DataExtractionStream
+    :return: the data of each region, in the order given, and the records\
+        of how the extractions made to get it went
+    :rtype: list(tuple(bytearray, list(ExtractionTelemetry)))
+    """
+    telemetries = [list() for _ in reads]
+
+    # find which pages of the parts of the regions held have changed
+    cached = [cache.get(placement, region_address)
+              for placement, region_address, _ in reads]
+    n_held = [0 if copy is None else min(len(copy[0]), n_bytes)
+              for copy, (_, _, n_bytes) in zip(cached, reads)]
+    checks = [index for index, n_bytes in enumerate(n_held) if n_bytes]
+    changed = dict()
+    results = extract_data_pipelined(
+        [new_stream(reads[index][0], reads[index][1], n_held[index],
+                    cache.page_size)
+         for index in checks],
+        transport, new_timeouts, pacer)
+    for index, (output, telemetry) in zip(checks, results):
+        telemetries[index].append(telemetry)
+        checksums = numpy.frombuffer(bytes(output), dtype=_WORD)
+        changed[index] = checksums != cached[index][1][:len(checksums)]
+
+    # fetch the changed pages and the ends of the regions
+    spans = [_spans_to_fetch(
+        changed.get(index), n_held[index], n_bytes, cache.page_size)
+        for index, (_, _, n_bytes) in enumerate(reads)]
+    fetches = [(index, start, end) for index, region_spans in enumerate(spans)
+               for start, end in region_spans]
+    results = extract_data_pipelined(
+        [new_stream(reads[index][0], reads[index][1] + start, end - start,
+                    None)
+         for index, start, end in fetches],
+        transport, new_timeouts, pacer)
+
+    # patch what was fetched into the copies held
+    data = list()
+    for index, (_, _, n_bytes) in enumerate(reads):
+        region = bytearray(n_bytes)
+        if n_held[index]:
+            region[:n_held[index]] = cached[index][0][:n_held[index]]
+        data.append(region)
+    for (index, start, end), (output, telemetry) in zip(fetches, results):
+        telemetries[index].append(telemetry)
+        data[index][start:end] = bytes(output[:end - start])
+    for (placement, region_address, _), region in zip(reads, data):
+        cache.store(placement, region_address, region)
+    return list(zip(data, telemetries))
+
+
+def _spans_to_fetch(changed, n_held, n_bytes, page_size):
+    """ Get the parts of a region to fetch, joining neighbouring changed\
+        pages into one part
+
+    :param changed: whether each page held has changed, or None if none\
+        of the region is held
+    :type changed: numpy.ndarray or None
+    :param n_held: how much of the region is held
+    :type n_held: int
+    :param n_bytes: the size of the region
+    :type n_bytes: int
+    :param page_size: the size of a page
+    :type page_size: int
+    :return: the start and end of each part to fetch
+    :rtype: list(list(int, int))
+    """
+    spans = list()
+    if changed is not None:
+        for page in numpy.flatnonzero(changed).tolist():
+            start = page * page_size
+            end = min(start + page_size, n_held)
+            if spans and spans[-1][1] == start:
+                spans[-1][1] = end
+            else:
+                spans.append([start, end])
+
+    # anything added to the end, from the start of the word the part held
+    # ends in, as the reader core sends whole words
+    if n_held < n_bytes:
+        tail = n_held - n_held % DataExtractionStream.WORD_TO_BYTE_CONVERTER
+        if spans and spans[-1][1] >= tail:
+            spans[-1][1] = n_bytes
+        else:
+            spans.append([tail, n_bytes])
+    return spans
@@ -0,0 +1,278 @@
+import heapq
+import itertools
+import random
+import socket
+import threading
+
+from .clock import monotonic
+from .in_memory_transport import InMemoryTransport
+
+
+class LocalBoard(object):
+    """ A stand-in for a board whose reader cores send their data to the\
+        host as UDP over localhost, through a link that can be made as slow\
+        and as lossy as a real one, so that the host side of the protocol,\
+        with its real sockets and threads, can be benchmarked and fuzzed\
+        without a board.
+
+        It takes the place of the transceiver: requests sent to it with\
+        :py:meth:`send_sdp_message` are answered by the reader core they\
+        are addressed to, the way the reader core does, and what it sends\
+        back crosses the link to the socket the IP tag would send to.  The\
+        link has a bandwidth and a latency, and loses packets both at\
+        random and in bursts, the bursts following a Gilbert-Elliott model\
+        of a link that is now and then bad for a while.  Some packets can\
+        also be held back so that they arrive out of order.  Requests cross\
+        the link too, and can also be lost.
+
+        All the randomness comes from one seeded generator, so a seed gives\
+        the same losses each time, as long as the host asks for the same\
+        things in the same order.
+    """
+
+    __slots__ = [
+        # where the data is sent to
+        "_address",
+
+        # the socket the data is sent from
+        "_socket",
+
+        # the stand-ins for the reader cores, by (x, y, p)
+        "_readers",
+
+        # the bits per second the link carries, or None for no limit
+        "_bandwidth",
+
+        # the seconds it takes a packet to cross the link
+        "_latency",
+
+        # the chance of each packet being lost on its own
+        "_loss",
+
+        # the chance of each packet starting a burst of losses
+        "_burst_loss",
+
+        # the chance of each packet in a burst ending the burst
+        "_burst_end",
+
+        # the chance of each packet being held back
+        "_reorder",
+
+        # the seconds a packet held back is held back for
+        "_reorder_delay",
+
+        # the chance of each request being lost
+        "_request_loss",
+
+        # where the losses and delays come from
+        "_rng",
+
+        # True while the link is in a burst of losses
+        "_in_burst",
+
+        # when the link will have finished sending what it has been given
+        "_link_free_time",
+
+        # what is crossing the link, as a heap of (time, order, reader,\
+        # request or packet); a request has a reader and a packet does not
+        "_in_flight",
+
+        # keeps the order of things that cross the link at the same time
+        "_order",
+
+        # guards the things crossing the link and wakes the sender
+        "_condition",
+
+        # the thread that moves things across the link
+        "_thread",
+
+        # True once the board has been closed
+        "_closed",
+
+        # how many packets have been sent to the host
+        "_n_packets_sent",
+
+        # how many packets were lost on the link
+        "_n_packets_lost",
+
+        # how many requests were lost on the link
+        "_n_requests_lost"]
+
+    def __init__(
+            self, port, host="127.0.0.1", bandwidth=None, latency=0.0,
+            loss=0.0, burst_loss=0.0, burst_length=1.0, reorder=0.0,
+            reorder_delay=0.001, request_loss=0.0, seed=None):
+        """
+        :param port: the port of the socket the data is sent to
+        :type port: int
+        :param host: the address of the socket the data is sent to
+        :type host: str
+        :param bandwidth: the bits per second the link carries, or None for\
+            as fast as the host can take them
+        :type bandwidth: float
+        :param latency: the seconds it takes anything to cross the link
+        :type latency: float
+        :param loss: the chance of each packet being lost on its own
+        :type loss: float
+        :param burst_loss: the chance of each packet starting a burst of\
+            losses
+        :type burst_loss: float
+        :param burst_length: how many packets a burst of losses loses on\
+            average
+        :type burst_length: float
+        :param reorder: the chance of each packet being held back so that\
+            it arrives after packets sent later
+        :type reorder: float
+        :param reorder_delay: the seconds a packet is held back for
+        :type reorder_delay: float
+        :param request_loss: the chance of each request being lost; the\
+            host cannot get back a lost start command, so leave this at 0\
+            unless the extraction is meant to fail
+        :type request_loss: float
+        :param seed: the seed of the losses and delays, or None for a\
+            different one each time
+        :type seed: int
+        """
+        self._address = (host, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._readers = dict()
+        self._bandwidth = bandwidth
+        self._latency = latency
+        self._loss = loss
+        self._burst_loss = burst_loss
+        self._burst_end = 1.0 / max(burst_length, 1.0)
+        self._reorder = reorder
+        self._reorder_delay = reorder_delay
+        self._request_loss = request_loss
+        self._rng = random.Random(seed)
+        self._in_burst = False
+        self._link_free_time = 0.0
+        self._in_flight = list()
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._n_packets_sent = 0
+        self._n_packets_lost = 0
+        self._n_requests_lost = 0
+        self._thread = threading.Thread(
+            target=self._run, name="LocalBoard link")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add_reader(self, placement, data, gatherer_placement=None):
+        """ Put a reader core on the board
+
+        :param placement: where the reader core is
+        :type placement: pacman.model.placements.Placement
+        :param data: the data the reader core holds
+        :type data: bytes
+        :param gatherer_placement: if given, the packets keep an SDP header\
+            from a packet gatherer here, as they do when multiplexed
+        :type gatherer_placement: pacman.model.placements.Placement
+        """
+        self._readers[placement.x, placement.y, placement.p] = \
+            InMemoryTransport(data, gatherer_placement=gatherer_placement)
+
+    def send_sdp_message(self, message):
+        """ Send a request to the reader core it is addressed to
+
+        :param message: the request
+        :type message: SDPMessage
+        """
+        header = message.sdp_header
+        reader = self._readers[
+            header.destination_chip_x, header.destination_chip_y,
+            header.destination_cpu]
+        with self._condition:
+            if self._rng.random() < self._request_loss:
+                self._n_requests_lost += 1
+                return
+            heapq.heappush(self._in_flight, (
+                monotonic() + self._latency, next(self._order), reader,
+                message))
+            self._condition.notify()
+
+    def close(self):
+        """ Stop the link, throwing away anything still crossing it
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self._socket.close()
+
+    @property
+    def n_packets_sent(self):
+        """ How many packets have been sent to the host
+
+        :rtype: int
+        """
+        return self._n_packets_sent
+
+    @property
+    def n_packets_lost(self):
+        """ How many packets were lost on the link
+
+        :rtype: int
+        """
+        return self._n_packets_lost
+
+    @property
+    def n_requests_lost(self):
+        """ How many requests were lost on the link
+
+        :rtype: int
+        """
+        return self._n_requests_lost
+
+    def _is_lost(self):
+        """ Decide whether the next packet is lost on the link
+        """
+        if self._in_burst:
+            if self._rng.random() < self._burst_end:
+                self._in_burst = False
+            return True
+        if self._rng.random() < self._burst_loss:
+            self._in_burst = True
+            return True
+        return self._rng.random() < self._loss
+
+    def _answer(self, reader, message, now):
+        """ Hand a request to its reader core, and put what it sends back\
+            onto the link
+        """
+        reader.send(message)
+        send_time = max(now, self._link_free_time)
+        packet = reader.receive(0)
+        while packet is not None:
+            # a packet uses up the link whether or not it gets across
+            if self._bandwidth:
+                send_time += len(packet) * 8.0 / self._bandwidth
+            if self._is_lost():
+                self._n_packets_lost += 1
+            else:
+                arrival_time = send_time + self._latency
+                if self._rng.random() < self._reorder:
+                    arrival_time += self._reorder_delay
+                heapq.heappush(self._in_flight, (
+                    arrival_time, next(self._order), None, packet))
+            packet = reader.receive(0)
+        self._link_free_time = send_time
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if not self._in_flight:
+                    self._condition.wait()
+                    continue
+                now = monotonic()
+                due_time, _, reader, item = self._in_flight[0]
+                if due_time > now:
+                    self._condition.wait(due_time - now)
+                    continue
+                heapq.heappop(self._in_flight)
+                if reader is not None:
+                    self._answer(reader, item, now)
+                else:
+                    self._socket.sendto(item, self._address)
+                    self._n_packets_sent += 1
@@ -0,0 +1,155 @@
+""" Benchmarks the host side of the protocol against a stand-in board over\
+    localhost, through a link as slow and as lossy as asked for, and\
+    reports how each extraction went.
+
+    Usage: ``python -m spinnaker_graph_front_end.extraction.\
+local_board_benchmark [--n-bytes N] [--loss P] [--burst-loss P] ...``
+"""
+import argparse
+
+import numpy
+from pacman.model.placements import Placement
+
+from .data_extraction import extract_data
+from .data_extraction_stream import DataExtractionStream
+from .local_board import LocalBoard
+from .nack_pacer import NackPacer
+from .receive_timeout_estimator import ReceiveTimeoutEstimator
+from .udp_connection_pool import UDPConnectionPool
+from .udp_sdp_transport import UDPSDPTransport
+
+
+def benchmark_extraction(
+        data, connection, fec_group_size=0, packet_checksums=False,
+        range_requests=True, streaming_repair=False, compression=False,
+        receive_timeout_floor=0.02, receive_timeout_ceiling=1.0, **link):
+    """ Extract some data from a reader core on a stand-in board, over a\
+        real socket
+
+    :param data: the data the reader core holds
+    :type data: bytes
+    :param connection: the socket to receive the data on
+    :type connection: UDPPacketIngest
+    :param fec_group_size: how many data packets share a parity packet, or\
+        0 for none
+    :type fec_group_size: int
+    :param packet_checksums: whether the reader core sends checksums
+    :type packet_checksums: bool
+    :param range_requests: whether to ask for missing data as ranges
+    :type range_requests: bool
+    :param streaming_repair: whether to ask for missing data before the\
+        first pass ends
+    :type streaming_repair: bool
+    :param compression: whether the reader core compresses the data\
+        before sending it
+    :type compression: bool
+    :param receive_timeout_floor: the shortest time to wait for data, in\
+        seconds
+    :type receive_timeout_floor: float
+    :param receive_timeout_ceiling: the longest time to wait for data, in\
+        seconds
+    :type receive_timeout_ceiling: float
+    :param link: how to set up the link, as for :py:class:`LocalBoard`
+    :return: the data extracted, the record of how it went, and the board
+    :rtype: tuple(bytearray, ExtractionTelemetry, LocalBoard)
+    """
+    reader = Placement(None, 0, 0, 1)
+    board = LocalBoard(connection.local_port, **link)
+    board.add_reader(reader, data)
+    stream = DataExtractionStream(
+        reader, streaming_repair=streaming_repair,
+        fec_group_size=fec_group_size, packet_checksums=packet_checksums,
+        range_requests=range_requests, n_bytes=len(data),
+        region_address=0 if compression else None, compression=compression)
+    transport = UDPSDPTransport(board, connection)
+    try:
+        output, telemetry = extract_data(
+            stream, transport, ReceiveTimeoutEstimator(
+                receive_timeout_floor, receive_timeout_ceiling), NackPacer())
+    finally:
+        transport.close()
+        board.close()
+    return output, telemetry, board
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark data extraction against a stand-in board "
+                    "over localhost")
+    parser.add_argument(
+        "--n-bytes", type=int, default=10000000,
+        help="how much data to extract")
+    parser.add_argument(
+        "--runs", type=int, default=1, help="how many extractions to run")
+    parser.add_argument(
+        "--bandwidth", type=float, default=None,
+        help="the bits per second the link carries")
+    parser.add_argument(
+        "--latency", type=float, default=0.0,
+        help="the seconds it takes to cross the link")
+    parser.add_argument(
+        "--loss", type=float, default=0.0,
+        help="the chance of each packet being lost on its own")
+    parser.add_argument(
+        "--burst-loss", type=float, default=0.0,
+        help="the chance of each packet starting a burst of losses")
+    parser.add_argument(
+        "--burst-length", type=float, default=1.0,
+        help="how many packets a burst of losses loses on average")
+    parser.add_argument(
+        "--reorder", type=float, default=0.0,
+        help="the chance of each packet arriving late")
+    parser.add_argument(
+        "--reorder-delay", type=float, default=0.001,
+        help="the seconds a late packet is late by")
+    parser.add_argument(
+        "--fec-group-size", type=int, default=0,
+        help="how many data packets share a parity packet")
+    parser.add_argument(
+        "--packet-checksums", action="store_true",
+        help="have the reader core send checksums")
+    parser.add_argument(
+        "--streaming-repair", action="store_true",
+        help="ask for missing data before the first pass ends")
+    parser.add_argument(
+        "--compression", action="store_true",
+        help="have the reader core compress the data")
+    parser.add_argument(
+        "--ramp", action="store_true",
+        help="extract a ramp of words rather than random bytes, as the "
+             "test pattern of the SDRAM writer is")
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="the seed of the first run; each later run adds one")
+    args = parser.parse_args(args)
+
+    pool = UDPConnectionPool("127.0.0.1")
+    for run in range(args.runs):
+        seed = None if args.seed is None else args.seed + run
+        if args.ramp:
+            data = numpy.arange(
+                -(-args.n_bytes // 4), dtype="<u4").tobytes()[:args.n_bytes]
+        else:
+            data = numpy.random.RandomState(seed).bytes(args.n_bytes)
+        output, telemetry, board = benchmark_extraction(
+            data, pool.connection("benchmark"),
+            fec_group_size=args.fec_group_size,
+            packet_checksums=args.packet_checksums,
+            streaming_repair=args.streaming_repair,
+            compression=args.compression, bandwidth=args.bandwidth,
+            latency=args.latency,
+            loss=args.loss, burst_loss=args.burst_loss,
+            burst_length=args.burst_length, reorder=args.reorder,
+            reorder_delay=args.reorder_delay, seed=seed)
+        if bytes(output) != data:
+            raise Exception(
+                "run {} with seed {} extracted the wrong data".format(
+                    run, seed))
+        print("run {}: {:.1f} Mb/s, {} packets lost on the link, {}".format(
+            run, telemetry.megabits_per_second or 0.0,
+            board.n_packets_lost, telemetry.to_json()))
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+
+import numpy
+
+from .abstract_output_sink import AbstractOutputSink
+
+
+class MemoryMappedOutputSink(AbstractOutputSink):
+    """ An output sink that writes the extracted data straight into a\
+        memory-mapped file, so that extractions larger than host memory\
+        can be made and the data lands on disk without an extra copy.
+
+        The result of the extraction is a :py:class:`numpy.memmap` of\
+        bytes over the file; call its ``flush`` method to make sure\
+        everything has been written back to disk.
+
+        An unfinished extraction can leave a checkpoint in a second file\
+        beside the first, which records which sequence numbers had been\
+        written, so that a later extraction can ask for only the rest.
+    """
+
+    __slots__ = [
+        # the path of the file to write to
+        "_filename"]
+
+    #: added to the path of the file to get the path of the checkpoint
+    CHECKPOINT_SUFFIX = ".checkpoint"
+
+    def __init__(self, filename):
+        """
+        :param filename: \
+            the path of the file to write to; it is created or overwritten
+        :type filename: str
+        """
+        self._filename = filename
+
+    @property
+    def filename(self):
+        """ The path of the file written to
+
+        :rtype: str
+        """
+        return self._filename
+
+    def allocate(self, n_bytes):
+        return numpy.memmap(
+            self._filename, dtype=numpy.uint8, mode="w+", shape=(n_bytes,))
+
+    @property
+    def checkpoint_filename(self):
+        """ The path of the file the checkpoint is kept in
+
+        :rtype: str
+        """
+        return self._filename + self.CHECKPOINT_SUFFIX
+
+    def save_checkpoint(self, output, received):
+        # the data must be on disk before the flags that say it is there
+        output.flush()
+        temp_filename = self.checkpoint_filename + ".tmp"
+        with open(temp_filename, "wb") as f:
+            numpy.save(f, received)
+
+        # os.replace is only on Python 3, but rename replaces too on POSIX
+        getattr(os, "replace", os.rename)(
+            temp_filename, self.checkpoint_filename)
+
+    def load_checkpoint(self):
+        if not (os.path.exists(self._filename) and
+                os.path.exists(self.checkpoint_filename)):
+            return None
+        with open(self.checkpoint_filename, "rb") as f:
+            received = numpy.load(f)
+        return numpy.memmap(
+            self._filename, dtype=numpy.uint8, mode="r+"), received
+
+    def remove_checkpoint(self):
+        if os.path.exists(self.checkpoint_filename):
+            os.remove(self.checkpoint_filename)
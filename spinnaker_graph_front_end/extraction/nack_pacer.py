@@ -0,0 +1,91 @@
+class NackPacer(object):
+    """ Chooses the gap to leave between the packets of a request for\
+        retransmission, so that requests go out as fast as the reader core\
+        can take them in.
+
+        The reader core only starts retransmitting once it has every packet\
+        of a request, so the first data to arrive after a request shows\
+        that none of its packets were dropped, and the gap is shrunk.  If\
+        the receive times out instead, a packet of the request was\
+        probably dropped and the gap is grown again.  Keep one pacer per\
+        board so that each extraction starts from the gap learned by the\
+        last.
+    """
+
+    __slots__ = [
+        # the current gap between packets
+        "_interval",
+
+        # the smallest gap to use
+        "_min_interval",
+
+        # the largest gap to use
+        "_max_interval",
+
+        # True while a multi-packet request is waiting for data to arrive
+        "_awaiting_response"]
+
+    #: the gap to start with, as used before the gap was adaptive
+    DEFAULT_INITIAL_INTERVAL_IN_SECONDS = 0.01
+
+    #: the smallest gap to shrink to
+    DEFAULT_MIN_INTERVAL_IN_SECONDS = 0.00005
+
+    #: the largest gap to grow to
+    DEFAULT_MAX_INTERVAL_IN_SECONDS = 0.1
+
+    #: what the gap is multiplied by when a request gets through
+    SPEED_UP_FACTOR = 0.5
+
+    #: what the gap is multiplied by when a request seems to be lost
+    BACK_OFF_FACTOR = 4.0
+
+    def __init__(
+            self, initial_interval=DEFAULT_INITIAL_INTERVAL_IN_SECONDS,
+            min_interval=DEFAULT_MIN_INTERVAL_IN_SECONDS,
+            max_interval=DEFAULT_MAX_INTERVAL_IN_SECONDS):
+        """
+        :param initial_interval: the gap to start with, in seconds
+        :type initial_interval: float
+        :param min_interval: the smallest gap to use, in seconds
+        :type min_interval: float
+        :param max_interval: the largest gap to use, in seconds
+        :type max_interval: float
+        """
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._interval = min(max(initial_interval, min_interval), max_interval)
+        self._awaiting_response = False
+
+    @property
+    def interval(self):
+        """ The gap to leave between packets of a request, in seconds
+
+        :rtype: float
+        """
+        return self._interval
+
+    def request_sent(self, n_packets):
+        """ Note that a request for retransmission has been sent
+
+        :param n_packets: the number of packets in the request
+        :type n_packets: int
+        """
+        # a single packet says nothing about the gap between packets
+        self._awaiting_response = n_packets > 1
+
+    def data_received(self):
+        """ Note that data has arrived from the reader core
+        """
+        if self._awaiting_response:
+            self._awaiting_response = False
+            self._interval = max(
+                self._interval * self.SPEED_UP_FACTOR, self._min_interval)
+
+    def timed_out(self):
+        """ Note that nothing arrived from the reader core in time
+        """
+        if self._awaiting_response:
+            self._awaiting_response = False
+            self._interval = min(
+                self._interval * self.BACK_OFF_FACTOR, self._max_interval)
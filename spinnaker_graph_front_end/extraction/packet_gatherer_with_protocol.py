@@ -0,0 +1,602 @@
+import contextlib
+from enum import Enum
+import itertools
+import os
+
+from pacman.model.graphs.machine import MachineVertex
+from pacman.model.resources import ResourceContainer, SDRAMResource, \
+    IPtagResource
+from spinn_front_end_common.abstract_models import AbstractHasAssociatedBinary
+from spinn_front_end_common.abstract_models.impl import \
+    MachineDataSpecableVertex
+from spinn_front_end_common.utilities.utility_objs import ExecutableType
+from spinn_front_end_common.utilities import constants, globals_variables
+from spinn_front_end_common.utilities.helpful_functions import read_config
+from spinn_front_end_common.interface.simulation import simulation_utilities
+from .abstract_provides_extraction_size import \
+    AbstractProvidesExtractionSize
+from .capturing_transport import CapturingTransport
+from .data_extraction import extract_data_chunks, \
+    extract_data_multiplexed, extract_data_pipelined
+from .data_extraction_stream import DataExtractionStream
+from .extraction_telemetry import ExtractionTelemetry
+from .incremental_extraction import RegionCache, extract_data_incremental
+from .nack_pacer import NackPacer
+from .packet_trace import PacketTraceWriter
+from .receive_timeout_estimator import ReceiveTimeoutEstimator
+from .router_timeout_tuner import RouterTimeoutTuner
+from .udp_connection_pool import default_connection_pool
+from .udp_sdp_transport import UDPSDPTransport
+
+
+class PacketGathererWithProtocol(
+        MachineVertex, MachineDataSpecableVertex, AbstractHasAssociatedBinary):
+    DATA_REGIONS = Enum(
+        value="DATA_REGIONS",
+        names=[('SYSTEM', 0),
+               ('CONFIG', 1)])
+    SDRAM_READING_SIZE_IN_BYTES_CONVERTER = 1024 * 1024
+    CONFIG_SIZE = 12
+
+    #: numbers the traces written in this process
+    _TRACE_NUMBERS = itertools.count()
+
+    #: what multiplexed gatherers share their socket under in the pool
+    MULTIPLEXED_CONNECTION_KEY = "multiplexed packet gatherers"
+
+    #: the router timeout, as (mantissa, exponent), put back once data has\
+    #: been extracted
+    ROUTER_TIMEOUT_AFTER_EXTRACTION = (15, 4)
+
+    def __init__(
+            self, extended_protocol=True, connection_pool=None,
+            multiplexed=False):
+        """
+        :param extended_protocol: whether the reader cores understand the\
+            extensions to the protocol: requests for ranges of sequence\
+            numbers, reports of gaps while sending, parity and checksum\
+            packets, compression and page checksums; if not, none of them\
+            are used
+        :type extended_protocol: bool
+        :param connection_pool: where to get the socket to receive on, or\
+            None for the pool shared by the whole process
+        :type connection_pool: UDPConnectionPool
+        :param multiplexed: whether to share one socket with the other\
+            multiplexed gatherers, so that many extractions can be run at\
+            once with :py:meth:`get_data_multiplexed`
+        :type multiplexed: bool
+        """
+        super(PacketGathererWithProtocol, self).__init__(
+            label="pg", constraints=None)
+        self._extended_protocol = extended_protocol
+        self._connection_pool = (
+            default_connection_pool() if connection_pool is None
+            else connection_pool)
+        self._multiplexed = multiplexed
+        self._connection_key = (
+            self.MULTIPLEXED_CONNECTION_KEY if multiplexed else self)
+
+        # paces retransmission requests to this board across extractions
+        self._nack_pacer = NackPacer()
+
+        config = globals_variables.get_simulator().config
+        self._receive_timeout_floor = config.getfloat(
+            "DataExtraction", "receive_timeout_floor")
+        self._receive_timeout_ceiling = config.getfloat(
+            "DataExtraction", "receive_timeout_ceiling")
+        self._streaming_repair = extended_protocol and config.getboolean(
+            "DataExtraction", "streaming_repair")
+        self._fec_group_size = config.getint(
+            "DataExtraction", "fec_group_size") if extended_protocol else 0
+        self._packet_checksums = extended_protocol and config.getboolean(
+            "DataExtraction", "packet_checksums")
+        self._compression = extended_protocol and config.getboolean(
+            "DataExtraction", "compression")
+
+        # the copies of the regions read with get_data_incremental
+        self._region_cache = RegionCache(config.getint(
+            "DataExtraction", "incremental_page_size"))
+        self._checkpoint_interval = config.getfloat(
+            "DataExtraction", "checkpoint_interval")
+        self._capture_directory = read_config(
+            config, "DataExtraction", "capture_directory")
+        self._tune_router_timeouts = config.getboolean(
+            "DataExtraction", "tune_router_timeouts")
+        self._router_timeout_file = read_config(
+            config, "DataExtraction", "router_timeout_file")
+        if self._router_timeout_file is not None:
+            self._router_timeout_file = os.path.expanduser(
+                self._router_timeout_file)
+
+        # chooses the router timeout for this board, once the board is known
+        self._router_timeout_tuner = None
+
+    @property
+    def resources_required(self):
+        return ResourceContainer(
+            sdram=SDRAMResource(
+                constants.SYSTEM_BYTES_REQUIREMENT + self.CONFIG_SIZE),
+            iptags=[IPtagResource(
+                port=self.local_port, strip_sdp=not self._multiplexed,
+                ip_address="localhost")])
+
+    @property
+    def multiplexed(self):
+        """ Whether this gatherer shares one socket with the other\
+            multiplexed gatherers
+
+        :rtype: bool
+        """
+        return self._multiplexed
+
+    @property
+    def local_port(self):
+        """ The port the data is received on, which the IP tag sends to
+
+        :rtype: int
+        """
+        return self._connection_pool.port_for(self._connection_key)
+
+    def _connection(self):
+        return self._connection_pool.connection(self._connection_key)
+
+    def release_connection(self):
+        """ Close the socket the data is received on, once this gatherer\
+            is no longer needed; for a multiplexed gatherer, this is the\
+            socket shared with the others
+        """
+        self._connection_pool.release(self._connection_key)
+
+    def get_binary_start_type(self):
+        return ExecutableType.USES_SIMULATION_INTERFACE
+
+    def generate_machine_data_specification(
+            self, spec, placement, machine_graph, routing_info, iptags,
+            reverse_iptags, machine_time_step, time_scale_factor):
+        # Setup words + 1 for flags + 1 for recording size
+        setup_size = constants.SYSTEM_BYTES_REQUIREMENT
+
+        # Create the data regions for hello world
+        self._reserve_memory_regions(spec, setup_size)
+
+        # write data for the simulation data item
+        spec.switch_write_focus(self.DATA_REGIONS.SYSTEM.value)
+        spec.write_array(simulation_utilities.get_simulation_header_array(
+            self.get_binary_file_name(), machine_time_step,
+            time_scale_factor))
+        spec.switch_write_focus(self.DATA_REGIONS.CONFIG.value)
+        base_key = routing_info.get_first_key_for_edge(
+            list(machine_graph.get_edges_ending_at_vertex(self))[0])
+        spec.write_value(base_key + 1)
+        spec.write_value(base_key + 2)
+        spec.write_value(iptags[0].tag)
+
+        # End-of-Spec:
+        spec.end_specification()
+
+    def _reserve_memory_regions(self, spec, system_size):
+        spec.reserve_memory_region(
+            region=self.DATA_REGIONS.SYSTEM.value, size=system_size,
+            label='systemInfo')
+        spec.reserve_memory_region(
+            region=self.DATA_REGIONS.CONFIG.value,
+            size=self.CONFIG_SIZE,
+            label="config")
+
+    def get_binary_file_name(self):
+        return "packet_gatherer.aplx"
+
+    def get_data(
+            self, transceiver, placement, extra_monitor_vertices, placements,
+            sink=None, resume=False):
+        """ Extract the data from a reader core
+
+        :param transceiver: the transceiver to send requests with
+        :param placement: the placement of the reader core
+        :param extra_monitor_vertices: the extra monitors on the machine
+        :param placements: the placements of the graph
+        :param sink: where to store the output, or None to keep it in memory
+        :type sink: \
+            :py:class:`spinnaker_graph_front_end.extraction.AbstractOutputSink`
+        :param resume: \
+            whether to carry on from the checkpoint an earlier extraction\
+            from the same reader core into the same sink left when it did\
+            not finish, asking only for what it did not receive
+        :type resume: bool
+        :return: the data and the record of how the extraction went
+        :rtype: tuple(bytearray, \
+            :py:class:`spinnaker_graph_front_end.extraction.ExtractionTelemetry`)
+        """
+        stream = self.new_stream(placement, sink)
+        telemetry = ExtractionTelemetry(stream)
+        for _ in self._extract(
+                stream, transceiver, extra_monitor_vertices, placements,
+                resume, telemetry):
+            pass
+        return stream.output, telemetry
+
+    def get_data_chunks(
+            self, transceiver, placement, extra_monitor_vertices, placements,
+            sink=None, resume=False):
+        """ Extract the data from a reader core, handing it out in pieces\
+            as soon as everything before each piece has arrived, so that\
+            processing can overlap with the transfer.
+
+            The views handed out are onto the whole output, which stays\
+            allocated until the extraction ends.
+
+        :param transceiver: the transceiver to send requests with
+        :param placement: the placement of the reader core
+        :param extra_monitor_vertices: the extra monitors on the machine
+        :param placements: the placements of the graph
+        :param sink: where to store the output, or None to keep it in memory
+        :type sink: \
+            :py:class:`spinnaker_graph_front_end.extraction.AbstractOutputSink`
+        :param resume: whether to carry on from the checkpoint an earlier\
+            extraction left, as for :py:meth:`get_data`
+        :type resume: bool
+        :return: an iterable of the offset of each piece and a view of it,\
+            in ascending order of offset
+        :rtype: iterable(tuple(int, memoryview))
+        """
+        return self._extract(
+            self.new_stream(placement, sink), transceiver,
+            extra_monitor_vertices, placements, resume)
+
+    def _trace_filename(self, stream):
+        return os.path.join(
+            self._capture_directory, "extraction_{}_{}_{}_{}_{}.trace".format(
+                stream.placement.x, stream.placement.y, stream.placement.p,
+                os.getpid(), next(self._TRACE_NUMBERS)))
+
+    def get_router_timeout_tuner(self, placements):
+        """ Get what chooses the router timeout to set on the board of this\
+            gatherer while extracting, made on first use for the board
+
+        :param placements: the placements of the graph
+        :return: the tuner, or None if the timeout is not tuned
+        :rtype: RouterTimeoutTuner
+        """
+        if self._tune_router_timeouts and self._router_timeout_tuner is None:
+            self._router_timeout_tuner = RouterTimeoutTuner(
+                self._board_name(placements), self._router_timeout_file)
+        return self._router_timeout_tuner
+
+    def _board_name(self, placements):
+        # what is learned is kept under the address of the board, which
+        # stays the same from one run to the next
+        placement = placements.get_placement_of_vertex(self)
+        machine = globals_variables.get_simulator().machine
+        chip = machine.get_chip_at(placement.x, placement.y)
+        ethernet = machine.get_chip_at(
+            chip.nearest_ethernet_x, chip.nearest_ethernet_y)
+        if ethernet.ip_address is not None:
+            return ethernet.ip_address
+        return "{},{}".format(ethernet.x, ethernet.y)
+
+    @contextlib.contextmanager
+    def _router_timeouts_set(
+            self, transceiver, extra_monitor_vertices, placements):
+        """ Set the router timeout to extract with for the duration, put it\
+            back after, and have the tuner learn from the extractions
+
+        :return: a list to add the records of the extractions to, for the\
+            tuner to learn from if they all finish
+        :rtype: list(ExtractionTelemetry)
+        """
+        tuner = self.get_router_timeout_tuner(placements)
+        mantissa, exponent = (
+            RouterTimeoutTuner.DEFAULT_TIMEOUT if tuner is None
+            else tuner.timeout)
+        extra_monitor_vertices[0].set_router_time_outs(
+            mantissa, exponent, transceiver, placements,
+            extra_monitor_vertices)
+        telemetries = list()
+        try:
+            yield telemetries
+        except Exception:
+            if tuner is not None:
+                tuner.failed()
+            raise
+        finally:
+            mantissa, exponent = self.ROUTER_TIMEOUT_AFTER_EXTRACTION
+            extra_monitor_vertices[0].set_router_time_outs(
+                mantissa, exponent, transceiver, placements,
+                extra_monitor_vertices)
+        if tuner is not None:
+            tuner.record(telemetries)
+
+    def _check_not_multiplexed(self):
+        if self._multiplexed:
+            raise Exception(
+                "The packets of a multiplexed packet gatherer keep their SDP "
+                "headers; use get_data_multiplexed to extract through it")
+
+    def _extract(
+            self, stream, transceiver, extra_monitor_vertices, placements,
+            resume, telemetry=None):
+        self._check_not_multiplexed()
+
+        # just ask for what is missing if carrying on
+        messages = stream.resume() if resume else None
+        if telemetry is None:
+            telemetry = ExtractionTelemetry(stream)
+
+        with self._router_timeouts_set(
+                transceiver, extra_monitor_vertices,
+                placements) as telemetries:
+            # receive on the socket bound when the IP tag was asked for
+            transport = UDPSDPTransport(transceiver, self._connection())
+
+            # only a whole extraction can be replayed
+            if self._capture_directory is not None and messages is None:
+                transport = CapturingTransport(
+                    transport, PacketTraceWriter(
+                        self._trace_filename(stream), stream))
+            try:
+                for chunk in extract_data_chunks(
+                        stream, transport, self._receive_timeout_estimator(),
+                        self._nack_pacer, messages, self._checkpoint_interval,
+                        telemetry):
+                    yield chunk
+            finally:
+                transport.close()
+
+            # a carried on extraction only asks for a little of the data,
+            # so says little about the timeout
+            if messages is None:
+                telemetries.append(telemetry)
+
+    def get_data_pipelined(
+            self, transceiver, reads, extra_monitor_vertices, placements):
+        """ Extract many regions back to back, each reader core starting\
+            on its next region as soon as it has sent the one before once,\
+            so that the repair of each region overlaps the first pass of the\
+            next rather than leaving the link idle while gaps are filled.
+
+        :param transceiver: the transceiver to send requests with
+        :param reads: the placement of the reader core, the SDRAM address\
+            and the size in bytes of each region; runs of regions from the\
+            same reader core are pipelined, apart from compressed regions
+        :type reads: list(tuple(pacman.model.placements.Placement, int, int))
+        :param extra_monitor_vertices: the extra monitors on the machine
+        :param placements: the placements of the graph
+        :return: the data and the record of how the extraction went of\
+            each region, in the order given
+        :rtype: list(tuple(bytearray, ExtractionTelemetry))
+        """
+        self._check_not_multiplexed()
+
+        # only the regions of one reader core can be told apart
+        runs = list()
+        for placement, region_address, n_bytes in reads:
+            stream = self.new_stream(
+                placement, None, region_address, n_bytes)
+            core = (placement.x, placement.y, placement.p)
+            if runs and runs[-1][0] == core:
+                runs[-1][1].append(stream)
+            else:
+                runs.append((core, [stream]))
+
+        results = list()
+        with self._router_timeouts_set(
+                transceiver, extra_monitor_vertices,
+                placements) as telemetries:
+            transport = UDPSDPTransport(transceiver, self._connection())
+            try:
+                for _, streams in runs:
+                    results.extend(extract_data_pipelined(
+                        streams, transport, self._receive_timeout_estimator,
+                        self._nack_pacer))
+            finally:
+                transport.close()
+            telemetries.extend(telemetry for _, telemetry in results)
+        return results
+
+    def get_data_incremental(
+            self, transceiver, reads, extra_monitor_vertices, placements):
+        """ Extract many regions, fetching of each region read this way\
+            before only the pages that have changed since it was last read,\
+            and anything added to its end, as found by comparing checksums\
+            of the pages made by the reader core with those of the copy\
+            kept of the region.  Suits regions read over and over that\
+            change a little between reads, such as recordings that grow.
+
+        :param transceiver: the transceiver to send requests with
+        :param reads: the placement of the reader core, the SDRAM address\
+            and the size in bytes of each region
+        :type reads: list(tuple(pacman.model.placements.Placement, int, int))
+        :param extra_monitor_vertices: the extra monitors on the machine
+        :param placements: the placements of the graph
+        :return: the data of each region, in the order given
+        :rtype: list(bytearray)
+        """
+        self._check_not_multiplexed()
+        if not self._extended_protocol:
+            raise Exception(
+                "Only reader cores that understand the extended protocol can "
+                "checksum pages")
+
+        # only the regions of one reader core can be told apart
+        runs = list()
+        for read in reads:
+            placement = read[0]
+            core = (placement.x, placement.y, placement.p)
+            if runs and runs[-1][0] == core:
+                runs[-1][1].append(read)
+            else:
+                runs.append((core, [read]))
+
+        results = list()
+        with self._router_timeouts_set(
+                transceiver, extra_monitor_vertices,
+                placements) as telemetries:
+            transport = UDPSDPTransport(transceiver, self._connection())
+            try:
+                for _, run in runs:
+                    results.extend(extract_data_incremental(
+                        run, self._region_cache, transport,
+                        self._receive_timeout_estimator, self._nack_pacer,
+                        self._new_incremental_stream))
+            finally:
+                transport.close()
+            telemetries.extend(
+                telemetry for _, run_telemetries in results
+                for telemetry in run_telemetries)
+        return [data for data, _ in results]
+
+    def forget_regions_read(self, placement=None):
+        """ Forget the copies kept of the regions read with\
+            :py:meth:`get_data_incremental`, so that they are read in full\
+            next time, as when the cores have been reloaded
+
+        :param placement: the reader core whose regions to forget, or None\
+            to forget all of them
+        :type placement: pacman.model.placements.Placement
+        """
+        self._region_cache.forget(placement)
+
+    @staticmethod
+    def get_data_multiplexed(
+            transceiver, extractions, extra_monitor_vertices, placements):
+        """ Extract the data from many reader cores at once, each through\
+            a multiplexed gatherer of its own, with all of them sharing one\
+            socket and one receive thread
+
+        :param transceiver: the transceiver to send requests with
+        :param extractions: the gatherer and the placement of the reader\
+            core of each extraction
+        :type extractions: list(tuple(PacketGathererWithProtocol, \
+            pacman.model.placements.Placement))
+        :param extra_monitor_vertices: the extra monitors on the machine
+        :param placements: the placements of the graph
+        :return: the data and the record of how the extraction went of\
+            each extraction, in the order given
+        :rtype: list(tuple(bytearray, ExtractionTelemetry))
+        """
+        if not extractions:
+            return []
+        for gatherer, _ in extractions:
+            if not gatherer.multiplexed:
+                raise Exception(
+                    "Only multiplexed packet gatherers can share a socket")
+        streams = [
+            (placements.get_placement_of_vertex(gatherer),
+             gatherer.new_stream(placement))
+            for gatherer, placement in extractions]
+
+        # one socket and one receive thread serve every extraction
+        return extractions[0][0].extract_multiplexed(
+            transceiver, streams, extra_monitor_vertices, placements)
+
+    def extract_multiplexed(
+            self, transceiver, streams, extra_monitor_vertices, placements):
+        """ Run extractions through the socket this multiplexed gatherer\
+            shares with the others, all at once, pacing requests and setting\
+            the router timeout as for an extraction through this gatherer
+
+        :param transceiver: the transceiver to send requests with
+        :param streams: the placement of the gatherer each extraction comes\
+            through and the extraction
+        :type streams: list(tuple(pacman.model.placements.Placement, \
+            DataExtractionStream))
+        :param extra_monitor_vertices: the extra monitors on the machine
+        :param placements: the placements of the graph
+        :return: the data and the record of how the extraction went of\
+            each extraction, in the order given
+        :rtype: list(tuple(bytearray, ExtractionTelemetry))
+        """
+        if not self._multiplexed:
+            raise Exception(
+                "Only multiplexed packet gatherers can share a socket")
+        with self._router_timeouts_set(
+                transceiver, extra_monitor_vertices,
+                placements) as telemetries:
+            transport = UDPSDPTransport(transceiver, self._connection())
+            try:
+                results = extract_data_multiplexed(
+                    streams, transport, self._receive_timeout_estimator,
+                    self._nack_pacer, self._checkpoint_interval)
+            finally:
+                transport.close()
+            telemetries.extend(telemetry for _, telemetry in results)
+        return results
+
+    def get_data_async(
+            self, transceiver, placement, sink=None, resume=False, loop=None):
+        """ Extract the data from a reader core without blocking, so that\
+            many extractions can run at once on one event loop.  Only\
+            available on Python 3.
+
+            Unlike :py:meth:`get_data`, this does not set the router\
+            timeouts; set them once around the whole batch of extractions,\
+            to the timeout from :py:meth:`get_router_timeout_tuner` if it\
+            is to be tuned, and record the batch with the tuner after.
+
+        :param transceiver: the transceiver to send requests with
+        :param placement: the placement of the reader core
+        :param sink: where to store the output, or None to keep it in memory
+        :type sink: \
+            :py:class:`spinnaker_graph_front_end.extraction.AbstractOutputSink`
+        :param resume: whether to carry on from the checkpoint an earlier\
+            extraction left, as for :py:meth:`get_data`
+        :type resume: bool
+        :param loop: the event loop to run on, or None for the current one
+        :return: a future that resolves to the data and the record of how\
+            the extraction went
+        :rtype: asyncio.Future
+        """
+        self._check_not_multiplexed()
+
+        # asyncio is only available on Python 3
+        from .async_data_extraction import extract_data_async
+        return extract_data_async(
+            self.new_stream(placement, sink), transceiver, self._connection(),
+            self._receive_timeout_estimator(), self._nack_pacer,
+            resume=resume, checkpoint_interval=self._checkpoint_interval,
+            loop=loop)
+
+    def new_stream(
+            self, placement, sink=None, region_address=None, n_bytes=None):
+        """ Make an extraction from a reader core through this gatherer,\
+            using the parts of the protocol it is set up to use
+
+        :param placement: the placement of the reader core
+        :param sink: where to store the output, or None to keep it in memory
+        :type sink: \
+            :py:class:`spinnaker_graph_front_end.extraction.AbstractOutputSink`
+        :param region_address: the address of the region to extract, or\
+            None for whatever the reader core sends
+        :type region_address: int
+        :param n_bytes: the size of the region, or None to ask the reader\
+            core's vertex, or failing that, take it from the first packet
+        :type n_bytes: int
+        :rtype: DataExtractionStream
+        """
+        # the size is taken from the first packet if the reader cannot say
+        if n_bytes is None and isinstance(
+                placement.vertex, AbstractProvidesExtractionSize):
+            n_bytes = placement.vertex.n_bytes_to_extract
+        return DataExtractionStream(
+            placement, sink, streaming_repair=self._streaming_repair,
+            fec_group_size=self._fec_group_size,
+            packet_checksums=self._packet_checksums,
+            range_requests=self._extended_protocol, n_bytes=n_bytes,
+            region_address=region_address,
+            compression=self._compression and region_address is not None)
+
+    def _new_incremental_stream(
+            self, placement, region_address, n_bytes, page_size):
+        # the pages are checksummed rather than compressed
+        if page_size is None:
+            return self.new_stream(placement, None, region_address, n_bytes)
+        return DataExtractionStream(
+            placement, None, streaming_repair=self._streaming_repair,
+            fec_group_size=self._fec_group_size,
+            packet_checksums=self._packet_checksums,
+            range_requests=self._extended_protocol, n_bytes=n_bytes,
+            region_address=region_address, page_size=page_size)
+
+    def _receive_timeout_estimator(self):
+        return ReceiveTimeoutEstimator(
+            self._receive_timeout_floor, self._receive_timeout_ceiling)
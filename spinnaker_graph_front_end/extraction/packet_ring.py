@@ -0,0 +1,211 @@
+import threading
+
+from spinnman.exceptions import SpinnmanTimeoutException
+
+
+class PacketRing(object):
+    """ A ring of preallocated packet buffers passed from exactly one\
+        producer thread to exactly one consumer thread.
+
+        The producer only ever advances the head and the consumer only ever\
+        advances the tail, so neither side takes a lock to hand over a\
+        packet; a thread only blocks (on an event) when the ring is empty\
+        for the consumer or full for the producer.
+    """
+
+    __slots__ = [
+        # the slab holding every slot
+        "_slab",
+
+        # a view over the whole slab
+        "_slab_view",
+
+        # the length of the packet in each slot
+        "_lengths",
+
+        # the number of slots
+        "_n_slots",
+
+        # the size of each slot
+        "_slot_size",
+
+        # the count of slots ever committed; written only by the producer
+        "_head",
+
+        # the count of slots ever released; written only by the consumer
+        "_tail",
+
+        # set by the producer when a consumer is waiting for a packet
+        "_not_empty",
+
+        # True while the consumer is waiting for a packet
+        "_consumer_waiting",
+
+        # set by the consumer when a producer is waiting for a free slot
+        "_not_full",
+
+        # True while the producer is waiting for a free slot
+        "_producer_waiting"]
+
+    def __init__(self, n_slots, slot_size):
+        """
+        :param n_slots: the number of packets the ring can hold
+        :type n_slots: int
+        :param slot_size: the largest packet the ring can hold
+        :type slot_size: int
+        """
+        self._n_slots = n_slots
+        self._slot_size = slot_size
+        self._slab = bytearray(n_slots * slot_size)
+        self._slab_view = memoryview(self._slab)
+        self._lengths = [0] * n_slots
+        self._head = 0
+        self._tail = 0
+        self._not_empty = threading.Event()
+        self._consumer_waiting = False
+        self._not_full = threading.Event()
+        self._producer_waiting = False
+
+    def __len__(self):
+        return self._head - self._tail
+
+    @property
+    def n_slots(self):
+        """ The number of packets the ring can hold
+
+        :rtype: int
+        """
+        return self._n_slots
+
+    def _slot(self, count):
+        return (count % self._n_slots) * self._slot_size
+
+    def writable_slot(self, timeout=None):
+        """ Get the next free slot for the producer to fill
+
+        :param timeout: how long to wait for a slot if the ring is full
+        :type timeout: float
+        :return: the slot, or None if the ring stayed full
+        :rtype: memoryview
+        """
+        if self._head - self._tail >= self._n_slots:
+            self._not_full.clear()
+            self._producer_waiting = True
+            try:
+                if (self._head - self._tail >= self._n_slots and
+                        not self._not_full.wait(timeout)):
+                    return None
+            finally:
+                self._producer_waiting = False
+        start = self._slot(self._head)
+        return self._slab_view[start:start + self._slot_size]
+
+    def commit(self, length):
+        """ Hand the slot last returned by :py:meth:`writable_slot` to the\
+            consumer
+
+        :param length: how much of the slot was filled
+        :type length: int
+        """
+        self._lengths[self._head % self._n_slots] = length
+        self._head += 1
+        if self._consumer_waiting:
+            self._not_empty.set()
+
+    def readable_slot(self, timeout=None):
+        """ Get the oldest packet not yet released by the consumer
+
+        :param timeout: how long to wait for a packet if the ring is empty
+        :type timeout: float
+        :return: the packet, or None if nothing arrived in time
+        :rtype: memoryview
+        """
+        if self._tail == self._head:
+            self._not_empty.clear()
+            self._consumer_waiting = True
+            try:
+                if (self._tail == self._head and
+                        not self._not_empty.wait(timeout)):
+                    return None
+            finally:
+                self._consumer_waiting = False
+        index = self._tail % self._n_slots
+        start = index * self._slot_size
+        return self._slab_view[start:start + self._lengths[index]]
+
+    def release(self):
+        """ Give the packet last returned by :py:meth:`readable_slot` back\
+            to the producer
+        """
+        self._tail += 1
+        if self._producer_waiting:
+            self._not_full.set()
+
+
+class PacketReceiverThread(threading.Thread):
+    """ A thread that does nothing but move datagrams from a\
+        :py:class:`UDPPacketIngest` into a :py:class:`PacketRing`, so that\
+        the socket keeps being drained while the consumer is busy.  Each\
+        time the socket becomes readable, every datagram the kernel has\
+        queued is moved, for as long as the ring has room.
+    """
+
+    #: how often to check whether the thread has been asked to stop
+    POLL_INTERVAL_IN_SECONDS = 0.1
+
+    def __init__(self, connection, ring):
+        """
+        :param connection: where to receive datagrams from
+        :type connection: UDPPacketIngest
+        :param ring: where to put the datagrams
+        :type ring: PacketRing
+        """
+        super(PacketReceiverThread, self).__init__(
+            name="packet receiver on port {}".format(connection.local_port))
+        self.daemon = True
+        self._connection = connection
+        self._ring = ring
+        self._running = True
+        self._error = None
+
+    @property
+    def error(self):
+        """ The exception that stopped the thread, if any
+
+        :rtype: Exception
+        """
+        return self._error
+
+    def run(self):
+        try:
+            while self._running:
+                slot = self._ring.writable_slot(self.POLL_INTERVAL_IN_SECONDS)
+                if slot is None:
+                    continue
+                try:
+                    length = self._connection.receive_into(
+                        slot, self.POLL_INTERVAL_IN_SECONDS)
+                except SpinnmanTimeoutException:
+                    continue
+                self._ring.commit(length)
+                self._drain()
+        except Exception as e:
+            self._error = e
+
+    def _drain(self):
+        """ Move the datagrams already queued into the ring without\
+            waiting, until the socket is empty or the ring is full
+        """
+        slot = self._ring.writable_slot(0)
+        while slot is not None:
+            length = self._connection.receive_queued_into(slot)
+            if length is None:
+                return
+            self._ring.commit(length)
+            slot = self._ring.writable_slot(0)
+
+    def stop(self):
+        """ Ask the thread to stop and wait for it to do so
+        """
+        self._running = False
+        self.join()
@@ -0,0 +1,150 @@
+import struct
+
+from .clock import monotonic
+
+
+class PacketTraceWriter(object):
+    """ Writes every packet an extraction receives, and every time it\
+        waited for one in vain, to a compact binary trace, so that the\
+        extraction can be replayed through the host side of the protocol\
+        without a board.
+
+        The trace starts with a header holding how the extraction was set\
+        up, followed by one record for each receive: the time since the\
+        trace started and the length of the packet, then the packet.  A\
+        length of zero records a receive that timed out.
+    """
+
+    __slots__ = [
+        # the file being written
+        "_file",
+
+        # when the trace started
+        "_start_time",
+
+        # how many packets have been written
+        "_n_packets"]
+
+    MAGIC = b"SGFETRCE"
+    VERSION = 2
+
+    #: magic, version, x, y, p of the reader core, fec group size, whether\
+    #: packet checksums, streaming repair and range requests are on, and\
+    #: the size of the data if known up front, or 0 if not
+    HEADER = struct.Struct("<8s9I")
+
+    #: seconds since the trace started, and the length of the packet
+    RECORD = struct.Struct("<dH")
+
+    def __init__(self, filename, stream):
+        """
+        :param filename: where to write the trace
+        :type filename: str
+        :param stream: the extraction being traced
+        :type stream: DataExtractionStream
+        """
+        self._file = open(filename, "wb")
+        self._file.write(self.HEADER.pack(
+            self.MAGIC, self.VERSION, stream.placement.x,
+            stream.placement.y, stream.placement.p, stream.fec_group_size,
+            int(stream.packet_checksums), int(stream.streaming_repair),
+            int(stream.range_requests),
+            0 if stream.n_bytes is None else stream.n_bytes))
+        self._start_time = monotonic()
+        self._n_packets = 0
+
+    @property
+    def n_packets(self):
+        """ How many packets have been written
+
+        :rtype: int
+        """
+        return self._n_packets
+
+    def packet_received(self, packet):
+        """ Record a packet
+
+        :param packet: the packet, as handed to the extraction
+        :type packet: bytes or memoryview
+        """
+        self._file.write(self.RECORD.pack(
+            monotonic() - self._start_time, len(packet)))
+        self._file.write(packet)
+        self._n_packets += 1
+
+    def timed_out(self):
+        """ Record that no packet arrived in time
+        """
+        self._file.write(self.RECORD.pack(
+            monotonic() - self._start_time, 0))
+
+    def close(self):
+        """ Finish the trace
+        """
+        self._file.close()
+
+
+class PacketTraceReader(object):
+    """ Reads a trace written by :py:class:`PacketTraceWriter`
+    """
+
+    __slots__ = [
+        # the whole trace
+        "_data",
+
+        # how the traced extraction was set up, by name
+        "_settings"]
+
+    def __init__(self, filename):
+        """
+        :param filename: the trace to read
+        :type filename: str
+        """
+        with open(filename, "rb") as f:
+            self._data = f.read()
+        header = PacketTraceWriter.HEADER
+        if len(self._data) < header.size:
+            raise Exception("{} is not a packet trace".format(filename))
+        (magic, version, x, y, p, fec_group_size, packet_checksums,
+         streaming_repair, range_requests, n_bytes) = header.unpack_from(
+            self._data)
+        if magic != PacketTraceWriter.MAGIC:
+            raise Exception("{} is not a packet trace".format(filename))
+        if version != PacketTraceWriter.VERSION:
+            raise Exception(
+                "{} is a version {} packet trace; only version {} can be "
+                "read".format(filename, version, PacketTraceWriter.VERSION))
+        self._settings = {
+            "x": x, "y": y, "p": p, "fec_group_size": fec_group_size,
+            "packet_checksums": bool(packet_checksums),
+            "streaming_repair": bool(streaming_repair),
+            "range_requests": bool(range_requests),
+            "n_bytes": n_bytes if n_bytes else None}
+
+    @property
+    def settings(self):
+        """ How the traced extraction was set up: the x, y and p of the\
+            reader core, and the fec_group_size, packet_checksums,\
+            streaming_repair, range_requests and n_bytes of the stream
+
+        :rtype: dict(str, int or bool or None)
+        """
+        return dict(self._settings)
+
+    def __iter__(self):
+        """ The receives in the trace: the time of each since the trace\
+            started, and the packet, or None if the receive timed out
+
+        :rtype: iterable(tuple(float, memoryview or None))
+        """
+        view = memoryview(self._data)
+        record = PacketTraceWriter.RECORD
+        offset = PacketTraceWriter.HEADER.size
+        while offset + record.size <= len(self._data):
+            timestamp, length = record.unpack_from(self._data, offset)
+            offset += record.size
+            if length == 0:
+                yield timestamp, None
+            else:
+                yield timestamp, view[offset:offset + length]
+                offset += length
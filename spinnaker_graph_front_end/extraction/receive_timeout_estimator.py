@@ -0,0 +1,131 @@
+class _SmoothedTime(object):
+    """ A smoothed mean and mean deviation of a series of times, as used\
+        for TCP retransmission timeouts (RFC 6298)
+    """
+
+    __slots__ = [
+        # the smoothed mean, or None before the first sample
+        "_mean",
+
+        # the smoothed mean deviation
+        "_deviation"]
+
+    GAIN = 0.125
+    DEVIATION_GAIN = 0.25
+
+    def __init__(self):
+        self._mean = None
+        self._deviation = 0.0
+
+    def add(self, sample):
+        if self._mean is None:
+            self._mean = sample
+            self._deviation = sample / 2.0
+        else:
+            self._deviation += self.DEVIATION_GAIN * (
+                abs(self._mean - sample) - self._deviation)
+            self._mean += self.GAIN * (sample - self._mean)
+
+    def upper_bound(self, n_deviations):
+        if self._mean is None:
+            return None
+        return self._mean + n_deviations * self._deviation
+
+
+class ReceiveTimeoutEstimator(object):
+    """ Works out how long to wait for the next packet of an extraction\
+        before deciding that packets have been lost, from the times\
+        measured so far, in the way that TCP works out its retransmission\
+        timeout.
+
+        While a request to the reader core is outstanding, the wait is\
+        derived from the round trip times of earlier requests; otherwise it\
+        is derived from the gaps between packets arriving.  Each timeout in\
+        a row doubles the wait, and it is always kept between a floor and a\
+        ceiling.
+    """
+
+    __slots__ = [
+        # the shortest wait allowed
+        "_min_timeout",
+
+        # the longest wait allowed
+        "_max_timeout",
+
+        # the gaps between packets arriving
+        "_gaps",
+
+        # the times from a request being sent to the first packet arriving
+        "_round_trips",
+
+        # when the last packet arrived, or None if none has yet
+        "_last_arrival",
+
+        # when the outstanding request was sent, or None if there is none
+        "_request_time",
+
+        # what the wait is multiplied by after timeouts in a row
+        "_backoff"]
+
+    #: how many mean deviations above the mean to wait
+    N_DEVIATIONS = 4
+
+    def __init__(self, min_timeout, max_timeout):
+        """
+        :param min_timeout: the shortest wait allowed, in seconds
+        :type min_timeout: float
+        :param max_timeout: \
+            the longest wait allowed, in seconds; this is also the wait used\
+            until something has been measured
+        :type max_timeout: float
+        """
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._gaps = _SmoothedTime()
+        self._round_trips = _SmoothedTime()
+        self._last_arrival = None
+        self._request_time = None
+        self._backoff = 1
+
+    @property
+    def timeout(self):
+        """ How long to wait for the next packet, in seconds
+
+        :rtype: float
+        """
+        if self._request_time is not None:
+            estimate = self._round_trips.upper_bound(self.N_DEVIATIONS)
+        else:
+            estimate = self._gaps.upper_bound(self.N_DEVIATIONS)
+        if estimate is None:
+            return self._max_timeout
+        return min(max(estimate * self._backoff, self._min_timeout),
+                   self._max_timeout)
+
+    def request_sent(self, now):
+        """ Note that a request has been sent to the reader core, to which\
+            it will answer with packets
+
+        :param now: the time the request was sent, in seconds
+        :type now: float
+        """
+        self._request_time = now
+
+    def packet_received(self, now):
+        """ Note that a packet has arrived from the reader core
+
+        :param now: the time the packet arrived, in seconds
+        :type now: float
+        """
+        if self._request_time is not None:
+            self._round_trips.add(now - self._request_time)
+            self._request_time = None
+        elif self._last_arrival is not None:
+            self._gaps.add(now - self._last_arrival)
+        self._last_arrival = now
+        self._backoff = 1
+
+    def timed_out(self):
+        """ Note that nothing arrived within the timeout
+        """
+        self._backoff *= 2
@@ -0,0 +1,202 @@
+import numpy
+
+
+class ReceivedSequenceTracker(object):
+    """ Records which sequence numbers of a data extraction have arrived,\
+        using one flag per sequence number so that the received count is\
+        available immediately and the missing sequence numbers can be\
+        located without walking the range in Python.
+    """
+
+    __slots__ = [
+        # the sequence number held in the first flag
+        "_first_seq_num",
+
+        # one flag per sequence number, set when received
+        "_received",
+
+        # how many flags are currently set
+        "_n_received",
+
+        # how many flags from the first are all set
+        "_n_contiguous"]
+
+    def __init__(self, n_sequence_numbers, first_seq_num=1):
+        """
+        :param n_sequence_numbers: how many sequence numbers to track
+        :type n_sequence_numbers: int
+        :param first_seq_num: the lowest sequence number tracked
+        :type first_seq_num: int
+        """
+        self._first_seq_num = first_seq_num
+        self._received = numpy.zeros(max(n_sequence_numbers, 0), dtype=bool)
+        self._n_received = 0
+        self._n_contiguous = 0
+
+    @property
+    def first_seq_num(self):
+        """ The lowest sequence number tracked
+
+        :rtype: int
+        """
+        return self._first_seq_num
+
+    @property
+    def n_sequence_numbers(self):
+        """ How many sequence numbers are tracked
+
+        :rtype: int
+        """
+        return len(self._received)
+
+    @property
+    def n_received(self):
+        """ How many distinct sequence numbers have been received
+
+        :rtype: int
+        """
+        return self._n_received
+
+    @property
+    def n_contiguous(self):
+        """ How many sequence numbers, starting from the first, have all\
+            been received
+
+        :rtype: int
+        """
+        return self._n_contiguous
+
+    @property
+    def n_missing(self):
+        """ How many sequence numbers have not yet been received
+
+        :rtype: int
+        """
+        return len(self._received) - self._n_received
+
+    @property
+    def is_complete(self):
+        """ True if every tracked sequence number has been received
+
+        :rtype: bool
+        """
+        return self._n_received == len(self._received)
+
+    def _index(self, seq_num):
+        index = seq_num - self._first_seq_num
+        if index < 0 or index >= len(self._received):
+            raise IndexError(
+                "sequence number {} is outside the tracked range {} to "
+                "{}".format(seq_num, self._first_seq_num,
+                            self._first_seq_num + len(self._received) - 1))
+        return index
+
+    def add(self, seq_num):
+        """ Mark a sequence number as received
+
+        :param seq_num: the sequence number received
+        :type seq_num: int
+        :return: True if this sequence number had not been seen before
+        :rtype: bool
+        """
+        index = self._index(seq_num)
+        if self._received[index]:
+            return False
+        self._received[index] = True
+        self._n_received += 1
+
+        # each flag is only stepped over once, so this is cheap overall
+        while (self._n_contiguous < len(self._received) and
+                self._received[self._n_contiguous]):
+            self._n_contiguous += 1
+        return True
+
+    def discard(self, seq_num):
+        """ Mark a sequence number as no longer received, so that it will\
+            be reported as missing again
+
+        :param seq_num: the sequence number to forget
+        :type seq_num: int
+        """
+        index = self._index(seq_num)
+        if self._received[index]:
+            self._received[index] = False
+            self._n_received -= 1
+            self._n_contiguous = min(self._n_contiguous, index)
+
+    @property
+    def received_flags(self):
+        """ A copy of the flags, one per sequence number from the first,\
+            set where that sequence number has been received
+
+        :rtype: numpy.ndarray of bool
+        """
+        return self._received.copy()
+
+    def add_received_flags(self, received):
+        """ Mark as received every sequence number whose flag is set, as\
+            from the :py:attr:`received_flags` of an earlier tracker
+
+        :param received: one flag per sequence number from the first
+        :type received: numpy.ndarray of bool
+        """
+        if len(received) != len(self._received):
+            raise ValueError(
+                "got {} flags to track {} sequence numbers".format(
+                    len(received), len(self._received)))
+        self._received |= received
+        self._n_received = int(numpy.count_nonzero(self._received))
+        not_received = numpy.flatnonzero(~self._received)
+        self._n_contiguous = int(
+            not_received[0] if len(not_received) else len(self._received))
+
+    def __contains__(self, seq_num):
+        index = seq_num - self._first_seq_num
+        return 0 <= index < len(self._received) and bool(
+            self._received[index])
+
+    def __len__(self):
+        return self._n_received
+
+    def missing(self, start=None, stop=None):
+        """ Get the sequence numbers not yet received, in ascending order
+
+        :param start: the lowest sequence number to look at, or None for\
+            the first tracked
+        :type start: int
+        :param stop: one more than the highest sequence number to look at,\
+            or None for the last tracked
+        :type stop: int
+        :rtype: numpy.ndarray of uint32
+        """
+        first = 0 if start is None else max(start - self._first_seq_num, 0)
+        last = len(self._received) if stop is None else max(
+            stop - self._first_seq_num, first)
+        missing = numpy.flatnonzero(~self._received[first:last])
+        missing += self._first_seq_num + first
+        return missing.astype(numpy.uint32)
+
+    def missing_runs(self, start=None, stop=None):
+        """ Get the runs of consecutive sequence numbers not yet received
+
+        :param start: the lowest sequence number to look at, or None for\
+            the first tracked
+        :type start: int
+        :param stop: one more than the highest sequence number to look at,\
+            or None for the last tracked
+        :type stop: int
+        :return: the first sequence number of each run and the length of\
+            each run, both in ascending order of sequence number
+        :rtype: tuple(numpy.ndarray, numpy.ndarray)
+        """
+        first = 0 if start is None else max(start - self._first_seq_num, 0)
+        last = len(self._received) if stop is None else max(
+            stop - self._first_seq_num, first)
+
+        # +1 where a run of missing flags starts, -1 just after it ends
+        edges = numpy.diff(numpy.concatenate((
+            [0], (~self._received[first:last]).view(numpy.int8), [0])))
+        starts = numpy.flatnonzero(edges == 1)
+        ends = numpy.flatnonzero(edges == -1)
+        return (starts + self._first_seq_num + first).astype(numpy.uint32), \
+            (ends - starts).astype(numpy.uint32)
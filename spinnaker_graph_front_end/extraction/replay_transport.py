@@ -0,0 +1,68 @@
+import time
+
+from .abstract_transport import AbstractTransport
+from .clock import monotonic
+
+
+class ReplayTransport(AbstractTransport):
+    """ Plays back a trace of an extraction, so that the host side of the\
+        protocol can be profiled and tested without a board.  Packets are\
+        handed out in the order they were received, with a timeout wherever\
+        the original extraction had one, either as fast as they can be\
+        taken or at the times they first arrived.  Requests sent to the\
+        reader core go nowhere.
+    """
+
+    __slots__ = [
+        # the receives still to be played back
+        "_records",
+
+        # whether to hand out packets at the times they first arrived
+        "_real_time",
+
+        # when playback started, or None if it has not
+        "_start_time",
+
+        # how many requests have been sent
+        "_n_messages_sent"]
+
+    def __init__(self, trace, real_time=False):
+        """
+        :param trace: the trace to play back
+        :type trace: PacketTraceReader
+        :param real_time: whether to hand out packets at the times they\
+            first arrived, rather than as fast as they are asked for
+        :type real_time: bool
+        """
+        self._records = iter(trace)
+        self._real_time = real_time
+        self._start_time = None
+        self._n_messages_sent = 0
+
+    @property
+    def n_messages_sent(self):
+        """ How many requests have been sent to the reader core
+
+        :rtype: int
+        """
+        return self._n_messages_sent
+
+    def send(self, message):
+        self._n_messages_sent += 1
+
+    def receive(self, timeout):
+        if self._start_time is None:
+            self._start_time = monotonic()
+        try:
+            timestamp, packet = next(self._records)
+        except StopIteration:
+            raise Exception(
+                "The trace ended before the extraction finished")
+        if self._real_time:
+            wait = self._start_time + timestamp - monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        return packet
+
+    def close(self):
+        pass
@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+
+from .data_extraction_stream import DataExtractionStream
+
+
+class RouterTimeoutTuner(object):
+    """ Chooses the router timeout to set on a board while data is\
+        extracted from it, learning from each extraction which timeout\
+        gets the data out fastest.
+
+        A timeout too short makes the routers drop packets that are only\
+        waiting for a moment, and a timeout too long lets a blocked packet\
+        hold up the fabric.  After each extraction, the rate it got and the\
+        share of packets that went missing in its first pass are added to\
+        what is known of the timeout it ran with.  Whenever much went\
+        missing, the next extraction waits longer.  Otherwise the next\
+        extraction uses the fastest timeout known, or if that is the one\
+        just used, a neighbour of it not yet tried, shorter first, so that\
+        the timeout climbs to the fastest for the board.
+
+        Keep one tuner per board.  If given a file, what is learned is kept\
+        in it under the name of the board, so that the next run on that\
+        board starts from where this one left off.
+    """
+
+    __slots__ = [
+        # where what is learned is kept, or None to keep it in memory
+        "_filename",
+
+        # the name the board is kept under
+        "_board",
+
+        # the index in TIMEOUTS of the timeout to use next
+        "_index",
+
+        # the smoothed rate and missing share of each timeout tried, by\
+        # index in TIMEOUTS
+        "_measurements",
+
+        # the share of packets that may go missing before waiting longer
+        "_loss_threshold"]
+
+    #: the timeouts to choose from, as (mantissa, exponent), from the\
+    #: shortest wait to the longest, each about double the one before
+    TIMEOUTS = [(15, exponent) for exponent in range(4, 16)]
+
+    #: the timeout set before the timeout was tuned
+    DEFAULT_TIMEOUT = (15, 15)
+
+    #: the share of first pass packets that may go missing before the next\
+    #: extraction waits longer
+    DEFAULT_LOSS_THRESHOLD = 0.01
+
+    #: how much a new measurement of a timeout counts against the old ones
+    SMOOTHING = 0.5
+
+    _BYTES_PER_PACKET = (
+        DataExtractionStream.DATA_PER_FULL_PACKET_WITH_SEQUENCE_NUM *
+        DataExtractionStream.WORD_TO_BYTE_CONVERTER)
+
+    # stops two tuners writing the file at once
+    _FILE_LOCK = threading.Lock()
+
+    def __init__(
+            self, board, filename=None,
+            loss_threshold=DEFAULT_LOSS_THRESHOLD):
+        """
+        :param board: the name to keep what is learned under, such as the\
+            IP address of the board
+        :type board: str
+        :param filename: the JSON file to keep what is learned in, or None\
+            to keep it only for as long as the tuner lasts
+        :type filename: str
+        :param loss_threshold: the share of packets that may go missing in\
+            the first pass before the next extraction waits longer
+        :type loss_threshold: float
+        """
+        self._filename = filename
+        self._board = board
+        self._index = self.TIMEOUTS.index(self.DEFAULT_TIMEOUT)
+        self._measurements = dict()
+        self._loss_threshold = loss_threshold
+        if filename is not None:
+            self._load()
+
+    @property
+    def timeout(self):
+        """ The router timeout to set for the next extraction
+
+        :return: the mantissa and exponent of the timeout
+        :rtype: tuple(int, int)
+        """
+        return self.TIMEOUTS[self._index]
+
+    @property
+    def measurements(self):
+        """ The smoothed rate, in megabits per second, and share of first\
+            pass packets missing of each timeout tried
+
+        :rtype: dict(tuple(int, int), tuple(float, float))
+        """
+        return {self.TIMEOUTS[index]: measurement
+                for index, measurement in self._measurements.items()}
+
+    def record(self, telemetries):
+        """ Learn from extractions run with the timeout, and choose the\
+            timeout for the next extraction
+
+        :param telemetries: the records of the extractions
+        :type telemetries: iterable(ExtractionTelemetry)
+        """
+        for telemetry in telemetries:
+            rate = telemetry.megabits_per_second
+            if rate is None or not telemetry.missing_per_round:
+                continue
+            n_packets = max(
+                -(-telemetry.n_bytes // self._BYTES_PER_PACKET), 1)
+            loss = min(telemetry.missing_per_round[0] / float(n_packets), 1.0)
+            old = self._measurements.get(self._index)
+            if old is not None:
+                rate = old[0] + self.SMOOTHING * (rate - old[0])
+                loss = old[1] + self.SMOOTHING * (loss - old[1])
+            self._measurements[self._index] = (rate, loss)
+        self._choose()
+        self._save()
+
+    def failed(self):
+        """ Note that an extraction did not finish, so that the next waits\
+            longer
+        """
+        self._index = min(self._index + 1, len(self.TIMEOUTS) - 1)
+        self._save()
+
+    def _choose(self):
+        measurement = self._measurements.get(self._index)
+        if measurement is None:
+            return
+
+        # packets going missing means the routers are giving up too soon
+        if measurement[1] > self._loss_threshold:
+            if self._index + 1 < len(self.TIMEOUTS):
+                self._index += 1
+            return
+
+        # go to the fastest known that does not lose too much, and when
+        # already there, try a neighbour not yet known, shorter first
+        best = max(
+            (index for index, (_, loss) in self._measurements.items()
+             if loss <= self._loss_threshold),
+            key=lambda index: self._measurements[index][0])
+        if best != self._index:
+            self._index = best
+            return
+        for index in (self._index - 1, self._index + 1):
+            if 0 <= index < len(self.TIMEOUTS) and \
+                    index not in self._measurements:
+                self._index = index
+                return
+
+    def _read_file(self):
+        try:
+            with open(self._filename) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return dict()
+
+    def _load(self):
+        with self._FILE_LOCK:
+            state = self._read_file().get(self._board)
+        if not state:
+            return
+        timeout = tuple(state.get("timeout", self.DEFAULT_TIMEOUT))
+        if timeout in self.TIMEOUTS:
+            self._index = self.TIMEOUTS.index(timeout)
+        for key, (rate, loss) in state.get("measurements", {}).items():
+            timeout = tuple(int(part) for part in key.split(","))
+            if timeout in self.TIMEOUTS:
+                self._measurements[self.TIMEOUTS.index(timeout)] = (
+                    rate, loss)
+
+    def _save(self):
+        if self._filename is None:
+            return
+        state = {
+            "timeout": list(self.timeout),
+            "measurements": {
+                "{},{}".format(*self.TIMEOUTS[index]): list(measurement)
+                for index, measurement in self._measurements.items()}}
+
+        # other boards may be kept in the same file
+        with self._FILE_LOCK:
+            boards = self._read_file()
+            boards[self._board] = state
+            temporary = self._filename + ".tmp"
+            with open(temporary, "w") as f:
+                json.dump(boards, f, indent=2, sort_keys=True)
+            # only POSIX renames over a file that exists
+            if os.name == "nt" and os.path.exists(self._filename):
+                os.remove(self._filename)
+            os.rename(temporary, self._filename)
@@ -0,0 +1,81 @@
+import struct
+
+_SOURCE = struct.Struct("<B2xH")
+
+
+class StreamDemultiplexer(object):
+    """ Routes the packets of many extractions that share one socket to\
+        the extraction each belongs to.  The packets keep their SDP header,\
+        and each is routed by the chip and core of the packet gatherer that\
+        sent it, so every extraction sharing the socket needs a gatherer of\
+        its own.
+    """
+
+    __slots__ = [
+        # the extraction of each gatherer, by the source in the header
+        "_streams"]
+
+    #: the padding before the SDP header of a packet sent over UDP
+    UDP_PADDING_SIZE = 2
+
+    #: the size of an SDP header
+    SDP_HEADER_SIZE = 8
+
+    #: where the SDP source port and CPU byte is in a packet
+    _SOURCE_OFFSET = UDP_PADDING_SIZE + 3
+
+    #: the bits of the SDP source port and CPU byte that hold the CPU
+    _CPU_MASK = 0x1F
+
+    def __init__(self):
+        self._streams = dict()
+
+    @staticmethod
+    def _key(x, y, p):
+        return (x << 13) | (y << 5) | p
+
+    def add(self, gatherer_placement, stream):
+        """ Route the packets from a gatherer to an extraction
+
+        :param gatherer_placement: the placement of the packet gatherer
+        :type gatherer_placement: pacman.model.placements.Placement
+        :param stream: the extraction its packets belong to
+        :type stream: DataExtractionStream
+        """
+        self._streams[self._key(
+            gatherer_placement.x, gatherer_placement.y,
+            gatherer_placement.p)] = stream
+
+    def remove(self, gatherer_placement):
+        """ Stop routing the packets from a gatherer, such as once its\
+            extraction has finished; any still arriving are dropped
+
+        :param gatherer_placement: the placement of the packet gatherer
+        :type gatherer_placement: pacman.model.placements.Placement
+        """
+        self._streams.pop(self._key(
+            gatherer_placement.x, gatherer_placement.y,
+            gatherer_placement.p), None)
+
+    def __len__(self):
+        return len(self._streams)
+
+    def route(self, packet):
+        """ Find the extraction a packet belongs to
+
+        :param packet: the packet, with its SDP header
+        :type packet: bytes or memoryview
+        :return: the extraction and the packet without its header, or\
+            None and None if the packet is from no known gatherer
+        :rtype: tuple(DataExtractionStream, memoryview)
+        """
+        if len(packet) < self.UDP_PADDING_SIZE + self.SDP_HEADER_SIZE:
+            return None, None
+        port_and_cpu, address = _SOURCE.unpack_from(
+            packet, self._SOURCE_OFFSET)
+        stream = self._streams.get(
+            (address << 5) | (port_and_cpu & self._CPU_MASK))
+        if stream is None:
+            return None, None
+        return stream, memoryview(packet)[
+            self.UDP_PADDING_SIZE + self.SDP_HEADER_SIZE:]
@@ -0,0 +1,75 @@
+""" Replays a trace of a data extraction through the host side of the\
+    protocol, and reports how fast the host decoded it.
+
+    Usage: ``python -m spinnaker_graph_front_end.extraction.trace_replay\
+    [--real-time] trace...``
+"""
+import argparse
+
+from pacman.model.placements import Placement
+
+from .clock import monotonic
+from .data_extraction import extract_data
+from .data_extraction_stream import DataExtractionStream
+from .nack_pacer import NackPacer
+from .packet_trace import PacketTraceReader
+from .receive_timeout_estimator import ReceiveTimeoutEstimator
+from .replay_transport import ReplayTransport
+
+
+def replay_trace(filename, real_time=False, sink=None):
+    """ Replay a trace of an extraction through the host side of the\
+        protocol, set up as the traced extraction was
+
+    :param filename: the trace to replay
+    :type filename: str
+    :param real_time: whether to hand out packets at the times they first\
+        arrived, rather than as fast as they can be decoded
+    :type real_time: bool
+    :param sink: where to store the output, or None to keep it in memory
+    :type sink: AbstractOutputSink
+    :return: the extraction replayed, the transport that replayed it, and\
+        how long the replay took in seconds
+    :rtype: tuple(DataExtractionStream, ReplayTransport, float)
+    """
+    reader = PacketTraceReader(filename)
+    settings = reader.settings
+    stream = DataExtractionStream(
+        Placement(None, settings["x"], settings["y"], settings["p"]), sink,
+        streaming_repair=settings["streaming_repair"],
+        fec_group_size=settings["fec_group_size"],
+        packet_checksums=settings["packet_checksums"],
+        range_requests=settings["range_requests"],
+        n_bytes=settings["n_bytes"])
+    transport = ReplayTransport(reader, real_time)
+
+    # the timeouts and pacing make no difference, as the trace says when
+    # the receives timed out and the requests go nowhere
+    start = monotonic()
+    extract_data(
+        stream, transport, ReceiveTimeoutEstimator(0.0, 0.0),
+        NackPacer(initial_interval=0.0, min_interval=0.0))
+    return stream, transport, monotonic() - start
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Replay traces of data extractions through the host "
+                    "side of the protocol")
+    parser.add_argument(
+        "--real-time", action="store_true",
+        help="hand out packets at the times they first arrived")
+    parser.add_argument("traces", nargs="+", help="the traces to replay")
+    args = parser.parse_args(args)
+    for filename in args.traces:
+        stream, transport, seconds = replay_trace(filename, args.real_time)
+        n_bytes = len(stream.output)
+        print("{}: {} bytes in {:.3f} seconds ({:.1f} Mb/s), "
+              "{} requests sent, lost per retransmission {}".format(
+                  filename, n_bytes, seconds,
+                  n_bytes * 8 / (seconds * 1000000.0) if seconds else 0.0,
+                  transport.n_messages_sent, stream.lost_seq_nums))
+
+
+if __name__ == "__main__":
+    main()
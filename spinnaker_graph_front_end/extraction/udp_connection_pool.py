@@ -0,0 +1,106 @@
+import threading
+
+from .udp_packet_ingest import UDPPacketIngest
+
+
+class UDPConnectionPool(object):
+    """ Holds the sockets that packet gatherers receive data on, one for\
+        each gatherer.  Each socket is bound once, to a port of its own, and\
+        is kept open across extractions and runs, so that many gatherers\
+        can extract at once and none has to bind its port again.
+
+        A gatherer asks for its port when it asks for its IP tag, so the\
+        tag always sends to the socket that will be receiving.
+    """
+
+    __slots__ = [
+        # the socket of each gatherer
+        "_connections",
+
+        # the address the sockets listen on, or None for all
+        "_local_host",
+
+        # stops two threads binding a socket for the same gatherer
+        "_lock"]
+
+    def __init__(self, local_host=None):
+        """
+        :param local_host: the address to listen on, or None for all
+        :type local_host: str
+        """
+        self._connections = dict()
+        self._local_host = local_host
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = UDPPacketIngest(local_host=self._local_host)
+                self._connections[key] = connection
+            return connection
+
+    def port_for(self, key):
+        """ Get the port the socket of a gatherer listens on, binding the\
+            socket if it does not yet exist
+
+        :param key: identifies the gatherer, usually the gatherer vertex
+        :return: the port to ask for the IP tag to send to
+        :rtype: int
+        """
+        return self._get(key).local_port
+
+    def connection(self, key):
+        """ Get the socket of a gatherer to receive an extraction on,\
+            binding it if it does not yet exist.  Anything left queued on\
+            the socket by an earlier extraction is thrown away first.  The\
+            socket stays open; do not close it.
+
+        :param key: identifies the gatherer, usually the gatherer vertex
+        :rtype: UDPPacketIngest
+        """
+        connection = self._get(key)
+        connection.discard_pending()
+        return connection
+
+    def release(self, key):
+        """ Close the socket of a gatherer, if it has one
+
+        :param key: identifies the gatherer
+        """
+        with self._lock:
+            connection = self._connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+    def close(self):
+        """ Close all the sockets
+        """
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+
+    def __len__(self):
+        return len(self._connections)
+
+    def __contains__(self, key):
+        return key in self._connections
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def default_connection_pool():
+    """ Get the pool shared by all the packet gatherers in this process,\
+        unless they are given one of their own
+
+    :rtype: UDPConnectionPool
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = UDPConnectionPool()
+        return _default_pool
@@ -0,0 +1,212 @@
+import errno
+import os
+import select
+import socket
+
+from spinnman.exceptions import SpinnmanTimeoutException
+
+_WOULD_BLOCK = (errno.EAGAIN, errno.EWOULDBLOCK)
+
+
+class UDPPacketIngest(object):
+    """ Receives UDP datagrams straight into buffers the caller provides,\
+        such as the slots of a :py:class:`PacketRing`, so that the only\
+        copy a caller needs to make is the one into its own output.  A\
+        caller can drain every datagram the kernel has queued each time the\
+        socket becomes readable, by waiting with :py:meth:`receive_into`\
+        and then taking the rest with :py:meth:`receive_queued_into`.
+    """
+
+    __slots__ = [
+        # the bound, non-blocking socket
+        "_socket",
+
+        # where datagrams not received into a buffer of the caller go
+        "_buffer",
+
+        # the largest datagram that can be received
+        "_slot_size"]
+
+    #: the largest datagram received; big enough for an SDP packet with the\
+    #: header stripped
+    DEFAULT_SLOT_SIZE = 300
+
+    #: the kernel receive buffer to ask for before the transfer size is known
+    DEFAULT_RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024
+
+    #: the largest kernel receive buffer to ask for
+    MAX_RECEIVE_BUFFER_SIZE = 256 * 1024 * 1024
+
+    #: approximate kernel memory used per queued datagram, over and above\
+    #: its payload
+    KERNEL_OVERHEAD_PER_DATAGRAM = 768
+
+    #: where Linux lists its UDP sockets, with a count of the datagrams\
+    #: dropped on each
+    PROC_NET_UDP = "/proc/net/udp"
+
+    def __init__(
+            self, local_port=None, local_host=None,
+            slot_size=DEFAULT_SLOT_SIZE):
+        """
+        :param local_port: the port to listen on, or None for any port
+        :type local_port: int
+        :param local_host: the address to listen on, or None for all
+        :type local_host: str
+        :param slot_size: the largest datagram that can be received
+        :type slot_size: int
+        """
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.set_receive_buffer_size(self.DEFAULT_RECEIVE_BUFFER_SIZE)
+        self._socket.bind((
+            "" if local_host is None else local_host,
+            0 if local_port is None else local_port))
+        self._socket.setblocking(False)
+
+        self._slot_size = slot_size
+        self._buffer = memoryview(bytearray(slot_size))
+
+    @property
+    def local_port(self):
+        """ The port being listened on
+
+        :rtype: int
+        """
+        return self._socket.getsockname()[1]
+
+    @property
+    def receive_buffer_size(self):
+        """ The size of the kernel receive buffer actually granted
+
+        :rtype: int
+        """
+        return self._socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+    @property
+    def n_kernel_drops(self):
+        """ How many datagrams the kernel has dropped on the socket, such as\
+            when the receive buffer was full, or None where the kernel does\
+            not say
+
+        :rtype: int
+        """
+        try:
+            inode = str(os.fstat(self._socket.fileno()).st_ino)
+            with open(self.PROC_NET_UDP) as sockets:
+                # the inode is the tenth column and the drops the last
+                for line in sockets:
+                    fields = line.split()
+                    if len(fields) > 9 and fields[9] == inode:
+                        return int(fields[-1])
+        except (IOError, OSError, ValueError):
+            pass
+        return None
+
+    def set_receive_buffer_size(self, n_bytes):
+        """ Ask the kernel for a receive buffer of the given size; the\
+            kernel may grant less than this
+
+        :param n_bytes: the size of buffer wanted
+        :type n_bytes: int
+        :return: the size of buffer granted
+        :rtype: int
+        """
+        try:
+            self._socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF,
+                int(min(n_bytes, self.MAX_RECEIVE_BUFFER_SIZE)))
+        except socket.error:
+            # keep whatever buffer we already have
+            pass
+        return self.receive_buffer_size
+
+    def size_receive_buffer_for(self, n_datagrams):
+        """ Size the kernel receive buffer so that a whole transfer of the\
+            given number of datagrams can be queued without drops
+
+        :param n_datagrams: the number of datagrams in the transfer
+        :type n_datagrams: int
+        :return: the size of buffer granted
+        :rtype: int
+        """
+        return self.set_receive_buffer_size(max(
+            n_datagrams * (
+                self._slot_size + self.KERNEL_OVERHEAD_PER_DATAGRAM),
+            self.DEFAULT_RECEIVE_BUFFER_SIZE))
+
+    def _wait_for_data(self, timeout):
+        readable, _, _ = select.select([self._socket], [], [], timeout)
+        if not readable:
+            raise SpinnmanTimeoutException("receive", timeout)
+
+    def receive_queued_into(self, buffer):
+        """ Receive a single datagram into the given buffer if one is\
+            already queued, without waiting
+
+        :param buffer: where to put the datagram
+        :type buffer: bytearray or memoryview
+        :return: the length of the datagram received, or None if nothing\
+            was queued
+        :rtype: int
+        """
+        try:
+            return self._socket.recv_into(buffer, len(buffer))
+        except socket.error as e:
+            if e.errno in _WOULD_BLOCK:
+                return None
+            raise
+
+    def receive_into(self, buffer, timeout=None):
+        """ Receive a single datagram into the given buffer
+
+        :param buffer: where to put the datagram
+        :type buffer: bytearray or memoryview
+        :param timeout: how long to wait, or None to wait forever
+        :type timeout: float
+        :return: the length of the datagram received
+        :rtype: int
+        :raise SpinnmanTimeoutException: if nothing arrives in time
+        """
+        # only wait when nothing is queued already
+        length = self.receive_queued_into(buffer)
+        while length is None:
+            self._wait_for_data(timeout)
+            length = self.receive_queued_into(buffer)
+        return length
+
+    def receive(self, timeout=None):
+        """ Receive a single datagram as a copy of its own
+
+        :param timeout: how long to wait, or None to wait forever
+        :type timeout: float
+        :rtype: bytes
+        :raise SpinnmanTimeoutException: if nothing arrives in time
+        """
+        return self._buffer[:self.receive_into(
+            self._buffer, timeout)].tobytes()
+
+    def discard_pending(self):
+        """ Throw away every datagram already queued, such as those left\
+            over from an extraction that was abandoned part way through
+
+        :return: the number of datagrams thrown away
+        :rtype: int
+        """
+        n_discarded = 0
+        while self.receive_queued_into(self._buffer) is not None:
+            n_discarded += 1
+        return n_discarded
+
+    def duplicate_socket(self):
+        """ Get another socket object for the same bound socket, which can\
+            be handed to something that will close it when done without\
+            closing this one
+
+        :rtype: socket.socket
+        """
+        return self._socket.dup()
+
+    def close(self):
+        """ Close the socket
+        """
+        self._socket.close()
@@ -0,0 +1,77 @@
+from .abstract_transport import AbstractTransport
+from .packet_ring import PacketReceiverThread, PacketRing
+from .udp_packet_ingest import UDPPacketIngest
+
+
+class UDPSDPTransport(AbstractTransport):
+    """ The transport to a real reader core: requests are sent as SDP\
+        through a transceiver, and data arrives as UDP from an IP tag.  The\
+        socket is drained on a separate thread into a ring of slots, so\
+        that it is still drained while the protocol decodes packets and\
+        sends requests.
+
+        The socket is borrowed, usually from a\
+        :py:class:`UDPConnectionPool`, and is left open when the transport\
+        is closed.
+    """
+
+    __slots__ = [
+        # the transceiver to send requests with
+        "_transceiver",
+
+        # the socket the data arrives on
+        "_connection",
+
+        # the packets received but not yet handed out
+        "_ring",
+
+        # the thread that moves packets from the socket to the ring
+        "_receiver",
+
+        # True if a packet from the ring has been handed out and not freed
+        "_holding_slot"]
+
+    #: how many packets can be waiting to be handed out
+    DEFAULT_N_RING_SLOTS = 8192
+
+    def __init__(
+            self, transceiver, connection, n_ring_slots=DEFAULT_N_RING_SLOTS):
+        """
+        :param transceiver: the transceiver to send requests with
+        :param connection: the socket the IP tag sends the data to
+        :type connection: UDPPacketIngest
+        :param n_ring_slots: how many packets can be waiting to be handed out
+        :type n_ring_slots: int
+        """
+        self._transceiver = transceiver
+        self._connection = connection
+        self._ring = PacketRing(
+            n_ring_slots, UDPPacketIngest.DEFAULT_SLOT_SIZE)
+        self._receiver = PacketReceiverThread(self._connection, self._ring)
+        self._receiver.start()
+        self._holding_slot = False
+
+    def send(self, message):
+        self._transceiver.send_sdp_message(message=message)
+
+    def receive(self, timeout):
+        if self._holding_slot:
+            self._ring.release()
+            self._holding_slot = False
+        data = self._ring.readable_slot(timeout=timeout)
+        if data is None:
+            if self._receiver.error is not None:
+                raise self._receiver.error
+            return None
+        self._holding_slot = True
+        return data
+
+    def size_receive_buffer_for(self, n_packets):
+        self._connection.size_receive_buffer_for(n_packets)
+
+    @property
+    def n_kernel_drops(self):
+        return self._connection.n_kernel_drops
+
+    def close(self):
+        self._receiver.stop()
@@ -0,0 +1,86 @@
+import socket
+import struct
+import unittest
+
+import numpy
+
+from pacman.model.placements import Placement
+from spinnaker_graph_front_end.extraction import DataExtractionStream, \
+    InMemoryTransport, NackPacer, ReceiveTimeoutEstimator, UDPPacketIngest
+try:
+    import asyncio
+    from spinnaker_graph_front_end.extraction.async_data_extraction import \
+        extract_data_async
+except ImportError:
+    asyncio = None
+
+END_FLAG = struct.pack("<I", DataExtractionStream.END_FLAG)
+
+
+class _Board(object):
+    """ A reader core whose packets are sent to a socket over localhost as\
+        soon as it is asked for them, after any left over from before
+    """
+
+    def __init__(self, data, port, drop, stale):
+        self._reader = InMemoryTransport(data, drop)
+        self._address = ("127.0.0.1", port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._stale = list(stale)
+
+    def send_sdp_message(self, message):
+        self._reader.send(message)
+        packets = self._stale
+        self._stale = list()
+        packet = self._reader.receive(0)
+        while packet is not None:
+            packets.append(packet)
+            packet = self._reader.receive(0)
+        for packet in packets:
+            self._socket.sendto(packet, self._address)
+
+    def close(self):
+        self._socket.close()
+
+
+@unittest.skipIf(asyncio is None, "asyncio needs Python 3")
+class TestAsyncDataExtraction(unittest.TestCase):
+
+    def _extract(self, data, drop, stale=()):
+        connection = UDPPacketIngest(local_host="127.0.0.1")
+        board = _Board(data, connection.local_port, drop, stale)
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(extract_data_async(
+                DataExtractionStream(Placement(None, 0, 0, 1)), board,
+                connection, ReceiveTimeoutEstimator(0.01, 0.1),
+                NackPacer(initial_interval=0.0, min_interval=0.0),
+                loop=loop))
+        finally:
+            loop.close()
+            board.close()
+            connection.close()
+
+    def test_lost_packets_and_end_are_asked_for_again(self):
+        data = numpy.random.RandomState(1).bytes(268 * 200 + 30)
+        sent = list()
+
+        def drop(packet):
+            # lose a burst, a packet on its own, and the end of the first
+            # pass, so that the loss is only found by the timeout
+            sent.append(packet)
+            return len(sent) in (5, 6, 7, 50, 201)
+
+        output, telemetry = self._extract(data, drop)
+        self.assertEqual(bytes(output), data)
+        self.assertEqual(telemetry.n_timeouts, 1)
+        self.assertEqual(telemetry.missing_per_round[0], 5)
+
+    def test_stale_packet_before_the_first(self):
+        data = numpy.random.RandomState(2).bytes(268 * 20)
+        output, _ = self._extract(data, None, [END_FLAG])
+        self.assertEqual(bytes(output), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
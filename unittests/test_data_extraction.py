@@ -0,0 +1,225 @@
+import json
+import os
+import random
+import shutil
+import struct
+import tempfile
+import unittest
+
+import numpy
+
+from pacman.model.placements import Placement
+from spinnaker_graph_front_end.extraction import AbstractTransport, \
+    CapturingTransport, DataExtractionStream, InMemoryTransport, \
+    NackPacer, PacketTraceWriter, ReceiveTimeoutEstimator, extract_data, \
+    extract_data_multiplexed, extract_data_pipelined, replay_trace
+
+
+class _SharedSocket(AbstractTransport):
+    """ Many reader cores whose packets arrive interleaved on one socket
+    """
+
+    def __init__(self, transports):
+        self._transports = transports
+        self._next = 0
+
+    def send(self, message):
+        header = message.sdp_header
+        self._transports[header.destination_chip_x, header.destination_chip_y,
+                         header.destination_cpu].send(message)
+
+    def receive(self, timeout):
+        # interleave the packets of the reader cores
+        transports = list(self._transports.values())
+        for _ in transports:
+            self._next = (self._next + 1) % len(transports)
+            packet = transports[self._next].receive(timeout)
+            if packet is not None:
+                return packet
+        return None
+
+    def close(self):
+        pass
+
+
+class _CommandLog(AbstractTransport):
+    """ Keeps the commands sent to a reader core
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+        self.commands = list()
+
+    def send(self, message):
+        self.commands.append(struct.unpack_from("<I", message.data)[0])
+        self._transport.send(message)
+
+    def receive(self, timeout):
+        return self._transport.receive(timeout)
+
+    def close(self):
+        self._transport.close()
+
+
+class TestDataExtraction(unittest.TestCase):
+
+    def _extract(self, payload, drop, **kwargs):
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), n_bytes=len(payload), **kwargs)
+        transport = InMemoryTransport(payload, drop)
+        output, telemetry = extract_data(
+            stream, transport, ReceiveTimeoutEstimator(0.001, 0.01),
+            NackPacer(initial_interval=0.0, min_interval=0.0))
+        return stream, bytes(output), telemetry
+
+    @staticmethod
+    def _lossy(rng):
+        def drop(_packet):
+            return rng.random() < 0.05
+        return drop
+
+    def test_extracts_despite_loss(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 1000 + 100)))
+        rng = random.Random(1)
+        drop = self._lossy(rng)
+
+        stream, output, _ = self._extract(payload, drop)
+        self.assertEqual(output, payload)
+        self.assertGreater(stream.lost_seq_nums[0], 0)
+
+        stream, output, _ = self._extract(
+            payload, drop, fec_group_size=8, packet_checksums=True,
+            range_requests=False)
+        self.assertEqual(output, payload)
+
+    def test_telemetry(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 500 + 20)))
+        drop = self._lossy(random.Random(4))
+        stream, _, telemetry = self._extract(payload, drop)
+        self.assertEqual(telemetry.n_bytes, len(payload))
+        self.assertGreaterEqual(
+            telemetry.total_time, telemetry.time_to_first_packet)
+        self.assertGreaterEqual(telemetry.time_to_first_packet, 0.0)
+
+        # the last round finds nothing missing, whether or not the stream
+        # had to look
+        missing_per_round = list(stream.lost_seq_nums)
+        if missing_per_round[-1]:
+            missing_per_round.append(0)
+        self.assertEqual(telemetry.missing_per_round, missing_per_round)
+        self.assertEqual(
+            len(telemetry.round_durations), len(telemetry.missing_per_round))
+        self.assertLessEqual(
+            sum(telemetry.round_durations), telemetry.total_time + 1e-9)
+
+        # the start, and at least one request for each round that found
+        # something missing
+        self.assertGreater(
+            telemetry.n_request_packets, len(missing_per_round) - 1)
+        self.assertIsNone(telemetry.n_kernel_drops)
+
+        record = json.loads(telemetry.to_json())
+        self.assertEqual(record, telemetry.as_dict())
+        self.assertEqual(record["n_rounds"], len(missing_per_round))
+
+    def test_multiplexed_extractions(self):
+        rng = random.Random(2)
+        extractions = list()
+        transports = dict()
+        payloads = list()
+        for core in range(1, 9):
+            payload = bytes(bytearray(
+                (i + core) % 251 for i in range(268 * 100 * core + 16)))
+            reader = Placement(None, 1, 1, core)
+            gatherer = Placement(None, 0, 0, core)
+            transports[1, 1, core] = InMemoryTransport(
+                payload, self._lossy(rng),
+                gatherer_placement=gatherer)
+            extractions.append((gatherer, DataExtractionStream(
+                reader, n_bytes=len(payload))))
+            payloads.append(payload)
+
+        results = extract_data_multiplexed(
+            extractions, _SharedSocket(transports),
+            lambda: ReceiveTimeoutEstimator(0.02, 1.0),
+            NackPacer(initial_interval=0.0, min_interval=0.0))
+        self.assertEqual(
+            [bytes(output) for output, _ in results], payloads)
+
+    def test_pipelined_regions(self):
+        memory = bytes(bytearray(i % 253 for i in range(268 * 1000)))
+        regions = [(0x1000, 268 * 200 + 8), (0x20000, 268 * 300),
+                   (0x30000, 5), (0x1000, 268 * 150)]
+        transport = _CommandLog(InMemoryTransport(
+            memory, self._lossy(random.Random(4)), base_address=0x1000))
+        streams = [DataExtractionStream(
+            Placement(None, 0, 0, 1), n_bytes=n_bytes,
+            region_address=address) for address, n_bytes in regions]
+        results = extract_data_pipelined(
+            streams, transport, lambda: ReceiveTimeoutEstimator(0.001, 0.01),
+            NackPacer(initial_interval=0.0, min_interval=0.0))
+        self.assertEqual(
+            [bytes(output) for output, _ in results],
+            [memory[address - 0x1000:address - 0x1000 + n_bytes]
+             for address, n_bytes in regions])
+
+        # regions were started while the one before was still repaired
+        start = DataExtractionStream.SDP_PACKET_START_SENDING_COMMAND_ID
+        previous = \
+            DataExtractionStream.SDP_PACKET_PREVIOUS_MISSING_RANGES_COMMAND_ID
+        self.assertEqual(transport.commands.count(start), len(regions))
+        self.assertIn(previous, transport.commands)
+        self.assertLess(
+            transport.commands.index(previous),
+            len(transport.commands) - 1 -
+            transport.commands[::-1].index(start))
+
+    def test_compressed_regions(self):
+        # a ramp of words, then random bytes
+        memory = numpy.arange(268 * 500, dtype="<u4").tobytes() + \
+            numpy.random.RandomState(5).bytes(268 * 100)
+        drop = self._lossy(random.Random(6))
+        n_bytes_sent = list()
+        for address, n_bytes in [(0, 268 * 1000 + 3), (268 * 1900, 268 * 150)]:
+            stream = DataExtractionStream(
+                Placement(None, 0, 0, 1), n_bytes=n_bytes,
+                region_address=address, compression=True)
+            output, telemetry = extract_data(
+                stream, InMemoryTransport(memory, drop),
+                ReceiveTimeoutEstimator(0.001, 0.01),
+                NackPacer(initial_interval=0.0, min_interval=0.0))
+            self.assertEqual(
+                bytes(output), memory[address:address + n_bytes])
+            self.assertEqual(telemetry.n_bytes, n_bytes)
+            n_bytes_sent.append(stream.n_bytes)
+
+        # the ramp goes over as a handful of words, the random bytes whole
+        self.assertLess(n_bytes_sent[0], 100)
+        self.assertGreater(n_bytes_sent[1], 268 * 50)
+
+    def test_replays_captured_extraction(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 300 + 40)))
+        drop = self._lossy(random.Random(3))
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "extraction.trace")
+            stream = DataExtractionStream(
+                Placement(None, 0, 0, 1), fec_group_size=4,
+                n_bytes=len(payload))
+            transport = CapturingTransport(
+                InMemoryTransport(payload, drop),
+                PacketTraceWriter(filename, stream))
+            extract_data(
+                stream, transport, ReceiveTimeoutEstimator(0.001, 0.01),
+                NackPacer(initial_interval=0.0, min_interval=0.0))
+            transport.close()
+
+            replayed, _, _ = replay_trace(filename)
+            self.assertEqual(bytes(replayed.output), payload)
+            self.assertEqual(replayed.lost_seq_nums, stream.lost_seq_nums)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,314 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import numpy
+
+from pacman.model.placements import Placement
+from spinnman.messages.sdp import SDPMessage
+from spinnaker_graph_front_end.extraction import DataExtractionStream, \
+    MemoryMappedOutputSink
+
+END_FLAG = b"\xff\xff\xff\xff"
+
+
+def _packets(payload):
+    """ Split a payload up the way the reader core does
+    """
+    packets = [struct.pack("<I", len(payload)) + payload[:268]]
+    for seq_num in range(1, (len(payload) - 1) // 268 + 1):
+        packets.append(struct.pack("<I", seq_num) +
+                       payload[seq_num * 268:(seq_num + 1) * 268])
+    packets[-1] += END_FLAG
+    return packets
+
+
+def _checksum_packet(payload, block):
+    """ Build the checksum packet of a block the way the reader core does
+    """
+    padded = payload + b"\0" * (-len(payload) % 268)
+    words = numpy.frombuffer(padded, dtype="<u4").reshape(-1, 67)[
+        block * 67:(block + 1) * 67].astype(numpy.uint64)
+    checksums = numpy.zeros(67, dtype="<u4")
+    checksums[:len(words)] = numpy.dot(
+        words, numpy.arange(1, 134, 2, dtype=numpy.uint64)) & 0xFFFFFFFF
+    return struct.pack(
+        "<I", DataExtractionStream.CHECKSUM_SEQ_NUM_FLAG | block) + \
+        checksums.tobytes()
+
+
+class TestDataExtractionStream(unittest.TestCase):
+
+    def test_reassembles_in_any_order(self):
+        payload = bytes(bytearray(i % 251 for i in range(2000)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(Placement(None, 0, 0, 1))
+        self.assertEqual(stream.process_packet(packets[0]), [])
+        for packet in reversed(packets[1:]):
+            stream.process_packet(packet)
+        self.assertEqual(bytes(stream.output), payload)
+
+    def test_missing_packets_are_requested(self):
+        payload = bytes(bytearray(i % 251 for i in range(2000)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(Placement(None, 0, 0, 1))
+        stream.process_packet(packets[0])
+        stream.process_packet(packets[1])
+        messages = stream.process_packet(packets[-1])
+        self.assertFalse(stream.is_finished)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(
+            struct.unpack("<7I", messages[0].data),
+            (DataExtractionStream.SDP_PACKET_START_MISSING_SEQ_COMMAND_ID,
+             1, 2, 3, 4, 5, 6))
+        self.assertEqual(stream.lost_seq_nums, [5])
+
+        for packet in packets[2:-1]:
+            stream.process_packet(packet)
+        self.assertEqual(stream.process_packet(END_FLAG), [])
+        self.assertTrue(stream.is_finished)
+        self.assertEqual(bytes(stream.output), payload)
+
+    def test_first_and_last_packets_are_requested(self):
+        payload = bytes(bytearray(i % 251 for i in range(2000)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), n_bytes=len(payload))
+        stream.start_message()
+        self.assertEqual(len(stream.output), len(payload))
+        for packet in packets[1:-1]:
+            stream.process_packet(packet)
+        messages = stream.process_timeout()
+        self.assertEqual(
+            struct.unpack("<4I", messages[0].data),
+            (DataExtractionStream.SDP_PACKET_START_MISSING_SEQ_COMMAND_ID,
+             1, 0, 7))
+
+        # sent again, the first packet has its sequence number and the
+        # last is padded out to a whole packet
+        stream.process_packet(struct.pack("<I", 0) + payload[:268])
+        stream.process_packet(
+            struct.pack("<I", 7) + payload[7 * 268:] +
+            b"\0" * (8 * 268 - len(payload)))
+        self.assertEqual(stream.process_packet(END_FLAG), [])
+        self.assertTrue(stream.is_finished)
+        self.assertEqual(bytes(stream.output), payload)
+
+    def test_bursts_of_loss_are_requested_as_ranges(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 400)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(Placement(None, 0, 0, 1))
+        for packet in packets[:100] + packets[300:]:
+            stream.process_packet(packet)
+        messages = stream.process_timeout()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(
+            struct.unpack("<5I", messages[0].data),
+            (DataExtractionStream.SDP_PACKET_START_MISSING_RANGES_COMMAND_ID,
+             1, 200, 100, 200))
+
+    def test_gaps_reported_while_streaming(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 400)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), streaming_repair=True)
+        reports = list()
+        for packet in packets[:10] + packets[20:]:
+            stream.process_packet(packet)
+            reports.extend(stream.interim_repair_messages())
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(
+            struct.unpack("<3I", reports[0].data),
+            (DataExtractionStream.SDP_PACKET_INTERIM_MISSING_RANGES_COMMAND_ID,
+             10, 10))
+
+    def test_lost_packets_rebuilt_from_parity(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 20 + 100)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), fec_group_size=4)
+        self.assertEqual(
+            struct.unpack("<3I", stream.start_message().data),
+            (DataExtractionStream.SDP_PACKET_START_SENDING_COMMAND_ID, 4, 0))
+        words = numpy.frombuffer(
+            payload[:268 * 16], dtype="<u4").reshape(4, 4, 67)
+        for seq_num, packet in enumerate(packets):
+            if seq_num not in (1, 6):
+                self.assertEqual(stream.process_packet(packet), [])
+            if seq_num % 4 == 3 and seq_num < 16:
+                group = seq_num // 4
+                stream.process_packet(struct.pack(
+                    "<I", DataExtractionStream.PARITY_SEQ_NUM_FLAG | group) +
+                    numpy.bitwise_xor.reduce(words[group]).tobytes())
+        self.assertTrue(stream.is_finished)
+        self.assertEqual(stream.lost_seq_nums, [])
+        self.assertEqual(bytes(stream.output), payload)
+
+    def test_parity_packets_only_taken_when_asked_for(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 20 + 100)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(Placement(None, 0, 0, 1))
+        stream.process_packet(packets[0])
+        self.assertEqual(stream.process_packet(
+            struct.pack("<I", DataExtractionStream.PARITY_SEQ_NUM_FLAG) +
+            b"\0" * 268), [])
+        for packet in packets[1:]:
+            stream.process_packet(packet)
+        self.assertTrue(stream.is_finished)
+        self.assertEqual(bytes(stream.output), payload)
+
+        # a size that is also the number of a parity packet of the same
+        # data cannot be told apart from it
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), fec_group_size=4,
+            n_bytes=DataExtractionStream.PARITY_SEQ_NUM_FLAG + 5)
+        with self.assertRaises(Exception):
+            stream.start_message()
+
+    def test_corrupted_packets_are_requested(self):
+        payload = bytes(bytearray(i % 251 for i in range(268 * 100 + 100)))
+        packets = _packets(payload)
+        corrupted = bytearray(packets[5])
+        corrupted[100] ^= 1
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), packet_checksums=True)
+        for packet in packets[:5] + [corrupted] + packets[6:67]:
+            stream.process_packet(packet)
+        stream.process_packet(_checksum_packet(payload, 0))
+        self.assertEqual(stream.n_corrupted, 1)
+        for packet in packets[67:-1]:
+            stream.process_packet(packet)
+        stream.process_packet(_checksum_packet(payload, 1))
+        messages = stream.process_packet(packets[-1])
+        self.assertEqual(
+            struct.unpack("<3I", messages[0].data),
+            (DataExtractionStream.SDP_PACKET_START_MISSING_SEQ_COMMAND_ID,
+             1, 5))
+
+        stream.process_packet(packets[5])
+        self.assertEqual(stream.process_packet(END_FLAG), [])
+        self.assertTrue(stream.is_finished)
+        self.assertEqual(stream.n_corrupted, 1)
+        self.assertEqual(bytes(stream.output), payload)
+
+    def test_checksum_packets_only_taken_when_asked_for(self):
+        payload = bytes(bytearray(i % 251 for i in range(2000)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(Placement(None, 0, 0, 1))
+        stream.process_packet(packets[0])
+        self.assertEqual(
+            stream.process_packet(_checksum_packet(payload, 0)), [])
+        for packet in packets[1:]:
+            stream.process_packet(packet)
+        self.assertTrue(stream.is_finished)
+        self.assertEqual(bytes(stream.output), payload)
+
+        # a size that is also the number of a checksum packet of the same
+        # data cannot be told apart from it
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), packet_checksums=True,
+            n_bytes=DataExtractionStream.CHECKSUM_SEQ_NUM_FLAG + 5)
+        with self.assertRaises(Exception):
+            stream.start_message()
+
+    def test_completed_chunks(self):
+        payload = bytes(bytearray(i % 251 for i in range(2000)))
+        packets = _packets(payload)
+        stream = DataExtractionStream(Placement(None, 0, 0, 1))
+        self.assertIsNone(stream.take_completed_chunk())
+        stream.process_packet(packets[0])
+        self.assertEqual(stream.take_completed_chunk()[0], 0)
+        stream.process_packet(packets[2])
+        self.assertIsNone(stream.take_completed_chunk())
+        stream.process_packet(packets[1])
+        offset, chunk = stream.take_completed_chunk()
+        self.assertEqual(offset, 268)
+        self.assertEqual(chunk.tobytes(), payload[268:804])
+        for packet in packets[3:]:
+            stream.process_packet(packet)
+        offset, chunk = stream.take_completed_chunk()
+        self.assertEqual(chunk.tobytes(), payload[804:])
+
+    def test_memory_mapped_output(self):
+        payload = bytes(bytearray(i % 251 for i in range(2000)))
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "extracted.dat")
+            stream = DataExtractionStream(
+                Placement(None, 0, 0, 1), MemoryMappedOutputSink(filename))
+            for packet in _packets(payload):
+                stream.process_packet(memoryview(bytearray(packet)))
+            self.assertTrue(stream.is_finished)
+            self.assertIsInstance(stream.output, numpy.memmap)
+            stream.output.flush()
+            with open(filename, "rb") as f:
+                self.assertEqual(f.read(), payload)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_resume_from_checkpoint(self):
+        payload = bytes(bytearray(i % 251 for i in range(2000)))
+        packets = _packets(payload)
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "extracted.dat")
+            stream = DataExtractionStream(
+                Placement(None, 0, 0, 1), MemoryMappedOutputSink(filename))
+            self.assertIsNone(stream.resume())
+            for packet in packets[:3]:
+                stream.process_packet(packet)
+            stream.save_checkpoint()
+
+            sink = MemoryMappedOutputSink(filename)
+            stream = DataExtractionStream(Placement(None, 0, 0, 1), sink)
+            messages = stream.resume()
+            self.assertEqual(
+                struct.unpack("<7I", messages[0].data),
+                (DataExtractionStream.SDP_PACKET_START_MISSING_SEQ_COMMAND_ID,
+                 1, 3, 4, 5, 6, 7))
+            for packet in packets[3:]:
+                stream.process_packet(packet)
+            self.assertTrue(stream.is_finished)
+            self.assertEqual(stream.output.tobytes(), payload)
+            stream.remove_checkpoint()
+            self.assertFalse(os.path.exists(sink.checkpoint_filename))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_size_with_flag_bits_set(self):
+        # the size of a transfer of 512 MiB or more looks like a flag
+        n_bytes = 600 * 1024 * 1024
+        payload = bytes(bytearray(i % 251 for i in range(268)))
+        directory = tempfile.mkdtemp()
+        try:
+            stream = DataExtractionStream(
+                Placement(None, 0, 0, 1), MemoryMappedOutputSink(
+                    os.path.join(directory, "extracted.dat")),
+                n_bytes=n_bytes)
+            stream.start_message()
+            self.assertEqual(stream.process_packet(
+                struct.pack("<I", n_bytes) + payload), [])
+            self.assertIn(0, stream.seq_nums)
+            self.assertEqual(stream.output[:268].tobytes(), payload)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_size_must_be_whole_bytes(self):
+        # a size worked out from megabytes is taken if it is whole
+        stream = DataExtractionStream(
+            Placement(None, 0, 0, 1), n_bytes=2000.0)
+        self.assertEqual(stream.n_bytes, 2000)
+        self.assertIsInstance(stream.start_message(), SDPMessage)
+        with self.assertRaises(Exception):
+            DataExtractionStream(Placement(None, 0, 0, 1), n_bytes=2000.5)
+
+    def test_timeout_before_any_data(self):
+        stream = DataExtractionStream(Placement(None, 0, 0, 1))
+        with self.assertRaises(Exception):
+            stream.process_timeout()
+
+
+if __name__ == "__main__":
+    unittest.main()
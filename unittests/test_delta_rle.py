@@ -0,0 +1,36 @@
+import struct
+import unittest
+
+import numpy
+
+from spinnaker_graph_front_end.extraction import compress_delta_rle, \
+    decompress_delta_rle
+
+
+class TestDeltaRLE(unittest.TestCase):
+
+    def test_round_trip(self):
+        rng = numpy.random.RandomState(0)
+        steps = numpy.repeat(
+            rng.randint(0, 3, 500).astype("<u4"), rng.randint(1, 9, 500))
+        for data in [b"", b"\x01", b"abcdefg", bytes(1000), rng.bytes(999),
+                     numpy.cumsum(steps, dtype="<u4").tobytes() + b"xy"]:
+            self.assertEqual(
+                bytes(decompress_delta_rle(compress_delta_rle(data))), data)
+
+    def test_ramp_compresses_to_one_run(self):
+        data = numpy.arange(1, 100001, dtype="<u4").tobytes()
+        compressed = compress_delta_rle(data)
+        self.assertEqual(struct.unpack("<3I", compressed),
+                         (len(data), 0x80000000 | 100000, 1))
+
+        # the output can be provided
+        output = bytearray(len(data))
+        self.assertIs(decompress_delta_rle(compressed, output), output)
+        self.assertEqual(bytes(output), data)
+        with self.assertRaises(Exception):
+            decompress_delta_rle(compressed[:-4])
+
+
+if __name__ == "__main__":
+    unittest.main()
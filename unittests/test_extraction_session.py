@@ -0,0 +1,80 @@
+import unittest
+
+from pacman.model.placements import Placement
+from spinnaker_graph_front_end.extraction import ExtractionSession
+
+
+class _Chip(object):
+    def __init__(self, x, y):
+        self.nearest_ethernet_x = x - x % 8
+        self.nearest_ethernet_y = y - y % 8
+
+
+class _Machine(object):
+    def get_chip_at(self, x, y):
+        return _Chip(x, y)
+
+
+class _Placements(object):
+    def __init__(self, placements):
+        self._placements = placements
+
+    def get_placement_of_vertex(self, vertex):
+        return self._placements[vertex]
+
+
+class _Gatherer(object):
+    def __init__(self, log):
+        self._log = log
+
+    def set_cores_for_data_extraction(self, **_kwargs):
+        self._log.append("set")
+
+    def unset_cores_for_data_extraction(self, **_kwargs):
+        self._log.append("unset")
+
+    def get_data(self, _transceiver, placement, memory_address, length):
+        self._log.append((self, placement.x, placement.y, memory_address))
+        return bytearray(length)
+
+
+class TestExtractionSession(unittest.TestCase):
+
+    def _session(self, log):
+        monitors = {"m{}".format(x): Placement(None, x, x, 0)
+                    for x in (0, 1, 8)}
+        gatherers = {(0, 0): _Gatherer(log), (8, 8): _Gatherer(log)}
+        return ExtractionSession(
+            None, _Placements(monitors), _Machine(), list(monitors),
+            gatherers), gatherers
+
+    def test_sets_monitors_up_once_for_many_reads(self):
+        log = list()
+        session, gatherers = self._session(log)
+        with session:
+            with session:
+                data = session.read_many([
+                    (Placement(None, 1, 1, 3), 100, 8),
+                    (Placement(None, 8, 8, 2), 200, 4)])
+            self.assertTrue(session.is_active)
+        self.assertFalse(session.is_active)
+        self.assertEqual([len(block) for block in data], [8, 4])
+        self.assertEqual(log, [
+            "set", (gatherers[0, 0], 1, 1, 100),
+            (gatherers[8, 8], 8, 8, 200), "unset"])
+
+    def test_puts_monitors_back_on_failure(self):
+        log = list()
+        session, _ = self._session(log)
+        with self.assertRaises(KeyError):
+            with session:
+                session.read(Placement(None, 5, 5, 1), 0, 4)
+        self.assertEqual(log, ["set", "unset"])
+
+        # reading outside the session would be slow, so is not allowed
+        with self.assertRaises(Exception):
+            session.read(Placement(None, 0, 0, 1), 0, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
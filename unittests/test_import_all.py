@@ -1,4 +1,5 @@
 import os
+import sys
 import unittest
 
 import spinn_utilities.package_loader as package_loader
@@ -42,6 +43,11 @@ EXCLUSIONS = ["spinnaker_graph_front_end.examples.Conways."
               "spinnaker_graph_front_end.examples.test_timer_setup_cost."
               "test_timer_setup_cost"]
 
+# asyncio is only available on Python 3
+if sys.version_info < (3, ):
+    EXCLUSIONS.append(
+        "spinnaker_graph_front_end.extraction.async_data_extraction")
+
 
 class ImportAllModule(unittest.TestCase):
 
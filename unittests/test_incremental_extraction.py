@@ -0,0 +1,82 @@
+import random
+import unittest
+
+import numpy
+
+from pacman.model.placements import Placement
+from spinnaker_graph_front_end.extraction import DataExtractionStream, \
+    InMemoryTransport, NackPacer, ReceiveTimeoutEstimator, RegionCache, \
+    extract_data_incremental, page_checksums
+
+
+class TestIncrementalExtraction(unittest.TestCase):
+
+    def test_page_checksums(self):
+        data = numpy.arange(1, 11, dtype="<u4").tobytes()
+        # the weights go 1, 3, 5, ... from the start of each page
+        self.assertEqual(
+            page_checksums(data, 16).tolist(),
+            [1 + 2 * 3 + 3 * 5 + 4 * 7, 5 + 6 * 3 + 7 * 5 + 8 * 7,
+             9 + 10 * 3])
+
+        # the bytes past the end count as 0
+        self.assertEqual(
+            page_checksums(data[:-3], 16)[-1], page_checksums(
+                data[:-4] + b"\x0a\0\0\0", 16)[-1])
+
+        # any change to one word shows, even swapping two words
+        self.assertNotEqual(
+            page_checksums(data, 16)[0], page_checksums(
+                data[4:8] + data[:4] + data[8:], 16)[0])
+
+    def test_fetches_only_what_changed(self):
+        rng = random.Random(1)
+        memory = bytearray(numpy.random.RandomState(2).bytes(268 * 1000))
+        transport = InMemoryTransport(
+            bytes(memory), lambda _: rng.random() < 0.05,
+            base_address=0x60000000)
+        placement = Placement(None, 0, 0, 1)
+        cache = RegionCache(1024)
+
+        def new_stream(placement, region_address, n_bytes, page_size):
+            return DataExtractionStream(
+                placement, n_bytes=n_bytes, region_address=region_address,
+                page_size=page_size)
+
+        def read(reads):
+            results = extract_data_incremental(
+                reads, cache, transport,
+                lambda: ReceiveTimeoutEstimator(0.001, 0.01),
+                NackPacer(initial_interval=0.0, min_interval=0.0), new_stream)
+            for (_, address, n_bytes), (data, _) in zip(reads, results):
+                start = address - 0x60000000
+                self.assertEqual(bytes(data), memory[start:start + n_bytes])
+            return [sum(telemetry.n_bytes for telemetry in telemetries)
+                    for _, telemetries in results]
+
+        reads = [(placement, 0x60000000, 100001),
+                 (placement, 0x60000000 + 150000, 20000)]
+        self.assertEqual(read(reads), [100001, 20000])
+        self.assertEqual(len(cache), 2)
+
+        # change a word in one page of the first region, and add to the end
+        # of the second
+        for address, data in [(5000, b"\x01\x02\x03\x04"),
+                              (170000, b"more")]:
+            memory[address:address + len(data)] = data
+            transport.write(0x60000000 + address, data)
+        reads[1] = (placement, 0x60000000 + 150000, 20004)
+        self.assertEqual(read(reads), [
+            (-(-100001 // 1024)) * 4 + 1024, (-(-20000 // 1024)) * 4 + 4])
+
+        # nothing changed, so only the checksums are fetched
+        self.assertEqual(read(reads), [
+            (-(-100001 // 1024)) * 4, (-(-20004 // 1024)) * 4])
+
+        # a region forgotten is read in full again
+        cache.forget(placement)
+        self.assertEqual(read(reads), [100001, 20004])
+
+
+if __name__ == "__main__":
+    unittest.main()
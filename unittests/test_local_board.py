@@ -0,0 +1,29 @@
+import unittest
+
+import numpy
+
+from spinnaker_graph_front_end.extraction import UDPConnectionPool, \
+    benchmark_extraction
+
+
+class TestLocalBoard(unittest.TestCase):
+
+    def test_extracts_over_lossy_link(self):
+        data = numpy.random.RandomState(1).bytes(268 * 2000 + 30)
+        pool = UDPConnectionPool(local_host="127.0.0.1")
+        try:
+            output, telemetry, board = benchmark_extraction(
+                data, pool.connection("gatherer"), bandwidth=200e6,
+                latency=0.001, loss=0.01, burst_loss=0.002, burst_length=8,
+                reorder=0.01, seed=2, receive_timeout_floor=0.01,
+                receive_timeout_ceiling=0.5)
+        finally:
+            pool.close()
+        self.assertEqual(bytes(output), data)
+        self.assertGreater(board.n_packets_lost, 0)
+        self.assertGreater(len(telemetry.missing_per_round), 1)
+        self.assertEqual(telemetry.missing_per_round[-1], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
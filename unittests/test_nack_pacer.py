@@ -0,0 +1,39 @@
+import unittest
+
+from spinnaker_graph_front_end.extraction import NackPacer
+
+
+class TestNackPacer(unittest.TestCase):
+
+    def test_speeds_up_when_requests_get_through(self):
+        pacer = NackPacer(initial_interval=0.01, min_interval=0.004)
+        pacer.request_sent(3)
+        pacer.data_received()
+        self.assertAlmostEqual(pacer.interval, 0.005)
+
+        # only the first data after a request counts
+        pacer.data_received()
+        self.assertAlmostEqual(pacer.interval, 0.005)
+
+        pacer.request_sent(3)
+        pacer.data_received()
+        self.assertAlmostEqual(pacer.interval, 0.004)
+
+    def test_backs_off_when_requests_are_lost(self):
+        pacer = NackPacer(initial_interval=0.01, max_interval=0.05)
+        pacer.request_sent(3)
+        pacer.timed_out()
+        self.assertAlmostEqual(pacer.interval, 0.04)
+        pacer.request_sent(3)
+        pacer.timed_out()
+        self.assertAlmostEqual(pacer.interval, 0.05)
+
+    def test_single_packet_requests_are_ignored(self):
+        pacer = NackPacer(initial_interval=0.01)
+        pacer.request_sent(1)
+        pacer.timed_out()
+        self.assertAlmostEqual(pacer.interval, 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
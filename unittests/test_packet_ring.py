@@ -0,0 +1,133 @@
+import socket
+import threading
+import time
+import unittest
+
+from spinnaker_graph_front_end.extraction import PacketReceiverThread, \
+    PacketRing, UDPPacketIngest, UDPSDPTransport
+
+
+class _BrokenConnection(object):
+    """ A socket that fails as soon as anything is received from it
+    """
+    local_port = 0
+
+    def receive_into(self, buffer, timeout=None):
+        raise IOError("the socket is broken")
+
+
+def _put(ring, data):
+    slot = ring.writable_slot(0)
+    slot[:len(data)] = data
+    ring.commit(len(data))
+
+
+class TestPacketRing(unittest.TestCase):
+
+    def test_wraps_around(self):
+        ring = PacketRing(3, 8)
+        for index in range(10):
+            _put(ring, b"packet" + bytes(bytearray([index])))
+            _put(ring, b"p")
+            self.assertEqual(len(ring), 2)
+            self.assertEqual(
+                ring.readable_slot(0).tobytes(),
+                b"packet" + bytes(bytearray([index])))
+            ring.release()
+            self.assertEqual(ring.readable_slot(0).tobytes(), b"p")
+            ring.release()
+            self.assertEqual(len(ring), 0)
+
+    def test_full(self):
+        ring = PacketRing(2, 8)
+        _put(ring, b"a")
+        _put(ring, b"b")
+        self.assertIsNone(ring.writable_slot(0.01))
+
+        # a producer waiting for room is woken when a packet is released
+        def release():
+            time.sleep(0.05)
+            ring.readable_slot(0)
+            ring.release()
+        thread = threading.Thread(target=release)
+        thread.start()
+        self.assertIsNotNone(ring.writable_slot(5.0))
+        thread.join()
+        self.assertEqual(len(ring), 1)
+
+    def test_readable_slot_times_out(self):
+        ring = PacketRing(2, 8)
+        start = time.time()
+        self.assertIsNone(ring.readable_slot(0.05))
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+        # a consumer waiting for a packet is woken when one is committed
+        thread = threading.Timer(0.05, _put, (ring, b"late"))
+        thread.start()
+        self.assertEqual(ring.readable_slot(5.0).tobytes(), b"late")
+        thread.join()
+
+    def test_release_order(self):
+        ring = PacketRing(4, 8)
+        for data in (b"a", b"bb", b"ccc"):
+            _put(ring, data)
+
+        # the same packet is handed out until it is released
+        self.assertEqual(ring.readable_slot(0).tobytes(), b"a")
+        self.assertEqual(ring.readable_slot(0).tobytes(), b"a")
+        ring.release()
+        self.assertEqual(ring.readable_slot(0).tobytes(), b"bb")
+        ring.release()
+        _put(ring, b"dddd")
+        self.assertEqual(ring.readable_slot(0).tobytes(), b"ccc")
+        ring.release()
+        self.assertEqual(ring.readable_slot(0).tobytes(), b"dddd")
+        ring.release()
+        self.assertIsNone(ring.readable_slot(0))
+
+
+class TestPacketReceiverThread(unittest.TestCase):
+
+    def test_drains_socket_and_stops(self):
+        connection = UDPPacketIngest(local_host="127.0.0.1")
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        ring = PacketRing(2, UDPPacketIngest.DEFAULT_SLOT_SIZE)
+        receiver = PacketReceiverThread(connection, ring)
+        receiver.start()
+        try:
+            for index in range(5):
+                sender.sendto(bytes(bytearray([index])) * 10,
+                              ("127.0.0.1", connection.local_port))
+
+            # the packets arrive in order, as the ring has room for them
+            for index in range(5):
+                packet = ring.readable_slot(5.0)
+                self.assertEqual(
+                    packet.tobytes(), bytes(bytearray([index])) * 10)
+                ring.release()
+
+            # stopping with the ring full still joins
+            for _ in range(3):
+                sender.sendto(b"x", ("127.0.0.1", connection.local_port))
+            deadline = time.time() + 5.0
+            while len(ring) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(ring), 2)
+        finally:
+            receiver.stop()
+            sender.close()
+            connection.close()
+        self.assertFalse(receiver.is_alive())
+        self.assertIsNone(receiver.error)
+
+    def test_error_reaches_reader(self):
+        transport = UDPSDPTransport(None, _BrokenConnection())
+        try:
+            with self.assertRaises(IOError):
+                transport.receive(0.1)
+        finally:
+            transport.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from spinnaker_graph_front_end.extraction import ReceiveTimeoutEstimator
+
+
+class TestReceiveTimeoutEstimator(unittest.TestCase):
+
+    def test_ceiling_until_measured(self):
+        timeouts = ReceiveTimeoutEstimator(0.01, 1.0)
+        self.assertEqual(timeouts.timeout, 1.0)
+        timeouts.request_sent(0.0)
+        self.assertEqual(timeouts.timeout, 1.0)
+
+    def test_derived_from_gaps_and_round_trips(self):
+        timeouts = ReceiveTimeoutEstimator(0.01, 1.0)
+        timeouts.request_sent(0.0)
+        timeouts.packet_received(0.1)
+        for packet in range(1, 100):
+            timeouts.packet_received(0.1 + packet * 0.001)
+
+        # the gaps are steady, so the floor applies
+        self.assertEqual(timeouts.timeout, 0.01)
+
+        # a request waits on the round trip time instead
+        timeouts.request_sent(1.0)
+        self.assertAlmostEqual(timeouts.timeout, 0.3)
+
+    def test_backs_off_on_timeouts(self):
+        timeouts = ReceiveTimeoutEstimator(0.01, 1.0)
+        timeouts.request_sent(0.0)
+        timeouts.packet_received(0.1)
+        timeouts.request_sent(1.0)
+        timeouts.timed_out()
+        self.assertAlmostEqual(timeouts.timeout, 0.6)
+        timeouts.timed_out()
+        self.assertEqual(timeouts.timeout, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from spinnaker_graph_front_end.extraction import ReceivedSequenceTracker
+
+
+class TestReceivedSequenceTracker(unittest.TestCase):
+
+    def test_missing(self):
+        tracker = ReceivedSequenceTracker(10)
+        for seq_num in [1, 2, 5, 6, 10]:
+            self.assertTrue(tracker.add(seq_num))
+        self.assertFalse(tracker.add(5))
+        self.assertEqual(len(tracker), 5)
+        self.assertEqual(tracker.n_missing, 5)
+        self.assertIn(5, tracker)
+        self.assertNotIn(3, tracker)
+        self.assertNotIn(11, tracker)
+        self.assertEqual(list(tracker.missing()), [3, 4, 7, 8, 9])
+        self.assertEqual(list(tracker.missing(4, 8)), [4, 7])
+        starts, lengths = tracker.missing_runs()
+        self.assertEqual(list(starts), [3, 7])
+        self.assertEqual(list(lengths), [2, 3])
+        starts, lengths = tracker.missing_runs(4, 8)
+        self.assertEqual(list(starts), [4, 7])
+        self.assertEqual(list(lengths), [1, 1])
+        self.assertEqual(tracker.n_contiguous, 2)
+        tracker.add(3)
+        tracker.add(4)
+        self.assertEqual(tracker.n_contiguous, 6)
+
+    def test_complete_and_discard(self):
+        tracker = ReceivedSequenceTracker(4, first_seq_num=0)
+        for seq_num in range(4):
+            tracker.add(seq_num)
+        self.assertTrue(tracker.is_complete)
+        self.assertEqual(len(tracker.missing()), 0)
+        self.assertEqual(tracker.n_contiguous, 4)
+        tracker.discard(0)
+        self.assertFalse(tracker.is_complete)
+        self.assertEqual(tracker.n_contiguous, 0)
+        self.assertEqual(list(tracker.missing()), [0])
+
+    def test_out_of_range(self):
+        tracker = ReceivedSequenceTracker(4)
+        with self.assertRaises(IndexError):
+            tracker.add(0)
+        with self.assertRaises(IndexError):
+            tracker.add(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
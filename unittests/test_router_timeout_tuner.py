@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from spinnaker_graph_front_end.extraction import RouterTimeoutTuner
+
+
+class _Telemetry(object):
+    """ The record of an extraction from a board that is fastest with a\
+        timeout exponent of 9 and loses packets below 7
+    """
+
+    def __init__(self, timeout):
+        _, exponent = timeout
+        self.n_bytes = 268 * 1000
+        self.megabits_per_second = 100.0 - 10.0 * abs(exponent - 9)
+        self.missing_per_round = [100 if exponent < 7 else 0, 0]
+
+
+class TestRouterTimeoutTuner(unittest.TestCase):
+
+    def _run(self, tuner, n_extractions):
+        for _ in range(n_extractions):
+            tuner.record([_Telemetry(tuner.timeout)])
+
+    def test_converges_on_fastest_timeout(self):
+        tuner = RouterTimeoutTuner("board")
+        self.assertEqual(tuner.timeout, RouterTimeoutTuner.DEFAULT_TIMEOUT)
+        self._run(tuner, 20)
+        self.assertEqual(tuner.timeout, (15, 9))
+
+        # losses make it wait longer
+        tuner = RouterTimeoutTuner("board")
+        tuner._index = RouterTimeoutTuner.TIMEOUTS.index((15, 5))
+        tuner.record([_Telemetry(tuner.timeout)])
+        self.assertEqual(tuner.timeout, (15, 6))
+        tuner.failed()
+        self.assertEqual(tuner.timeout, (15, 7))
+
+    def test_keeps_what_is_learned_per_board(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "timeouts.json")
+            tuner = RouterTimeoutTuner("board", filename)
+            self._run(tuner, 20)
+            other = RouterTimeoutTuner("other board", filename)
+            other.record([_Telemetry(other.timeout)])
+
+            tuner = RouterTimeoutTuner("board", filename)
+            self.assertEqual(tuner.timeout, (15, 9))
+            self.assertIn((15, 10), tuner.measurements)
+            other = RouterTimeoutTuner("other board", filename)
+            self.assertEqual(other.timeout, (15, 14))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import socket
+import unittest
+
+from spinnman.exceptions import SpinnmanTimeoutException
+from spinnaker_graph_front_end.extraction import UDPConnectionPool
+
+
+class TestUDPConnectionPool(unittest.TestCase):
+
+    def test_one_socket_per_gatherer_reused(self):
+        pool = UDPConnectionPool(local_host="127.0.0.1")
+        try:
+            first, second = object(), object()
+            port = pool.port_for(first)
+            self.assertNotEqual(port, pool.port_for(second))
+            connection = pool.connection(first)
+            self.assertIs(connection, pool.connection(first))
+            self.assertEqual(connection.local_port, port)
+
+            # anything left over is thrown away when handed out again
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sender.sendto(b"data", ("127.0.0.1", port))
+                self.assertEqual(connection.receive(timeout=1.0), b"data")
+                sender.sendto(b"stale", ("127.0.0.1", port))
+                sender.sendto(b"stale", ("127.0.0.1", port))
+            finally:
+                sender.close()
+            pool.connection(first)
+            with self.assertRaises(SpinnmanTimeoutException):
+                connection.receive(timeout=0.01)
+
+            pool.release(first)
+            self.assertNotIn(first, pool)
+            self.assertEqual(len(pool), 1)
+        finally:
+            pool.close()
+        self.assertEqual(len(pool), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import socket
+import unittest
+
+from spinnman.exceptions import SpinnmanTimeoutException
+from spinnaker_graph_front_end.extraction import UDPPacketIngest
+
+
+class _NoDropCounts(UDPPacketIngest):
+    """ A socket on a kernel that does not count the datagrams it drops
+    """
+    PROC_NET_UDP = os.path.join(os.devnull, "udp")
+
+
+class TestUDPPacketIngest(unittest.TestCase):
+
+    def setUp(self):
+        self._ingest = UDPPacketIngest(local_host="127.0.0.1")
+        self._sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def tearDown(self):
+        self._sender.close()
+        self._ingest.close()
+
+    def _send(self, *datagrams):
+        for datagram in datagrams:
+            self._sender.sendto(
+                datagram, ("127.0.0.1", self._ingest.local_port))
+
+    def test_receive(self):
+        buffer = bytearray(UDPPacketIngest.DEFAULT_SLOT_SIZE)
+        self.assertIsNone(self._ingest.receive_queued_into(buffer))
+        self._send(b"first", b"second")
+        self.assertEqual(self._ingest.receive_into(buffer, 1.0), 5)
+        self.assertEqual(bytes(buffer[:5]), b"first")
+        self.assertEqual(self._ingest.receive(1.0), b"second")
+
+    def test_timeout(self):
+        with self.assertRaises(SpinnmanTimeoutException):
+            self._ingest.receive(timeout=0.01)
+        with self.assertRaises(SpinnmanTimeoutException):
+            self._ingest.receive_into(bytearray(10), timeout=0.01)
+
+    def test_discard_pending(self):
+        self._send(b"stale", b"stale", b"stale")
+        self.assertEqual(self._ingest.receive_into(bytearray(10), 1.0), 5)
+        self.assertEqual(self._ingest.discard_pending(), 2)
+        self.assertEqual(self._ingest.discard_pending(), 0)
+        self._send(b"fresh")
+        self.assertEqual(self._ingest.receive(1.0), b"fresh")
+
+    def test_receive_buffer_sizing(self):
+        # a small transfer still gets the default, as the kernel may cap it
+        default = self._ingest.set_receive_buffer_size(
+            UDPPacketIngest.DEFAULT_RECEIVE_BUFFER_SIZE)
+        self.assertEqual(self._ingest.size_receive_buffer_for(1), default)
+        self.assertEqual(self._ingest.receive_buffer_size, default)
+
+        # more than can be asked for is capped rather than failing
+        self.assertGreaterEqual(
+            self._ingest.size_receive_buffer_for(10 ** 9), default)
+        self.assertGreaterEqual(
+            self._ingest.set_receive_buffer_size(2 ** 40), default)
+
+    @unittest.skipUnless(
+        os.path.exists(UDPPacketIngest.PROC_NET_UDP),
+        "the kernel does not count dropped datagrams")
+    def test_n_kernel_drops(self):
+        n_drops = self._ingest.n_kernel_drops
+        self.assertGreaterEqual(n_drops, 0)
+
+        # overflow a buffer as small as the kernel allows
+        self._ingest.set_receive_buffer_size(1)
+        self._send(*[b"\0" * 256] * 200)
+        self.assertGreater(self._ingest.n_kernel_drops, n_drops)
+
+    def test_n_kernel_drops_not_counted(self):
+        ingest = _NoDropCounts(local_host="127.0.0.1")
+        try:
+            self.assertIsNone(ingest.n_kernel_drops)
+        finally:
+            ingest.close()
+
+
+if __name__ == "__main__":
+    unittest.main()